@@ -1,5 +1,8 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+import asyncio
+import threading
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import os
@@ -13,8 +16,65 @@ ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
 
 # 2. Configurar el contexto de encriptación (Hashing)
-# Usamos 'bcrypt' porque es el estándar de oro para contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Usamos 'bcrypt' porque es el estándar de oro para contraseñas.
+# Si cambia BCRYPT_ROUNDS, los hashes viejos se marcan como "deprecated"
+# y se re-hashean de forma transparente en el siguiente login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# 3. Pool dedicado para hashing (bcrypt libera el GIL, así que hilos bastan)
+# Limitamos cuántos hashes corren a la vez y cuántos pueden esperar en cola.
+# Login y reset esperan el hash con 'await' (no ocupan hilos del threadpool de la API);
+# el registro sigue siendo síncrono y bloquea su hilo mientras espera, por eso el total
+# de cupos por defecto queda muy por debajo de los 40 hilos del threadpool de anyio.
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+HASH_QUEUE_DEPTH = int(os.getenv("PASSWORD_HASH_QUEUE_DEPTH", HASH_WORKERS))
+HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", min(HASH_WORKERS + HASH_QUEUE_DEPTH, 16)))
+HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", 10))
+
+_hash_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+class HashingBusy(Exception):
+    """El pool de hashing está lleno o el hash tardó demasiado (los routers responden 503)."""
+
+def _submit_hashing(fn, *args):
+    """
+    Encola una operación de bcrypt en el pool dedicado.
+    Si el pool y su cola están llenos, falla de inmediato en lugar de esperar.
+    """
+    if not _hash_slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = _hash_executor.submit(fn, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    # El cupo se libera cuando el hash termina de verdad (aunque el cliente ya no espere)
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return future
+
+def _run_hashing(fn, *args):
+    """Versión síncrona: el hilo del llamador espera el resultado."""
+    future = _submit_hashing(fn, *args)
+    try:
+        return future.result(timeout=HASH_TIMEOUT_SECONDS)
+    except FuturesTimeout:
+        raise HashingBusy()
+
+async def _run_hashing_async(fn, *args):
+    """Versión asíncrona: se espera con 'await', sin ocupar un hilo mientras tanto."""
+    future = _submit_hashing(fn, *args)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), HASH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HashingBusy()
 
 def verify_password(plain_password, hashed_password):
     """
@@ -22,14 +82,26 @@ def verify_password(plain_password, hashed_password):
     con el hash guardado en la base de datos.
     Devuelve True si coinciden.
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return _run_hashing(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password(plain_password, hashed_password):
+    """
+    Igual que verify_password, pero además devuelve un hash nuevo
+    si el guardado usa parámetros obsoletos (ej: menos rounds).
+    Retorna (es_valida, nuevo_hash_o_None).
+    """
+    return await _run_hashing_async(pwd_context.verify_and_update, plain_password, hashed_password)
 
 def get_password_hash(password):
     """
     Toma una contraseña nueva y la convierte en un hash seguro
     para guardarla en la base de datos.
     """
-    return pwd_context.hash(password)
+    return _run_hashing(pwd_context.hash, password)
+
+async def get_password_hash_async(password):
+    """get_password_hash para endpoints 'async def'."""
+    return await _run_hashing_async(pwd_context.hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
@@ -1,12 +1,38 @@
-from sqlalchemy.orm import Session
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy.orm import Session, selectinload, noload
 from app.models import Property, Unit
 from app.schemas import property as property_schema
+from app.pagination import decode_cursor, keyset_after
+from app.services.geo import index_property_locations
+from app.services.search import index_properties_text
 
-def get_properties_by_owner(db: Session, owner_id: str, skip: int = 0, limit: int = 100):
-    """Obtiene todos los edificios/casas de un dueño específico."""
-    return db.query(Property)\
-             .filter(Property.owner_id == owner_id, Property.is_deleted == False)\
-             .offset(skip).limit(limit).all()
+def get_properties_by_owner(
+    db: Session,
+    owner_id: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    include_units: bool = True
+):
+    """
+    Obtiene los edificios/casas de un dueño específico, paginados por (created_at, id).
+    Las unidades se cargan en una sola consulta extra (selectinload) o se omiten.
+    """
+    query = db.query(Property)\
+              .filter(Property.owner_id == owner_id, Property.is_deleted == False)
+
+    if cursor:
+        created_at, property_id = decode_cursor(cursor, (datetime, str))
+        query = query.filter(keyset_after([
+            (Property.created_at, created_at, False),
+            (Property.id, property_id, False),
+        ]))
+
+    units_option = selectinload(Property.units) if include_units else noload(Property.units)
+
+    return query.options(units_option)\
+                .order_by(Property.created_at, Property.id)\
+                .limit(limit).all()
 
 def create_property_with_units(db: Session, property: property_schema.PropertyCreate, owner_id: str):
     """
@@ -23,7 +49,9 @@ def create_property_with_units(db: Session, property: property_schema.PropertyCr
         description=property.description,
         amenities=property.amenities,
         latitude=property.latitude,
-        longitude=property.longitude
+        longitude=property.longitude,
+        # Explícito (no server_default) para que el cursor del listado compare con la misma precisión
+        created_at=datetime.now(timezone.utc)
     )
     db.add(db_property)
     db.flush() # Genera el ID de la propiedad sin confirmar la transacción aún
@@ -33,6 +61,7 @@ def create_property_with_units(db: Session, property: property_schema.PropertyCr
         for unit_data in property.units:
             db_unit = Unit(
                 property_id=db_property.id, # Vinculamos con el papá
+                owner_id=owner_id,
                 unit_number=unit_data.unit_number,
                 type=unit_data.type,
                 floor=unit_data.floor,
@@ -44,6 +73,16 @@ def create_property_with_units(db: Session, property: property_schema.PropertyCr
             )
             db.add(db_unit)
 
+    # 3. Registrar la ubicación en el índice geográfico
+    index_property_locations(db, [{
+        "id": db_property.id,
+        "latitude": db_property.latitude,
+        "longitude": db_property.longitude
+    }])
+
+    # 4. Actualizar el índice de búsqueda por texto
+    index_properties_text(db, [db_property.id])
+
     db.commit()
     db.refresh(db_property)
     return db_property
\ No newline at end of file
@@ -0,0 +1,69 @@
+from decimal import Decimal
+from sqlalchemy import Numeric, case, cast, func, literal, select, update
+from sqlalchemy.orm import Session
+from app.models import Unit
+from app.schemas import property as property_schema
+
+def _column_value(value):
+    # Las columnas numéricas de Unit son Float
+    return float(value) if isinstance(value, Decimal) else value
+
+# Unidades por sentencia: cada una aporta ~2 parámetros por columna cambiada
+BULK_UPDATE_CHUNK = 500
+
+def bulk_update_units(db: Session, items):
+    """
+    Actualiza varias unidades con cambios distintos en un solo
+    UPDATE units SET col = CASE id WHEN ... END WHERE id IN (...) RETURNING
+    (uno por bloque de BULK_UPDATE_CHUNK unidades). No hace commit. Devuelve las unidades actualizadas.
+    """
+    changes = {}
+    for item in items:
+        data = item.model_dump(exclude_unset=True)
+        unit_id = data.pop("id")
+        changes[unit_id] = {k: _column_value(v) for k, v in data.items()}
+
+    units = []
+    ids = list(changes)
+    for start in range(0, len(ids), BULK_UPDATE_CHUNK):
+        chunk = ids[start:start + BULK_UPDATE_CHUNK]
+        values = {}
+        for name in {name for unit_id in chunk for name in changes[unit_id]}:
+            column = getattr(Unit, name)
+            # Solo las unidades que cambian esta columna; el resto conserva su valor
+            whens = {unit_id: literal(changes[unit_id][name], column.type) for unit_id in chunk if name in changes[unit_id]}
+            values[column] = case(whens, value=Unit.id, else_=column)
+
+        stmt = update(Unit).where(Unit.id.in_(chunk))
+        if values:
+            stmt = stmt.values(values).returning(Unit)
+            units += db.scalars(stmt, execution_options={"synchronize_session": False, "populate_existing": True}).all()
+        else:
+            units += db.scalars(select(Unit).where(Unit.id.in_(chunk))).all()
+    return units
+
+def patch_units_by_filter(db: Session, unit_filter: property_schema.UnitBulkFilter, patch: property_schema.UnitBulkPatch):
+    """
+    Aplica el mismo cambio a todas las unidades que cumplen el filtro con un único
+    UPDATE ... WHERE ... RETURNING. No hace commit.
+    """
+    values = {}
+    if patch.base_price_multiplier is not None:
+        values[Unit.base_price] = func.round(cast(Unit.base_price * float(patch.base_price_multiplier), Numeric), 2)
+    if patch.base_price is not None:
+        values[Unit.base_price] = float(patch.base_price)
+    if patch.status is not None:
+        values[Unit.status] = patch.status
+    if patch.type is not None:
+        values[Unit.type] = patch.type
+
+    conditions = [Unit.property_id == unit_filter.property_id]
+    if unit_filter.status is not None:
+        conditions.append(Unit.status == unit_filter.status)
+    if unit_filter.type is not None:
+        conditions.append(Unit.type == unit_filter.type)
+    if unit_filter.bedrooms is not None:
+        conditions.append(Unit.bedrooms == unit_filter.bedrooms)
+
+    stmt = update(Unit).where(*conditions).values(values).returning(Unit)
+    return db.scalars(stmt, execution_options={"synchronize_session": False}).all()
@@ -1,10 +1,8 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
 from app.models import User
 from app.schemas.user import UserCreate
-
-# Configuración de encriptación (Hashing)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# El hashing se hace con el motor compartido (pool acotado) de auth_utils
+from app import auth_utils
 
 def get_user_by_email(db: Session, email: str):
     """Busca si un usuario ya existe por su email."""
@@ -13,7 +11,7 @@ def get_user_by_email(db: Session, email: str):
 def create_user(db: Session, user: UserCreate):
     """Crea un nuevo usuario con contraseña encriptada."""
     # 1. Encriptar la contraseña (Hashing)
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = auth_utils.get_password_hash(user.password)
     
     # 2. Crear la instancia del modelo User (Base de datos)
     db_user = User(
@@ -1,6 +1,11 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # 1. Cargar variables de entorno desde el archivo .env
@@ -15,20 +20,171 @@ if not DATABASE_URL:
 
 # 4. Solución para Supabase: SQLAlchemy necesita 'postgresql://' en lugar de 'postgres://'
 if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)  
-# 5. Crear el motor de la base de datos (El corazón de la conexión)
-engine = create_engine(DATABASE_URL)
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# 6. Crear la sesión local (La herramienta para hacer consultas)
+# 5. Configuración del pool de conexiones (todo por variables de entorno)
+# DB_POOL_PROFILE=pgbouncer_transaction -> para el pooler de Supabase en modo transacción
+DB_POOL_PROFILE = os.getenv("DB_POOL_PROFILE", "default").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+class PoolMetrics:
+    """Contadores del pool: tiempo de espera por conexión (histograma) y timeouts."""
+
+    BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.wait_counts = [0] * (len(self.BUCKETS_MS) + 1)
+            self.wait_total_ms = 0.0
+            self.checkouts = 0
+            self.timeouts = 0
+
+    def record_wait(self, elapsed_ms: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += elapsed_ms
+            for i, limit in enumerate(self.BUCKETS_MS):
+                if elapsed_ms <= limit:
+                    self.wait_counts[i] += 1
+                    break
+            else:
+                self.wait_counts[-1] += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={b}ms" for b in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_histogram": dict(zip(labels, self.wait_counts)),
+            }
+
+pool_metrics = PoolMetrics()
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mide cuánto espera cada petición por una conexión libre."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_wait((time.perf_counter() - start) * 1000)
+        return connection
+
+def build_engine_options(url: str, async_mode: bool = False) -> dict:
+    """Opciones de create_engine según el motor y el perfil de pool elegido."""
+    if url.startswith("sqlite"):
+        # SQLite (pruebas locales) maneja su propio pool
+        return {}
+
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+    if not async_mode:
+        # El motor asíncrono usa su propio pool (AsyncAdaptedQueuePool)
+        options["poolclass"] = TimedQueuePool
+
+    if DB_POOL_PROFILE == "pgbouncer_transaction":
+        # En modo transacción cada sentencia puede caer en otro backend:
+        # desactivamos los prepared statements del lado del servidor.
+        if url.startswith("postgresql+psycopg://"):
+            options["connect_args"] = {"prepare_threshold": None}
+        elif url.startswith("postgresql+asyncpg://"):
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        # psycopg2 no usa prepared statements del servidor, no necesita ajustes
+
+    return options
+
+# 6. Crear el motor de la base de datos (El corazón de la conexión)
+engine = create_engine(DATABASE_URL, **build_engine_options(DATABASE_URL))
+
+# 7. Crear la sesión local (La herramienta para hacer consultas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# 7. Clase base para nuestros modelos de tablas
+# 8. Clase base para nuestros modelos de tablas
 Base = declarative_base()
 
-# 8. Dependencia para obtener la DB en cada petición (Función auxiliar)
+# 9. Dependencia para obtener la DB en cada petición (Función auxiliar)
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# 10. Motor asíncrono (asyncpg) - opcional, activado con DB_ASYNC_ENABLED=true
+# Los endpoints de lectura más usados tienen versión 'async def' que lo usan;
+# con la opción desactivada se registran sus versiones síncronas de siempre.
+DB_ASYNC_ENABLED = os.getenv("DB_ASYNC_ENABLED", "false").lower() == "true"
+
+def to_async_url(url: str) -> str:
+    """Convierte la URL síncrona al driver asíncrono equivalente."""
+    sa_url = make_url(url)
+    if sa_url.drivername.startswith("postgresql"):
+        sa_url = sa_url.set(drivername="postgresql+asyncpg")
+        # asyncpg no entiende 'sslmode' (Supabase lo agrega), usa 'ssl'
+        if "sslmode" in sa_url.query:
+            sslmode = sa_url.query["sslmode"]
+            sa_url = sa_url.difference_update_query(["sslmode"]).update_query_dict({"ssl": sslmode})
+    elif sa_url.drivername.startswith("sqlite"):
+        sa_url = sa_url.set(drivername="sqlite+aiosqlite")
+    return sa_url.render_as_string(hide_password=False)
+
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_ASYNC_ENABLED:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **build_engine_options(ASYNC_DATABASE_URL, async_mode=True))
+    # expire_on_commit=False: en modo async no se pueden recargar atributos de forma perezosa
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_pool_status():
+    """Estado actual del pool + métricas acumuladas (para /health/pool)."""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__, "profile": DB_POOL_PROFILE}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": DB_MAX_OVERFLOW,
+        })
+    status.update(pool_metrics.snapshot())
+    if async_engine is not None:
+        async_pool = async_engine.pool
+        status["async_pool"] = {
+            "pool_class": type(async_pool).__name__,
+            "size": async_pool.size(),
+            "checked_out": async_pool.checkedout(),
+            "overflow": async_pool.overflow(),
+        } if isinstance(async_pool, QueuePool) else {"pool_class": type(async_pool).__name__}
+    return status
@@ -1,28 +1,101 @@
+import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, get_async_db
 from app import auth_utils
 from app.crud import user as user_crud
+from app.models import User
+from app.services.cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+# Caché de usuarios autenticados (clave: 'sub' del token = email)
+# Evita un SELECT a 'users' en cada petición autenticada.
+user_cache = TTLCache(
+    ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", 60)),
+    max_size=int(os.getenv("USER_CACHE_MAX_SIZE", 1024)),
+)
+
+_USER_COLUMNS = [attr.key for attr in inspect(User).column_attrs]
+
+def _snapshot_user(user: User) -> dict:
+    """Copia plana de las columnas del usuario (no guardamos objetos ORM ligados a una sesión)."""
+    return {key: getattr(user, key) for key in _USER_COLUMNS}
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciales inválidas",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _token_email(token: str) -> str:
+    """Email ('sub') del token; 401 si el token no es válido."""
     try:
         payload = jwt.decode(token, auth_utils.SECRET_KEY, algorithms=[auth_utils.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
-        
+        raise _credentials_exception()
+    email = payload.get("sub")
+    if email is None:
+        raise _credentials_exception()
+    return email
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    email = _token_email(token)
+
+    # 1. Intentar desde la caché (sin ir a la base de datos)
+    snapshot = user_cache.get(email)
+    if snapshot is not None:
+        return User(**snapshot)
+
+    # 2. Si no está, consultamos y guardamos el resultado
     user = user_crud.get_user_by_email(db, email=email)
     if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+        raise _credentials_exception()
+    user_cache.set(email, _snapshot_user(user))
+    return user
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """
+    Igual que get_current_user, para los endpoints 'async def': no ocupa un hilo del
+    threadpool y, si la caché falla, consulta con la misma sesión asíncrona del endpoint.
+    """
+    email = _token_email(token)
+
+    snapshot = user_cache.get(email)
+    if snapshot is not None:
+        return User(**snapshot)
+
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
+    if user is None:
+        raise _credentials_exception()
+    user_cache.set(email, _snapshot_user(user))
+    return user
+
+# --- INVALIDACIÓN AUTOMÁTICA DE LA CACHÉ ---
+# Cualquier cambio en un User (reset de contraseña, is_verified, rol, is_active...)
+# marca su email como "sucio" y se borra de la caché cuando la transacción se confirma.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_user_stale(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    stale = session.info.setdefault("stale_user_emails", set())
+    stale.add(target.email)
+    # Si cambió el email, también invalidamos el anterior
+    stale.update(inspect(target).attrs.email.history.deleted or ())
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stale_users(session):
+    for email in session.info.pop("stale_user_emails", ()):
+        user_cache.invalidate(email)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_users(session):
+    session.info.pop("stale_user_emails", None)
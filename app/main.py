@@ -2,9 +2,13 @@ from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from app.database import engine, Base, get_db
+from app.database import engine, Base, get_db, get_pool_status
 from app import models 
 from app.routers import documents # <--- Agregar import
+from app.dependencies import user_cache
+from app.services.ownership import ownership_cache
+from app.services.email_outbox import dispatcher as email_dispatcher
+import os
 
 # Importación de routers
 from app.routers import (
@@ -17,8 +21,8 @@ from app.routers import (
     dashboard
 )
 
-# Crear tablas en la base de datos
-models.Base.metadata.create_all(bind=engine)
+# Las tablas e índices se crean con migraciones (Alembic), no al importar:
+#   alembic upgrade head
 
 app = FastAPI(
     title="Zerium API",
@@ -41,9 +45,21 @@ app.add_middleware(
     allow_credentials=True,     # Permite cookies y tokens
     allow_methods=["*"],        # Permite todos los métodos (GET, POST, PUT, DELETE...)
     allow_headers=["*"],        # Permite todos los headers
+    expose_headers=["X-Next-Cursor"], # El frontend lee el cursor de paginación
 )
 # -----------------------------------------------------------------------
 
+# --- DESPACHADOR DE CORREOS (Outbox) ---
+# Se puede desactivar por proceso con EMAIL_OUTBOX_ENABLED=false
+@app.on_event("startup")
+def start_email_dispatcher():
+    if os.getenv("EMAIL_OUTBOX_ENABLED", "true").lower() == "true":
+        email_dispatcher.start()
+
+@app.on_event("shutdown")
+def stop_email_dispatcher():
+    email_dispatcher.stop()
+
 # Inclusión de Routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -65,4 +81,14 @@ def health_check(db: Session = Depends(get_db)):
         db.execute(text("SELECT 1"))
         return {"status": "ok", "database": "Conectada exitosamente a Supabase ✅"}
     except Exception as e:
-        return {"status": "error", "detail": str(e)}
\ No newline at end of file
+        return {"status": "error", "detail": str(e)}
+
+@app.get("/health/cache")
+def cache_stats():
+    """Contadores de las cachés en memoria (usuarios autenticados y dueños de unidades)."""
+    return {"user_cache": user_cache.stats(), "ownership_cache": ownership_cache.stats()}
+
+@app.get("/health/pool")
+def pool_stats():
+    """Métricas del pool de conexiones (en uso, overflow, histograma de espera)."""
+    return get_pool_status()
@@ -1,6 +1,6 @@
 import enum
 import uuid 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, ForeignKey, Float, Text, JSON, DECIMAL
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Enum, ForeignKey, Float, Text, JSON, DECIMAL, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -39,6 +39,14 @@ class TicketPriority(str, enum.Enum):
     high = "high"
     emergency = "emergency"
 
+# Orden de urgencia de los tickets (emergencia primero), guardado en maintenance_tickets.priority_rank
+TICKET_PRIORITY_RANK = {
+    TicketPriority.emergency: 0,
+    TicketPriority.high: 1,
+    TicketPriority.medium: 2,
+    TicketPriority.low: 3,
+}
+
 class TicketStatus(str, enum.Enum):
     pending = "pending"
     in_progress = "in_progress"
@@ -57,6 +65,17 @@ class DocumentStatus(str, enum.Enum):
     verified = "verified"
     rejected = "rejected"
 
+class EmailStatus(str, enum.Enum):
+    pending = "pending"
+    sending = "sending" # Tomado por un despachador (ver lease_expires_at)
+    sent = "sent"
+    failed = "failed"
+
+class ReviewStatus(str, enum.Enum):
+    pending = "pending"
+    resolved = "resolved"
+    dismissed = "dismissed"
+
 class ContractStatus(str, enum.Enum):
     pending = "pending"
     signed_by_tenant = "signed_by_tenant"
@@ -82,8 +101,8 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
 
     properties = relationship("Property", back_populates="owner")
-    contracts = relationship("Contract", back_populates="tenant")
-    tickets_requested = relationship("MaintenanceTicket", back_populates="requester")
+    contracts = relationship("Contract", back_populates="tenant", foreign_keys="Contract.tenant_id")
+    tickets_requested = relationship("MaintenanceTicket", back_populates="requester", foreign_keys="MaintenanceTicket.requester_id")
     documents = relationship("UserDocument", back_populates="user")
 
 
@@ -93,7 +112,7 @@ class Property(Base):
     name = Column(String, index=True)
     type = Column(Enum(PropertyType), default=PropertyType.apartment)
     address = Column(String)
-    city = Column(String, default="Riobamba")
+    city = Column(String, default="Riobamba", index=True)
     description = Column(Text, nullable=True)
     amenities = Column(JSON, default={})
     latitude = Column(Float, nullable=True)
@@ -105,6 +124,10 @@ class Property(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_properties_owner_created", owner_id, is_deleted, created_at, id),
+    )
+
 
 class Unit(Base):
     __tablename__ = "units"
@@ -117,12 +140,20 @@ class Unit(Base):
     area_m2 = Column(Float, nullable=True)
     base_price = Column(Float, nullable=True)
     status = Column(Enum(UnitStatus), default=UnitStatus.vacant)
-    property_id = Column(String, ForeignKey("properties.id"))
+    property_id = Column(String, ForeignKey("properties.id"), index=True)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=True) # Copia de properties.owner_id (filtros sin JOIN)
     property = relationship("Property", back_populates="units")
     contracts = relationship("Contract", back_populates="unit")
     tickets = relationship("MaintenanceTicket", back_populates="unit")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Búsqueda con facetas (filtros más comunes + orden por precio)
+    __table_args__ = (
+        Index("ix_units_status_type_bedrooms_price", status, type, bedrooms, base_price),
+        Index("ix_units_price_id", base_price, id),
+        Index("ix_units_owner_property", owner_id, property_id),
+    )
+
 
 class Contract(Base):
     __tablename__ = "contracts"
@@ -130,6 +161,7 @@ class Contract(Base):
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     unit_id = Column(String, ForeignKey("units.id"))
     tenant_id = Column(String, ForeignKey("users.id"))
+    owner_id = Column(String, ForeignKey("users.id"), nullable=True) # Dueño de la unidad (filtros sin JOIN)
     start_date = Column(DateTime, nullable=False)
     end_date = Column(DateTime, nullable=False)
     
@@ -146,20 +178,42 @@ class Contract(Base):
     contract_file_url = Column(String, nullable=True)
 
     unit = relationship("Unit", back_populates="contracts")
-    tenant = relationship("User", back_populates="contracts")
+    tenant = relationship("User", back_populates="contracts", foreign_keys=[tenant_id])
     payments = relationship("Payment", back_populates="contract")
 
+    # Índices que coinciden con los filtros de los routers.
+    # En Postgres además existe ex_contracts_unit_no_overlap (migración 0008), que impide
+    # contratos vigentes cruzados en la misma unidad.
+    __table_args__ = (
+        Index("ix_contracts_tenant_active", tenant_id, is_active),
+        Index("ix_contracts_unit_status_dates", unit_id, status, start_date, end_date),
+        Index("ix_contracts_owner_start", owner_id, start_date, id),
+        Index("ix_contracts_owner_status", owner_id, status),
+    )
+
 
 class Payment(Base):
     __tablename__ = "payments"
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     contract_id = Column(String, ForeignKey("contracts.id"))
+    owner_id = Column(String, ForeignKey("users.id"), nullable=True) # Dueño de la unidad (filtros sin JOIN)
     amount = Column(Float, nullable=False)
     payment_date = Column(DateTime(timezone=True), server_default=func.now())
     payment_method = Column(String, nullable=True)
     notes = Column(Text, nullable=True)
+    # Header Idempotency-Key del cliente: un reintento no registra el pago dos veces
+    idempotency_key = Column(String(255), nullable=True)
+    # Hash del cuerpo que acompañó la clave: la misma clave con otro cuerpo se rechaza
+    request_fingerprint = Column(String(64), nullable=True)
     contract = relationship("Contract", back_populates="payments")
 
+    __table_args__ = (
+        Index("ix_payments_contract_date", contract_id, payment_date.desc()),
+        Index("uq_payments_contract_idempotency", contract_id, idempotency_key, unique=True),
+        Index("ix_payments_owner_date", owner_id, payment_date, id),
+        Index("ix_payments_owner_idempotency", owner_id, idempotency_key),
+    )
+
 
 class MaintenanceTicket(Base):
     __tablename__ = "maintenance_tickets"
@@ -167,16 +221,27 @@ class MaintenanceTicket(Base):
     title = Column(String, nullable=False)
     description = Column(Text)
     priority = Column(Enum(TicketPriority), default=TicketPriority.medium)
+    # Copia numérica de la prioridad: el listado ordena y pagina por esta columna indexada
+    priority_rank = Column(Integer, nullable=False, default=TICKET_PRIORITY_RANK[TicketPriority.medium])
     status = Column(Enum(TicketStatus), default=TicketStatus.pending)
-    property_id = Column(String, ForeignKey("properties.id"))
+    property_id = Column(String, ForeignKey("properties.id"), index=True)
     unit_id = Column(String, ForeignKey("units.id"), nullable=True)
-    requester_id = Column(String, ForeignKey("users.id"))
+    requester_id = Column(String, ForeignKey("users.id"), index=True)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=True) # Dueño de la propiedad (filtros sin JOIN)
     is_resolved = Column(Boolean, default=False)
     resolved_at = Column(DateTime, nullable=True)
-    requester = relationship("User", back_populates="tickets_requested")
+    requester = relationship("User", back_populates="tickets_requested", foreign_keys=[requester_id])
     unit = relationship("Unit", back_populates="tickets")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_tickets_owner_resolved", owner_id, is_resolved),
+        # Listado: filtro por dueño o propiedad (+ estado) y orden (urgencia, más recientes)
+        Index("ix_tickets_owner_rank_created", owner_id, priority_rank, created_at.desc(), id.desc()),
+        Index("ix_tickets_owner_status_rank_created", owner_id, status, priority_rank, created_at.desc(), id.desc()),
+        Index("ix_tickets_property_status_rank_created", property_id, status, priority_rank, created_at.desc(), id.desc()),
+    )
+
 
 class UserDocument(Base):
     __tablename__ = "user_documents"
@@ -188,4 +253,93 @@ class UserDocument(Base):
     status = Column(Enum(DocumentStatus), default=DocumentStatus.pending)
     rejection_reason = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    user = relationship("User", back_populates="documents")
\ No newline at end of file
+    user = relationship("User", back_populates="documents")
+
+    __table_args__ = (
+        Index("ix_user_documents_user_status", user_id, status),
+    )
+
+
+class EmailOutbox(Base):
+    """Cola persistente de correos: los endpoints solo insertan, el despachador envía."""
+    __tablename__ = "email_outbox"
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    to_email = Column(String, nullable=False, index=True)
+    subject = Column(String, nullable=False)
+    html_content = Column(Text, nullable=True) # Se borra al enviarse (puede llevar tokens de reset)
+    template = Column(String, nullable=True) # Tipo de correo (para evitar duplicados)
+    status = Column(Enum(EmailStatus), default=EmailStatus.pending, index=True)
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True) # Si vence en 'sending', se vuelve a tomar
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class PaymentMonthlyRollup(Base):
+    """Total cobrado por propiedad y mes. Se actualiza en cada pago (sin recorrer 'payments')."""
+    __tablename__ = "payment_monthly_rollups"
+    property_id = Column(String, ForeignKey("properties.id"), primary_key=True)
+    month = Column(Date, primary_key=True) # Primer día del mes
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    collected_amount = Column(Float, default=0.0, nullable=False)
+    payment_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_payment_rollups_owner_month", owner_id, month),
+    )
+
+
+class PropertyGeoIndex(Base):
+    """Índice espacial por celdas (grilla de GEO_CELL_DEGREES) para búsquedas por cercanía."""
+    __tablename__ = "property_geo_index"
+    property_id = Column(String, ForeignKey("properties.id"), primary_key=True)
+    cell = Column(String, nullable=False, index=True) # "fila:columna" de la grilla
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_property_geo_lat_lon", latitude, longitude),
+    )
+
+
+class PropertySearchDocument(Base):
+    """
+    Texto normalizado (minúsculas, sin tildes) de cada propiedad y sus unidades.
+    En PostgreSQL la migración agrega 'search_vector' (tsvector generado) con índice GIN.
+    """
+    __tablename__ = "property_search_documents"
+    property_id = Column(String, ForeignKey("properties.id"), primary_key=True)
+    content = Column(Text, nullable=False, default="")
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class PropertySearchTerm(Base):
+    """Índice invertido en Python (término -> propiedad), usado cuando no hay PostgreSQL."""
+    __tablename__ = "property_search_terms"
+    term = Column(String, primary_key=True)
+    property_id = Column(String, ForeignKey("properties.id"), primary_key=True, index=True)
+
+
+class PaymentReviewItem(Base):
+    """Líneas del extracto bancario que no se pudieron asociar a un contrato (revisión manual)."""
+    __tablename__ = "payment_review_items"
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    line_key = Column(String(255), nullable=False) # Identifica la línea (evita duplicados al reimportar)
+    transaction_date = Column(DateTime(timezone=True), nullable=True)
+    amount = Column(Float, nullable=False)
+    reference = Column(String, nullable=True)
+    payer_name = Column(String, nullable=True)
+    description = Column(Text, nullable=True)
+    reason = Column(String, nullable=False) # Por qué no se registró automáticamente
+    suggested_contract_id = Column(String, ForeignKey("contracts.id"), nullable=True)
+    status = Column(Enum(ReviewStatus), default=ReviewStatus.pending, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("uq_payment_review_owner_line", owner_id, line_key, unique=True),
+        Index("ix_payment_review_owner_status_created", owner_id, status, created_at),
+    )
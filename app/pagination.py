@@ -0,0 +1,51 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_
+
+# Los listados paginados siguen devolviendo una lista (compatibilidad con el frontend)
+# y el cursor de la siguiente página viaja en este header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(*values) -> str:
+    """Serializa los valores de la última fila (orden de la paginación) en un token opaco."""
+    raw = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode()).decode()
+
+def decode_cursor(cursor: str, types) -> list:
+    """
+    Decodifica un cursor y convierte cada valor al tipo indicado (datetime, str, int, float).
+    Un cursor manipulado o de otro listado responde 400.
+    """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        if not isinstance(raw, list) or len(raw) != len(types):
+            raise ValueError("Cursor con tamaño incorrecto")
+        return [
+            None if value is None else (datetime.fromisoformat(value) if cast is datetime else cast(value))
+            for value, cast in zip(raw, types)
+        ]
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginación inválido")
+
+def keyset_after(keys):
+    """
+    Condición 'fila posterior al cursor' para paginación por keyset.
+    keys: lista de (columna, valor_del_cursor, descendente) en el orden del ORDER BY.
+    Equivale a (a, b, c) > (x, y, z) respetando la dirección de cada columna.
+    """
+    clauses = []
+    for i, (column, value, descending) in enumerate(keys):
+        previous_equal = [col == val for col, val, _ in keys[:i]]
+        step = column < value if descending else column > value
+        clauses.append(and_(*previous_equal, step))
+    return or_(*clauses)
+
+def set_next_cursor(response: Response, rows, limit: int, cursor_values):
+    """
+    Si la página vino llena, agrega el header con el cursor de la siguiente.
+    cursor_values: función que recibe la última fila y devuelve los valores del orden.
+    """
+    if rows and len(rows) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*cursor_values(rows[-1]))
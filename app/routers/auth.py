@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.database import get_db
@@ -6,29 +7,52 @@ from app.crud import user as user_crud
 from app import auth_utils
 # Importamos los nuevos schemas y el servicio de email
 from app.schemas.user import PasswordResetRequest, PasswordResetConfirm
-from app.services.email import send_email, get_password_reset_template
+from app.services.email import get_password_reset_template
+from app.services.email_outbox import queue_email
 
 # Creamos el router para las rutas de autenticación
 router = APIRouter(
     tags=["Authentication"]
 )
 
+def server_busy():
+    """503 cuando el pool de hashing está saturado (auth_utils.HashingBusy)."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Servidor ocupado, intenta nuevamente en unos segundos",
+        headers={"Retry-After": "1"},
+    )
+
 # 1. LOGIN (EXISTENTE)
+# 'async def': el hash de bcrypt se espera con await en su pool dedicado, sin ocupar
+# un hilo del threadpool; las consultas cortas a la base sí pasan por el threadpool.
 @router.post("/auth/token")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     Endpoint oficial de Login (Estándar OAuth2).
     """
     # 1. Buscar usuario por email
-    user = user_crud.get_user_by_email(db, email=form_data.username)
+    user = await run_in_threadpool(user_crud.get_user_by_email, db, form_data.username)
     
     # 2. Verificar credenciales
-    if not user or not auth_utils.verify_password(form_data.password, user.password_hash):
+    is_valid, new_hash = (False, None)
+    if user:
+        try:
+            is_valid, new_hash = await auth_utils.verify_and_update_password(form_data.password, user.password_hash)
+        except auth_utils.HashingBusy:
+            raise server_busy()
+
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email o contraseña incorrectos",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Re-hash transparente si cambió el costo de bcrypt
+    if new_hash:
+        user.password_hash = new_hash
+        await run_in_threadpool(db.commit)
     
     # 3. Generar token
     access_token_expires = auth_utils.timedelta(minutes=auth_utils.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -69,15 +93,15 @@ def forgot_password(request: PasswordResetRequest, db: Session = Depends(get_db)
     # IMPORTANTE: Cuando despliegues el frontend, cambiarás localhost por tu dominio vercel
     reset_link = f"https://zerium-frontend.vercel.app/reset-password?token={reset_token}"
     
-    # Preparar y enviar correo
+    # Preparar y encolar el correo (el despachador lo envía en segundo plano)
     html_content = get_password_reset_template(reset_link)
-    send_email(user.email, "Recupera tu acceso a Zerium", html_content)
+    queue_email(db, user.email, "Recupera tu acceso a Zerium", html_content, template="password_reset")
 
     return {"message": "Si el correo existe, se ha enviado un enlace de recuperación."}
 
 # 3. RESTABLECER CONTRASEÑA (NUEVO)
 @router.post("/auth/reset-password", status_code=200)
-def reset_password(data: PasswordResetConfirm, db: Session = Depends(get_db)):
+async def reset_password(data: PasswordResetConfirm, db: Session = Depends(get_db)):
     """
     Recibe el token y la nueva contraseña para actualizarla.
     """
@@ -95,13 +119,16 @@ def reset_password(data: PasswordResetConfirm, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Token inválido o expirado")
 
     # Buscar usuario
-    user = user_crud.get_user_by_email(db, email=email)
+    user = await run_in_threadpool(user_crud.get_user_by_email, db, email)
     if not user:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
     # Hashear la nueva contraseña y guardar
-    hashed_password = auth_utils.get_password_hash(data.new_password)
+    try:
+        hashed_password = await auth_utils.get_password_hash_async(data.new_password)
+    except auth_utils.HashingBusy:
+        raise server_busy()
     user.password_hash = hashed_password
-    db.commit()
+    await run_in_threadpool(db.commit)
 
     return {"message": "Contraseña actualizada correctamente"}
\ No newline at end of file
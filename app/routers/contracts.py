@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_ 
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
 import math 
 from datetime import datetime
-from app.database import get_db
-from app.models import Contract, Property, Unit, User, ContractStatus, UserDocument, DocumentStatus, UnitStatus
+from app.database import get_db, get_async_db, DB_ASYNC_ENABLED
+from app.models import Contract, Unit, User, ContractStatus, UserDocument, DocumentStatus, UnitStatus
 from app.schemas import contract as contract_schema
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_current_user_async
+from app.services.cache import invalidate_dashboard
+from app.services.ownership import owns_unit
+from app.services.availability import OVERLAP_CONSTRAINT, find_conflict, supports_exclusion, unit_lock
+from app.pagination import decode_cursor, keyset_after, set_next_cursor
 
 router = APIRouter(
     prefix="/contracts",
@@ -15,16 +21,94 @@ router = APIRouter(
 )
 
 # 1. LISTAR TODOS
-@router.get("/", response_model=List[contract_schema.ContractResponse])
-def get_contracts(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+class ContractFilters:
+    """Filtros y paginación del listado (query params compartidos por sync y async)."""
+
+    def __init__(
+        self,
+        status: Optional[ContractStatus] = None,
+        unit_id: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        date_from: Optional[datetime] = Query(None, description="Contratos vigentes desde esta fecha"),
+        date_to: Optional[datetime] = Query(None, description="Contratos vigentes hasta esta fecha"),
+        limit: int = Query(100, ge=1, le=500),
+        cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
+    ):
+        self.status = status
+        self.unit_id = unit_id
+        self.tenant_id = tenant_id
+        self.date_from = date_from
+        self.date_to = date_to
+        self.limit = limit
+        self.cursor = cursor
+
+def _contracts_statement(current_user: User, filters: ContractFilters):
+    """Consulta compartida por la versión síncrona y la asíncrona del listado."""
     if current_user.role == "landlord":
-        return db.query(Contract).join(Unit).join(Property).filter(
-            Property.owner_id == current_user.id
-        ).all()
+        stmt = select(Contract).where(Contract.owner_id == current_user.id)
     elif current_user.role == "tenant":
-        return db.query(Contract).filter(Contract.tenant_id == current_user.id).all()
+        stmt = select(Contract).where(Contract.tenant_id == current_user.id)
     else:
+        return None
+
+    if filters.status is not None:
+        stmt = stmt.where(Contract.status == filters.status)
+    if filters.unit_id:
+        stmt = stmt.where(Contract.unit_id == filters.unit_id)
+    if filters.tenant_id:
+        stmt = stmt.where(Contract.tenant_id == filters.tenant_id)
+    if filters.date_from:
+        stmt = stmt.where(Contract.end_date >= filters.date_from)
+    if filters.date_to:
+        stmt = stmt.where(Contract.start_date <= filters.date_to)
+
+    # Paginación por keyset: más recientes primero (start_date DESC, id DESC)
+    if filters.cursor:
+        start_date, contract_id = decode_cursor(filters.cursor, (datetime, str))
+        stmt = stmt.where(keyset_after([
+            (Contract.start_date, start_date, True),
+            (Contract.id, contract_id, True),
+        ]))
+
+    # Cargamos solo las columnas que usa ContractResponse (en modo async no hay lazy-load)
+    return stmt.options(
+        selectinload(Contract.unit).load_only(Unit.unit_number),
+        selectinload(Contract.tenant).load_only(User.email, User.full_name),
+    ).order_by(Contract.start_date.desc(), Contract.id.desc()).limit(filters.limit)
+
+def get_contracts(
+    response: Response,
+    filters: ContractFilters = Depends(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    stmt = _contracts_statement(current_user, filters)
+    if stmt is None:
+        return []
+    contracts = db.execute(stmt).scalars().all()
+    set_next_cursor(response, contracts, filters.limit, lambda c: (c.start_date, c.id))
+    return contracts
+
+async def get_contracts_async(
+    response: Response,
+    filters: ContractFilters = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    stmt = _contracts_statement(current_user, filters)
+    if stmt is None:
         return []
+    result = await db.execute(stmt)
+    contracts = result.scalars().all()
+    set_next_cursor(response, contracts, filters.limit, lambda c: (c.start_date, c.id))
+    return contracts
+
+router.add_api_route(
+    "/",
+    get_contracts_async if DB_ASYNC_ENABLED else get_contracts,
+    methods=["GET"],
+    response_model=List[contract_schema.ContractResponse],
+)
 
 # 2. CREAR CONTRATO
 @router.post("/", response_model=contract_schema.ContractResponse, status_code=status.HTTP_201_CREATED)
@@ -38,32 +122,13 @@ def create_contract(
         raise HTTPException(status_code=403, detail="Solo los dueños pueden crear contratos")
     
     # B. Validar Unidad
-    unit = db.query(Unit).join(Property).filter(
-        Unit.id == contract.unit_id, 
-        Property.owner_id == current_user.id
-    ).first()
-    
-    if not unit:
+    if not owns_unit(db, current_user.id, contract.unit_id):
         raise HTTPException(status_code=404, detail="Unidad no encontrada o no te pertenece")
 
-    # C. Validar Solapamiento
-    overlapping_contract = db.query(Contract).filter(
-        Contract.unit_id == contract.unit_id, 
-        Contract.status.in_([ContractStatus.active, ContractStatus.pending, ContractStatus.signed_by_tenant]), 
-        or_(
-            and_(
-                Contract.start_date <= contract.end_date,
-                Contract.end_date >= contract.start_date
-            )
-        )
-    ).first()
+    # C. Validar Fechas (el solapamiento se valida al guardar)
+    if contract.end_date < contract.start_date:
+        raise HTTPException(status_code=400, detail="La fecha de fin debe ser posterior a la de inicio")
 
-    if overlapping_contract:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"La unidad ya está reservada en esas fechas (Conflicto con contrato #{overlapping_contract.id})"
-        )
-        
     # D. CALCULAR TOTAL DEL CONTRATO
     start = contract.start_date
     end = contract.end_date
@@ -81,17 +146,44 @@ def create_contract(
     
     new_contract = Contract(
         **contract_data, 
+        owner_id=current_user.id,
         total_contract_value=calculated_total, 
         balance=calculated_total,              
         status=ContractStatus.pending,
         is_active=False
     )
     
-    db.add(new_contract)
-    db.commit()
+    # F. Guardar sin solapamientos
+    if supports_exclusion(db):
+        # Postgres: la restricción de exclusión (GiST) garantiza la regla aunque
+        # lleguen dos solicitudes al mismo tiempo
+        db.add(new_contract)
+        try:
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if OVERLAP_CONSTRAINT not in str(e.orig):
+                raise
+            _raise_overlap(find_conflict(db, contract.unit_id, contract.start_date, contract.end_date))
+    else:
+        # SQLite: verificar + insertar con la unidad bloqueada dentro del proceso
+        with unit_lock(contract.unit_id):
+            conflict = find_conflict(db, contract.unit_id, contract.start_date, contract.end_date)
+            if conflict:
+                _raise_overlap(conflict)
+            db.add(new_contract)
+            db.commit()
+
     db.refresh(new_contract)
     return new_contract
 
+def _raise_overlap(conflict_id):
+    # Sin ID: el contrato que chocó con la restricción ya no existe cuando lo buscamos
+    detail = "La unidad ya está reservada en esas fechas"
+    if conflict_id:
+        detail += f" (Conflicto con contrato #{conflict_id})"
+    raise HTTPException(status_code=400, detail=detail)
+
 # 3. OBTENER UNO
 @router.get("/{id}", response_model=contract_schema.ContractResponse)
 def get_contract(id: str, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
@@ -100,11 +192,7 @@ def get_contract(id: str, db: Session = Depends(get_db), current_user: User = De
         raise HTTPException(status_code=404, detail="Contrato no encontrado")
 
     if current_user.role == "landlord":
-        is_owner = db.query(Property).join(Unit).filter(
-            Unit.id == contract.unit_id,
-            Property.owner_id == current_user.id
-        ).first()
-        if not is_owner:
+        if contract.owner_id != current_user.id:
             raise HTTPException(status_code=403, detail="No tienes permiso para ver este contrato")
             
     elif current_user.role == "tenant":
@@ -152,12 +240,7 @@ def finalize_contract(contract_id: str, db: Session = Depends(get_db), current_u
     if not contract:
         raise HTTPException(status_code=404, detail="Contrato no encontrado")
 
-    is_owner = db.query(Property).join(Unit).filter(
-        Unit.id == contract.unit_id,
-        Property.owner_id == current_user.id
-    ).first()
-    
-    if not is_owner:
+    if contract.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="No tienes permiso para finalizar este contrato")
 
     if contract.status != ContractStatus.signed_by_tenant:
@@ -172,6 +255,7 @@ def finalize_contract(contract_id: str, db: Session = Depends(get_db), current_u
 
     db.commit()
     db.refresh(contract)
+    invalidate_dashboard(current_user.id, contract.tenant_id)
     return contract
 
 # 6. TERMINAR CONTRATO / LIBERAR CASA (DUEÑO)
@@ -187,12 +271,7 @@ def terminate_contract(contract_id: str, db: Session = Depends(get_db), current_
     if not contract:
         raise HTTPException(status_code=404, detail="Contrato no encontrado")
 
-    is_owner = db.query(Property).join(Unit).filter(
-        Unit.id == contract.unit_id,
-        Property.owner_id == current_user.id
-    ).first()
-    
-    if not is_owner:
+    if contract.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="No tienes permiso para terminar este contrato")
 
     if contract.status != ContractStatus.active:
@@ -210,4 +289,5 @@ def terminate_contract(contract_id: str, db: Session = Depends(get_db), current_
 
     db.commit()
     db.refresh(contract)
+    invalidate_dashboard(current_user.id, contract.tenant_id)
     return contract
\ No newline at end of file
@@ -1,66 +1,211 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from datetime import date, datetime, timezone
+from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, case
+from app.database import get_db, get_async_db, DB_ASYNC_ENABLED
 # IMPORTACIÓN CORREGIDA: Los modelos vienen de models.py
-from app.models import User, Property, Unit, MaintenanceTicket, Contract, UnitStatus 
+from app.models import User, Property, Unit, MaintenanceTicket, Contract, UnitStatus, ContractStatus, PaymentMonthlyRollup
 # IMPORTACIÓN CORREGIDA: La seguridad viene de dependencies.py
-from app.dependencies import get_current_user 
+from app.dependencies import get_current_user, get_current_user_async
+from app.services.cache import dashboard_cache
+from app.services.finance import month_start
+from app.services.aging import aging_report
 
 router = APIRouter(
     prefix="/dashboard",
     tags=["Dashboard"]
 )
 
-@router.get("/stats")
-def get_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    
+def _stats_statement(current_user: User):
+    """
+    Una sola consulta (un viaje a la base de datos) con conteos condicionales.
+    Compartida por la versión síncrona y la asíncrona.
+    """
     # --- LOGICA PARA DUEÑO (LANDLORD) ---
     if current_user.role == "landlord":
-        total_properties = db.query(Property).filter(Property.owner_id == current_user.id).count()
-        
-        total_units = db.query(Unit).join(Property).filter(Property.owner_id == current_user.id).count()
-        
-        occupied_units = db.query(Unit).join(Property).filter(
-            Property.owner_id == current_user.id, 
-            Unit.status == UnitStatus.occupied
-        ).count()
-        
-        pending_tickets = db.query(MaintenanceTicket).join(Property).filter(
-            Property.owner_id == current_user.id,
-            MaintenanceTicket.is_resolved == False
-        ).count()
+        pending_tickets = select(func.count(MaintenanceTicket.id))\
+            .where(
+                MaintenanceTicket.owner_id == current_user.id,
+                MaintenanceTicket.is_resolved == False
+            ).correlate(None).scalar_subquery()
 
-        occupancy_rate = 0
-        if total_units > 0:
-            occupancy_rate = round((occupied_units / total_units) * 100, 1)
-
-        return {
-            "total_properties": total_properties,
-            "total_units": total_units,
-            "occupied_units": occupied_units,
-            "pending_tickets": pending_tickets,
-            "occupancy_rate": occupancy_rate
-        }
+        return select(
+            func.count(func.distinct(Property.id)).label("total_properties"),
+            func.count(Unit.id).label("total_units"),
+            func.count(case((Unit.status == UnitStatus.occupied, Unit.id))).label("occupied_units"),
+            pending_tickets.label("pending_tickets"),
+        ).select_from(Property)\
+         .outerjoin(Unit, Unit.property_id == Property.id)\
+         .where(Property.owner_id == current_user.id)
 
     # --- LOGICA PARA INQUILINO (TENANT) ---
     elif current_user.role == "tenant":
-        active_contracts = db.query(Contract).filter(
-            Contract.tenant_id == current_user.id, 
+        active_contracts = select(func.count(Contract.id)).where(
+            Contract.tenant_id == current_user.id,
             Contract.is_active == True
-        ).count()
-        
-        my_tickets = db.query(MaintenanceTicket).filter(
+        ).scalar_subquery()
+
+        my_tickets = select(func.count(MaintenanceTicket.id)).where(
             MaintenanceTicket.requester_id == current_user.id,
             MaintenanceTicket.is_resolved == False
-        ).count()
-
-        return {
-            "active_contracts": active_contracts,
-            "pending_tickets": my_tickets
-        }
-    
-    return {}
\ No newline at end of file
+        ).scalar_subquery()
+
+        return select(
+            active_contracts.label("active_contracts"),
+            my_tickets.label("pending_tickets"),
+        )
+
+    return None
+
+def _stats_response(current_user: User, row):
+    counts = dict(row._mapping)
+    if current_user.role == "landlord":
+        occupancy_rate = 0
+        if counts["total_units"] > 0:
+            occupancy_rate = round((counts["occupied_units"] / counts["total_units"]) * 100, 1)
+        counts["occupancy_rate"] = occupancy_rate
+    return counts
+
+def get_dashboard_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    cached = dashboard_cache.get(current_user.id)
+    if cached is not None:
+        return cached
+
+    stmt = _stats_statement(current_user)
+    if stmt is None:
+        return {}
+    stats = _stats_response(current_user, db.execute(stmt).one())
+    dashboard_cache.set(current_user.id, stats)
+    return stats
+
+async def get_dashboard_stats_async(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    cached = dashboard_cache.get(current_user.id)
+    if cached is not None:
+        return cached
+
+    stmt = _stats_statement(current_user)
+    if stmt is None:
+        return {}
+    result = await db.execute(stmt)
+    stats = _stats_response(current_user, result.one())
+    dashboard_cache.set(current_user.id, stats)
+    return stats
+
+router.add_api_route(
+    "/stats",
+    get_dashboard_stats_async if DB_ASYNC_ENABLED else get_dashboard_stats,
+    methods=["GET"],
+)
+
+# --- FINANZAS (LANDLORD) ---
+def _shift_months(first_day: date, months: int) -> date:
+    index = first_day.year * 12 + (first_day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+@router.get("/finance")
+def get_finance_stats(
+    months: int = Query(12, ge=1, le=60, description="Meses hacia atrás a incluir"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Cobros mensuales, saldo pendiente y tasa de cobro por propiedad.
+    Los cobros salen del rollup mensual (no se recorre la tabla de pagos)
+    y los saldos de los contratos activos.
+    """
+    if current_user.role != "landlord":
+        return {}
+
+    current_month = month_start(datetime.now(timezone.utc))
+    first_month = _shift_months(current_month, -(months - 1))
+    month_keys = [_shift_months(first_month, i) for i in range(months)]
+
+    # 1. Saldos por propiedad (contratos activos)
+    active = Contract.status == ContractStatus.active
+    balances = db.query(
+        Property.id,
+        Property.name,
+        func.coalesce(func.sum(case((active, Contract.balance), else_=0.0)), 0.0).label("outstanding"),
+        func.coalesce(func.sum(case((active, Contract.total_contract_value), else_=0.0)), 0.0).label("contract_value"),
+    ).outerjoin(Unit, Unit.property_id == Property.id)\
+     .outerjoin(Contract, Contract.unit_id == Unit.id)\
+     .filter(Property.owner_id == current_user.id, Property.is_deleted == False)\
+     .group_by(Property.id, Property.name).all()
+
+    # 2. Cobros mensuales desde el rollup
+    rollups = db.query(
+        PaymentMonthlyRollup.property_id,
+        PaymentMonthlyRollup.month,
+        PaymentMonthlyRollup.collected_amount
+    ).filter(
+        PaymentMonthlyRollup.owner_id == current_user.id,
+        PaymentMonthlyRollup.month >= first_month
+    ).all()
+
+    collected = {}
+    for property_id, month, amount in rollups:
+        collected[(property_id, month)] = float(amount or 0)
+
+    properties = []
+    totals = {"collected": 0.0, "outstanding": 0.0, "contract_value": 0.0}
+    for property_id, name, outstanding, contract_value in balances:
+        monthly = [
+            {"month": m.strftime("%Y-%m"), "collected": round(collected.get((property_id, m), 0.0), 2)}
+            for m in month_keys
+        ]
+        period_collected = sum(item["collected"] for item in monthly)
+        outstanding = float(outstanding)
+        contract_value = float(contract_value)
+
+        collection_rate = 0
+        if contract_value > 0:
+            collection_rate = round(((contract_value - outstanding) / contract_value) * 100, 1)
+
+        properties.append({
+            "property_id": property_id,
+            "property_name": name,
+            "monthly": monthly,
+            "collected": round(period_collected, 2),
+            "outstanding_balance": round(outstanding, 2),
+            "collection_rate": collection_rate
+        })
+        totals["collected"] += period_collected
+        totals["outstanding"] += outstanding
+        totals["contract_value"] += contract_value
+
+    total_rate = 0
+    if totals["contract_value"] > 0:
+        total_rate = round(((totals["contract_value"] - totals["outstanding"]) / totals["contract_value"]) * 100, 1)
+
+    return {
+        "months": [m.strftime("%Y-%m") for m in month_keys],
+        "properties": properties,
+        "total_collected": round(totals["collected"], 2),
+        "total_outstanding": round(totals["outstanding"], 2),
+        "collection_rate": total_rate
+    }
+
+# --- ANTIGÜEDAD DE DEUDA (LANDLORD) ---
+@router.get("/aging")
+def get_aging_report(
+    property_id: Optional[str] = None,
+    top: int = Query(20, ge=0, le=200, description="Cantidad de contratos más atrasados a listar"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Deuda vencida por tramos (al día, 30, 60 y 90+ días) de los contratos activos:
+    totales del dueño, por propiedad y los contratos con más atraso.
+    El calendario de cuotas se calcula con NumPy sobre columnas (sin bucles por contrato).
+    """
+    if current_user.role != "landlord":
+        return {}
+    return aging_report(db, current_user.id, property_id=property_id, top=top)
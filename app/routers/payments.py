@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query, Response, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import case, func, select, update
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
+import hashlib
+import json
 import uuid
-from app.database import get_db
+from datetime import datetime, timezone
+from app.database import get_db, get_async_db, DB_ASYNC_ENABLED
 from app import models
 from app.schemas import payment as payment_schema 
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_current_user_async
+from app.services.finance import BALANCE_TOLERANCE, record_payment_in_rollup
+from app.services.ownership import unit_owner
+from app.pagination import decode_cursor, keyset_after, set_next_cursor
+from app.services.payment_export import EXPORT_FORMATS, stream_rows
+from app.services.reconciliation import detect_statement_format, iter_statement, reconcile_statement
 
 router = APIRouter(
     prefix="/payments",
@@ -13,9 +25,43 @@ router = APIRouter(
 )
 
 # 1. REGISTRAR UN PAGO
+def _request_fingerprint(payment: payment_schema.PaymentCreate) -> str:
+    """SHA-256 del cuerpo normalizado (claves ordenadas) que acompaña a la Idempotency-Key."""
+    fields = payment.model_dump(mode="json")
+    fields["amount"] = float(payment.amount) # 300 y 300.00 son el mismo pago
+    body = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+def _payment_by_key(db: Session, owner_id: str, idempotency_key: str):
+    """Pago ya registrado con esa clave entre los contratos del dueño (ix_payments_owner_idempotency)."""
+    return db.query(models.Payment).filter(
+        models.Payment.owner_id == owner_id,
+        models.Payment.idempotency_key == idempotency_key
+    ).first()
+
+def _replay(existing: models.Payment, payment: payment_schema.PaymentCreate, fingerprint: str, response: Response):
+    """
+    Reintento con una clave ya usada: si el cuerpo es el mismo devolvemos el pago original (200);
+    si cambió (otro monto, otro contrato...) es un error del cliente y respondemos 422.
+    """
+    if existing.request_fingerprint is not None:
+        same_request = existing.request_fingerprint == fingerprint
+    else:
+        # Pagos anteriores a la huella: comparamos lo esencial
+        same_request = existing.contract_id == payment.contract_id and existing.amount == float(payment.amount)
+    if not same_request:
+        raise HTTPException(
+            status_code=422,
+            detail="La Idempotency-Key ya se usó con un cuerpo distinto; usa una clave nueva para otro pago"
+        )
+    response.status_code = status.HTTP_200_OK
+    return existing
+
 @router.post("/", response_model=payment_schema.PaymentResponse, status_code=status.HTTP_201_CREATED)
 def create_payment(
     payment: payment_schema.PaymentCreate, 
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
@@ -24,102 +70,303 @@ def create_payment(
     if not contract:
         raise HTTPException(status_code=404, detail="Contrato no encontrado")
 
+    # Propiedad y dueño de la unidad (para permisos y para el rollup financiero)
+    owner = unit_owner(db, contract.unit_id)
+
     # Validar Permisos
     if current_user.role == models.UserRole.tenant:
         if contract.tenant_id != current_user.id:
             raise HTTPException(status_code=403, detail="No puedes registrar pagos en un contrato ajeno")    
     elif current_user.role == models.UserRole.landlord:
-        unit = db.query(models.Unit).filter(models.Unit.id == contract.unit_id).first()
-        if not unit or unit.property.owner_id != current_user.id:
+        if not owner or owner.owner_id != current_user.id:
             raise HTTPException(status_code=403, detail="No tienes permiso sobre este contrato")
     else:
         raise HTTPException(status_code=403, detail="Rol no autorizado")
 
-    # --- LÓGICA DEUDA GLOBAL ---
-    # El balance ahora representa TODO lo que falta pagar del contrato entero
-    current_debt = contract.balance 
+    # Reintento del cliente con la misma clave: devolvemos el pago ya registrado
+    fingerprint = _request_fingerprint(payment) if idempotency_key else None
+    if idempotency_key:
+        existing = _payment_by_key(db, contract.owner_id, idempotency_key)
+        if existing:
+            return _replay(existing, payment, fingerprint, response)
 
-    if current_debt <= 0:
-        raise HTTPException(status_code=400, detail="¡Este contrato ya está pagado en su totalidad!")
+    # --- LÓGICA DEUDA GLOBAL ---
+    # El balance representa TODO lo que falta pagar del contrato entero.
+    # Restamos en la base de datos con un solo UPDATE condicional: bloquea solo la fila
+    # de este contrato, así dos pagos simultáneos no se pisan el saldo.
+    amount = float(payment.amount)
+    new_balance = models.Contract.balance - amount
+    remaining = db.execute(
+        update(models.Contract)
+        .where(
+            models.Contract.id == contract.id,
+            models.Contract.balance > 0,
+            models.Contract.balance + BALANCE_TOLERANCE >= amount
+        )
+        # Si la deuda llega a 0 (o queda el margen de decimales) la dejamos en 0
+        .values(balance=case((new_balance <= BALANCE_TOLERANCE, 0.0), else_=new_balance))
+        .returning(models.Contract.balance)
+    ).scalar_one_or_none()
 
-    # Permitimos un pequeño margen de error por decimales (0.10 ctvs)
-    if float(payment.amount) > (float(current_debt) + 0.10):
+    if remaining is None:
+        db.refresh(contract)
+        current_debt = contract.balance or 0
+        if current_debt <= 0:
+            raise HTTPException(status_code=400, detail="¡Este contrato ya está pagado en su totalidad!")
         raise HTTPException(
             status_code=400, 
             detail=f"El monto excede la deuda total del contrato. Deuda restante: ${current_debt}"
         )
 
+    payment_date = datetime.now(timezone.utc)
     new_payment = models.Payment(
         id=str(uuid.uuid4()),
         contract_id=payment.contract_id,
+        owner_id=contract.owner_id,
         amount=payment.amount,
+        payment_date=payment_date,
         payment_method=payment.payment_method,
-        notes=payment.notes
+        notes=payment.notes,
+        idempotency_key=idempotency_key,
+        request_fingerprint=fingerprint
     )
-    
-    # Restamos del Saldo Global
-    contract.balance = float(current_debt) - float(payment.amount)
+    db.add(new_payment)
 
-    # Si la deuda llega a 0, podriamos marcar el contrato como finalizado (opcional)
-    if contract.balance <= 0.10:
-        contract.balance = 0.0
-        # contract.status = models.ContractStatus.terminated # Opcional
+    # Actualizamos el rollup mensual en la misma transacción
+    if owner:
+        record_payment_in_rollup(db, owner.property_id, owner.owner_id, payment.amount, payment_date)
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # Dos reintentos simultáneos con la misma clave: el rollback deshace también el descuento
+        db.rollback()
+        existing = _payment_by_key(db, contract.owner_id, idempotency_key) if idempotency_key else None
+        if not existing:
+            raise
+        return _replay(existing, payment, fingerprint, response)
 
-    db.add(new_payment)
-    db.commit()
     db.refresh(new_payment)
     
     return new_payment
 
 # 2. VER HISTORIAL DE PAGOS
-@router.get("/my-history", response_model=List[payment_schema.PaymentResponse])
+class HistoryFilters:
+    """Filtros y paginación del historial (query params compartidos por sync y async)."""
+
+    def __init__(
+        self,
+        date_from: Optional[datetime] = Query(None, description="Pagos desde esta fecha"),
+        date_to: Optional[datetime] = Query(None, description="Pagos hasta esta fecha"),
+        property_id: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=500),
+        cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
+    ):
+        self.date_from = date_from
+        self.date_to = date_to
+        self.property_id = property_id
+        self.limit = limit
+        self.cursor = cursor
+
+# Solo las columnas de PaymentResponse (sin cargar objetos ORM completos)
+_PAYMENT_COLUMNS = (
+    models.Payment.id,
+    models.Payment.amount,
+    models.Payment.payment_method,
+    models.Payment.notes,
+    models.Payment.contract_id,
+    models.Payment.payment_date,
+)
+
+def _landlord_payments_statement(owner_id: str):
+    """Pagos del dueño con propiedad, unidad e inquilino (joins planos, sin joinedload)."""
+    tenant_name = func.coalesce(
+        func.nullif(models.User.full_name, ""), models.User.email, "Desconocido"
+    )
+    return select(
+        *_PAYMENT_COLUMNS,
+        models.Property.name.label("property_name"),
+        models.Unit.unit_number,
+        tenant_name.label("tenant_name"),
+    ).join(models.Contract, models.Payment.contract_id == models.Contract.id)\
+     .join(models.Unit, models.Contract.unit_id == models.Unit.id)\
+     .join(models.Property, models.Unit.property_id == models.Property.id)\
+     .outerjoin(models.User, models.Contract.tenant_id == models.User.id)\
+     .where(models.Payment.owner_id == owner_id)
+
+def _history_statement(current_user: models.User, filters: HistoryFilters):
+    """Consulta compartida por la versión síncrona y la asíncrona del historial."""
+    if current_user.role == models.UserRole.tenant:
+        stmt = select(*_PAYMENT_COLUMNS).join(models.Contract).where(
+            models.Contract.tenant_id == current_user.id
+        )
+        if filters.property_id:
+            stmt = stmt.join(models.Unit).where(models.Unit.property_id == filters.property_id)
+
+    elif current_user.role == models.UserRole.landlord:
+        stmt = _landlord_payments_statement(current_user.id)
+        if filters.property_id:
+            stmt = stmt.where(models.Unit.property_id == filters.property_id)
+
+    else:
+        return None
+
+    if filters.date_from:
+        stmt = stmt.where(models.Payment.payment_date >= filters.date_from)
+    if filters.date_to:
+        stmt = stmt.where(models.Payment.payment_date <= filters.date_to)
+
+    # Paginación por keyset: más recientes primero (payment_date DESC, id DESC)
+    if filters.cursor:
+        payment_date, payment_id = decode_cursor(filters.cursor, (datetime, str))
+        stmt = stmt.where(keyset_after([
+            (models.Payment.payment_date, payment_date, True),
+            (models.Payment.id, payment_id, True),
+        ]))
+
+    return stmt.order_by(models.Payment.payment_date.desc(), models.Payment.id.desc()).limit(filters.limit)
+
+def _history_cursor(payment):
+    return payment["payment_date"], payment["id"]
+
 def get_my_payments_history(
+    response: Response,
+    filters: HistoryFilters = Depends(),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    if current_user.role == models.UserRole.tenant:
-        payments = db.query(models.Payment).join(models.Contract).filter(
-            models.Contract.tenant_id == current_user.id
-        ).order_by(models.Payment.payment_date.desc()).all()
-        return payments
+    stmt = _history_statement(current_user, filters)
+    if stmt is None:
+        return []
+    payments = db.execute(stmt).mappings().all()
+    set_next_cursor(response, payments, filters.limit, _history_cursor)
+    return payments
 
-    elif current_user.role == models.UserRole.landlord:
-        payments = db.query(models.Payment)\
-            .join(models.Contract)\
-            .join(models.Unit)\
-            .join(models.Property)\
-            .options(
-                joinedload(models.Payment.contract).joinedload(models.Contract.unit).joinedload(models.Unit.property),
-                joinedload(models.Payment.contract).joinedload(models.Contract.tenant)
-            )\
-            .filter(models.Property.owner_id == current_user.id)\
-            .order_by(models.Payment.payment_date.desc()).all()
-        
-        results = []
-        for p in payments:
-            prop_name = p.contract.unit.property.name if (p.contract and p.contract.unit and p.contract.unit.property) else "N/A"
-            unit_num = p.contract.unit.unit_number if (p.contract and p.contract.unit) else "N/A"
-            t_name = "Desconocido"
-            if p.contract and p.contract.tenant:
-                t_name = p.contract.tenant.full_name or p.contract.tenant.email
-
-            p_data = {
-                "id": p.id,
-                "amount": p.amount,
-                "payment_method": p.payment_method,
-                "notes": p.notes,
-                "contract_id": p.contract_id,
-                "payment_date": p.payment_date,
-                "property_name": prop_name,
-                "unit_number": unit_num,
-                "tenant_name": t_name
-            }
-            results.append(p_data)
-        return results
-    
-    return []
+async def get_my_payments_history_async(
+    response: Response,
+    filters: HistoryFilters = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    stmt = _history_statement(current_user, filters)
+    if stmt is None:
+        return []
+    result = await db.execute(stmt)
+    payments = result.mappings().all()
+    set_next_cursor(response, payments, filters.limit, _history_cursor)
+    return payments
+
+router.add_api_route(
+    "/my-history",
+    get_my_payments_history_async if DB_ASYNC_ENABLED else get_my_payments_history,
+    methods=["GET"],
+    response_model=List[payment_schema.PaymentResponse],
+)
+
+# 3. EXPORTAR PAGOS (CONTABILIDAD)
+@router.get("/export")
+def export_payments(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    date_from: Optional[datetime] = Query(None, description="Pagos desde esta fecha"),
+    date_to: Optional[datetime] = Query(None, description="Pagos hasta esta fecha"),
+    property_id: Optional[str] = None,
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Libro de pagos del dueño en CSV o NDJSON, enviado en streaming desde un cursor
+    del servidor (memoria constante aunque sean millones de filas).
+    """
+    if current_user.role != models.UserRole.landlord:
+        raise HTTPException(status_code=403, detail="Solo los dueños pueden exportar pagos")
+
+    stmt = _landlord_payments_statement(current_user.id)
+    if property_id:
+        stmt = stmt.where(models.Unit.property_id == property_id)
+    if date_from:
+        stmt = stmt.where(models.Payment.payment_date >= date_from)
+    if date_to:
+        stmt = stmt.where(models.Payment.payment_date <= date_to)
+    stmt = stmt.order_by(models.Payment.payment_date, models.Payment.id)
+
+    filename = f"pagos_{datetime.now(timezone.utc):%Y%m%d}.{format}"
+    return StreamingResponse(
+        stream_rows(stmt, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# 4. CONCILIACIÓN BANCARIA (DUEÑO)
+@router.post("/reconcile", response_model=payment_schema.ReconciliationReport)
+def reconcile_bank_statement(
+    file: UploadFile = File(..., description="Extracto bancario en CSV u OFX"),
+    format: Optional[str] = Form(None, description="csv | ofx (por defecto se detecta por la extensión)"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Registra en bloque los créditos del extracto que se asocian a un contrato activo
+    (por código de referencia = primeros 8 caracteres del ID del contrato, nombre del
+    inquilino y monto). Lo que no se puede asociar queda en /payments/review-queue.
+    """
+    if current_user.role != models.UserRole.landlord:
+        raise HTTPException(status_code=403, detail="Solo los dueños pueden conciliar extractos")
+
+    file_format = detect_statement_format(file.filename, format)
+    if file_format not in ("csv", "ofx"):
+        raise HTTPException(status_code=400, detail="Formato no soportado (usa csv u ofx)")
+
+    return reconcile_statement(db, iter_statement(file.file, file_format), owner_id=current_user.id)
+
+@router.get("/review-queue", response_model=List[payment_schema.ReviewItemResponse])
+def get_review_queue(
+    response: Response,
+    review_status: models.ReviewStatus = Query(models.ReviewStatus.pending, alias="status"),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Líneas de extractos pendientes de revisión manual (más recientes primero)."""
+    if current_user.role != models.UserRole.landlord:
+        return []
+
+    query = db.query(models.PaymentReviewItem).filter(
+        models.PaymentReviewItem.owner_id == current_user.id,
+        models.PaymentReviewItem.status == review_status
+    )
+    if cursor:
+        created_at, item_id = decode_cursor(cursor, (datetime, str))
+        query = query.filter(keyset_after([
+            (models.PaymentReviewItem.created_at, created_at, True),
+            (models.PaymentReviewItem.id, item_id, True),
+        ]))
+    items = query.order_by(
+        models.PaymentReviewItem.created_at.desc(), models.PaymentReviewItem.id.desc()
+    ).limit(limit).all()
+    set_next_cursor(response, items, limit, lambda item: (item.created_at, item.id))
+    return items
+
+@router.patch("/review-queue/{item_id}", response_model=payment_schema.ReviewItemResponse)
+def update_review_item(
+    item_id: str,
+    update_data: payment_schema.ReviewItemUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """Marca una línea como resuelta (pago registrado a mano) o descartada."""
+    item = db.query(models.PaymentReviewItem).filter(
+        models.PaymentReviewItem.id == item_id,
+        models.PaymentReviewItem.owner_id == current_user.id
+    ).first()
+    if not item:
+        raise HTTPException(status_code=404, detail="Línea de revisión no encontrada")
+
+    item.status = update_data.status
+    db.commit()
+    db.refresh(item)
+    return item
 
-# 3. VER PAGOS POR CONTRATO
+# 5. VER PAGOS POR CONTRATO
 @router.get("/contract/{contract_id}", response_model=List[payment_schema.PaymentResponse])
 def get_payments_by_contract(
     contract_id: str,
@@ -134,8 +381,7 @@ def get_payments_by_contract(
         raise HTTPException(status_code=403, detail="Acceso denegado")
         
     if current_user.role == models.UserRole.landlord:
-        unit = db.query(models.Unit).filter(models.Unit.id == contract.unit_id).first()
-        if unit.property.owner_id != current_user.id:
+        if contract.owner_id != current_user.id:
             raise HTTPException(status_code=403, detail="Acceso denegado")
 
     return db.query(models.Payment)\
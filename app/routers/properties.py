@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File, Form
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 from app.database import get_db
 from app.schemas import property as property_schema
 from app.crud import property as property_crud
+from app.crud import unit as unit_crud
 from app.dependencies import get_current_user 
-from app.models import User, Unit # <--- Importante: Importar Unit
+from app.models import User, Unit, UnitType, UnitStatus, Property # <--- Importante: Importar Unit
+from app.services.cache import invalidate_dashboard
+from app.pagination import set_next_cursor
+from app.services.property_import import iter_rows, detect_format, import_properties
+from app.services.geo import find_units_near, find_units_within
+from app.services.search import search_properties, index_properties_text
+from app.services.unit_search import search_units, facet_counts
+from app.services.ownership import owned_unit_ids
+from app.services.availability import free_intervals, as_naive_utc
 
 router = APIRouter(
     prefix="/properties",
@@ -22,19 +32,200 @@ def create_property(
     Crea una nueva propiedad (Edificio/Casa) y sus unidades.
     Automáticamente asigna al usuario logueado como dueño.
     """
-    return property_crud.create_property_with_units(db=db, property=property, owner_id=current_user.id)
+    new_property = property_crud.create_property_with_units(db=db, property=property, owner_id=current_user.id)
+    invalidate_dashboard(current_user.id)
+    return new_property
+
+@router.post("/import", response_model=property_schema.PropertyImportReport)
+def import_properties_file(
+    file: UploadFile = File(..., description="CSV o NDJSON: una fila por unidad con los datos de su propiedad"),
+    format: Optional[str] = Form(None, description="csv | ndjson (por defecto se detecta por la extensión)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Importación masiva de propiedades y unidades.
+    Columnas: property_name, property_type, address, city, description, amenities,
+    latitude, longitude, unit_number, unit_type, floor, bedrooms, bathrooms, area_m2,
+    base_price, status. Devuelve un reporte con los errores por fila.
+    """
+    file_format = detect_format(file.filename, format)
+    if file_format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Formato no soportado (usa csv o ndjson)")
+
+    report = import_properties(db, iter_rows(file.file, file_format), owner_id=current_user.id)
+    invalidate_dashboard(current_user.id)
+    return report
 
 @router.get("/", response_model=List[property_schema.PropertyResponse])
 def read_my_properties(
-    skip: int = 0, 
-    limit: int = 100, 
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
+    include_units: bool = Query(True, description="False para listados livianos sin unidades"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Obtiene solo las propiedades del usuario que inició sesión.
+    Si hay más resultados, el header X-Next-Cursor trae el cursor de la siguiente página.
+    """
+    properties = property_crud.get_properties_by_owner(
+        db=db, owner_id=current_user.id, limit=limit, cursor=cursor, include_units=include_units
+    )
+    set_next_cursor(response, properties, limit, lambda p: (p.created_at, p.id))
+    return properties
+
+# --- BÚSQUEDA POR TEXTO ---
+@router.get("/search", response_model=List[property_schema.PropertyResponse])
+def search_properties_text(
+    q: str = Query(..., min_length=2, description="Ej: 'parqueadero amoblado'"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Busca en la descripción, amenities, nombre y dirección de las propiedades.
+    Ignora tildes y mayúsculas, acepta prefijos ('amobl') y ordena por relevancia.
+    """
+    return [prop for prop, rank in search_properties(db, q, limit=limit)]
+
+# --- BÚSQUEDA GEOGRÁFICA (Unidades disponibles) ---
+@router.get("/nearby", response_model=List[property_schema.NearbyUnitResponse])
+def search_units_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5, gt=0, le=100),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    bedrooms: Optional[int] = Query(None, ge=0, description="Mínimo de habitaciones"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Unidades vacantes/disponibles dentro de un radio, ordenadas por distancia.
+    Usa el índice por celdas (property_geo_index), no recorre todas las propiedades.
+    """
+    return find_units_near(
+        db, lat, lon, radius_km, limit=limit,
+        min_price=min_price, max_price=max_price, min_bedrooms=bedrooms
+    )
+
+@router.get("/within", response_model=List[property_schema.NearbyUnitResponse])
+def search_units_within(
+    min_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    bedrooms: Optional[int] = Query(None, ge=0, description="Mínimo de habitaciones"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Unidades vacantes/disponibles dentro de una caja (área visible del mapa), por precio."""
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(status_code=400, detail="Caja inválida: los mínimos deben ser menores que los máximos")
+    return find_units_within(
+        db, min_lat, min_lon, max_lat, max_lon, limit=limit,
+        min_price=min_price, max_price=max_price, min_bedrooms=bedrooms
+    )
+
+# --- BÚSQUEDA DE UNIDADES CON FACETAS ---
+@router.get("/units/search", response_model=property_schema.UnitSearchResponse)
+def search_units_faceted(
+    city: Optional[str] = None,
+    type: Optional[UnitType] = None,
+    bedrooms: Optional[int] = Query(None, ge=0),
+    bathrooms: Optional[float] = Query(None, ge=0),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    status: Optional[UnitStatus] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Unidades paginadas (por precio) + conteos por faceta: ciudad, tipo,
+    habitaciones, baños, estado y rango de precio.
+    Los conteos se calculan en la base de datos con GROUP BY.
     """
-    return property_crud.get_properties_by_owner(db=db, owner_id=current_user.id, skip=skip, limit=limit)
+    params = {
+        "city": city, "type": type, "bedrooms": bedrooms, "bathrooms": bathrooms,
+        "status": status, "min_price": min_price, "max_price": max_price,
+    }
+    items, next_cursor = search_units(db, params, limit=limit, cursor=cursor)
+    return {"items": items, "facets": facet_counts(db, params), "next_cursor": next_cursor}
+
+# --- EDICIÓN MASIVA DE UNIDADES ---
+@router.patch("/units/bulk", response_model=List[property_schema.UnitResponse])
+def bulk_update_units(
+    payload: property_schema.UnitBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Edita muchas unidades en una sola petición (ej: reajuste anual de precios).
+    - 'units': lista de cambios parciales, cada uno con su 'id'.
+    - 'filter' + 'patch': mismo cambio para las unidades de una propiedad que cumplan el filtro
+      (ej: {"filter": {"property_id": "X"}, "patch": {"base_price_multiplier": 1.05}}).
+    """
+    if payload.units is not None:
+        unit_ids = {item.id for item in payload.units}
+        if len(unit_ids) != len(payload.units):
+            raise HTTPException(status_code=400, detail="Hay unidades repetidas en la lista")
+
+        # 1. Permisos: todas las unidades deben ser del usuario (una sola consulta)
+        if owned_unit_ids(db, current_user.id, unit_ids) != unit_ids:
+            raise HTTPException(status_code=403, detail="Not authorized to edit one or more units")
+
+        units = unit_crud.bulk_update_units(db, payload.units)
+    else:
+        # 1. Permisos: la propiedad del filtro debe ser del usuario
+        owns_property = db.query(Property.id).filter(
+            Property.id == payload.filter.property_id,
+            Property.owner_id == current_user.id
+        ).first()
+        if not owns_property:
+            raise HTTPException(status_code=403, detail="Not authorized to edit this property")
+
+        units = unit_crud.patch_units_by_filter(db, payload.filter, payload.patch)
+
+    index_properties_text(db, [unit.property_id for unit in units])
+    db.commit()
+    invalidate_dashboard(current_user.id)
+    return units
+
+# --- DISPONIBILIDAD DE UNA UNIDAD ---
+# Ventana máxima de disponibilidad que se puede pedir de una vez
+MAX_AVAILABILITY_DAYS = 3 * 366
+
+@router.get("/units/{unit_id}/availability", response_model=property_schema.UnitAvailabilityResponse)
+def get_unit_availability(
+    unit_id: str,
+    start: Optional[datetime] = Query(None, description="Inicio de la ventana (por defecto: ahora)"),
+    end: Optional[datetime] = Query(None, description="Fin de la ventana (por defecto: un año después del inicio)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Intervalos libres y ocupados de una unidad dentro de una ventana de fechas.
+    Una sola consulta de los contratos que ocupan la unidad en esa ventana, unidos en memoria.
+    """
+    if not db.query(Unit.id).filter(Unit.id == unit_id).first():
+        raise HTTPException(status_code=404, detail="Unidad no encontrada")
+
+    start = as_naive_utc(start or datetime.now(timezone.utc))
+    end = as_naive_utc(end) if end else start + timedelta(days=365)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'end' debe ser posterior a 'start'")
+    if (end - start).days > MAX_AVAILABILITY_DAYS:
+        raise HTTPException(status_code=400, detail=f"La ventana no puede superar {MAX_AVAILABILITY_DAYS} días")
+
+    return free_intervals(db, unit_id, start, end)
 
 # --- NUEVO ENDPOINT: Editar Unidad ---
 @router.put("/units/{unit_id}", response_model=property_schema.UnitResponse)
@@ -54,8 +245,8 @@ def update_unit(
         raise HTTPException(status_code=404, detail="Unit not found")
     
     # 2. Verificar permisos (Tenant Isolation para escritura)
-    # Accedemos al padre (property) para ver quién es el dueño
-    if unit.property.owner_id != current_user.id:
+    # El dueño está copiado en la unidad (sin cargar unit.property)
+    if unit.owner_id != current_user.id:
          raise HTTPException(status_code=403, detail="Not authorized to edit this unit")
 
     # 3. Actualizar campos
@@ -65,6 +256,8 @@ def update_unit(
     for key, value in update_data.items():
         setattr(unit, key, value)
 
+    index_properties_text(db, [unit.property_id])
     db.commit()
     db.refresh(unit)
+    invalidate_dashboard(current_user.id)
     return unit
\ No newline at end of file
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from typing import List, Optional
 import uuid
-from datetime import datetime
-from app.database import get_db
+from datetime import datetime, timezone
+from app.database import get_db, get_async_db, DB_ASYNC_ENABLED
 from app import models
 # Importamos schemas y models con nombres claros
 from app.schemas import ticket as ticket_schema
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user, get_current_user_async
+from app.services.cache import invalidate_dashboard
+from app.services.ticket_metrics import ticket_metrics, invalidate_ticket_metrics
+from app.pagination import decode_cursor, keyset_after, set_next_cursor
 
 router = APIRouter(
     prefix="/tickets",
@@ -21,8 +26,9 @@ def create_ticket(
     db: Session = Depends(get_db), 
     current_user: models.User = Depends(get_current_user)
 ):
-    # 1. Buscar la Unidad
-    unit = db.query(models.Unit).filter(models.Unit.id == ticket.unit_id).first()
+    # 1. Buscar la Unidad (con su propiedad en la misma consulta)
+    unit = db.query(models.Unit).options(joinedload(models.Unit.property))\
+        .filter(models.Unit.id == ticket.unit_id).first()
     if not unit:
         raise HTTPException(status_code=404, detail="Unidad no encontrada")
 
@@ -49,18 +55,24 @@ def create_ticket(
         title=ticket.title,
         description=ticket.description,
         priority=ticket.priority,
+        priority_rank=models.TICKET_PRIORITY_RANK[ticket.priority],
         status=models.TicketStatus.pending,
         
         unit_id=unit.id,
         property_id=unit.property_id, # <--- El backend asigna la propiedad correcta
+        owner_id=unit.property.owner_id,
         requester_id=current_user.id,
         
-        is_resolved=False 
+        is_resolved=False,
+        # Explícito (no server_default) para que el cursor del listado compare con la misma precisión
+        created_at=datetime.now(timezone.utc)
     )
 
     db.add(new_ticket)
     db.commit()
     db.refresh(new_ticket)
+    invalidate_dashboard(unit.property.owner_id, current_user.id)
+    invalidate_ticket_metrics(unit.property.owner_id)
     
     # 4. Rellenar datos extra para la respuesta inmediata
     # (Opcional, pero ayuda al frontend a no mostrar "null")
@@ -70,40 +82,138 @@ def create_ticket(
     return new_ticket
 
 # 2. LISTAR TICKETS (Enriquecido con datos)
-@router.get("/", response_model=List[ticket_schema.TicketResponse])
-def get_tickets(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    
-    # Query base con relaciones cargadas para eficiencia
-    query = db.query(models.MaintenanceTicket)\
-        .join(models.Unit)\
-        .join(models.Property)\
-        .join(models.User, models.MaintenanceTicket.requester_id == models.User.id)\
-        .options(
-            joinedload(models.MaintenanceTicket.unit).joinedload(models.Unit.property),
-            joinedload(models.MaintenanceTicket.requester)
-        )
+class TicketFilters:
+    """Filtros y paginación del listado (query params compartidos por sync y async)."""
+
+    def __init__(
+        self,
+        status: Optional[models.TicketStatus] = None,
+        priority: Optional[models.TicketPriority] = None,
+        property_id: Optional[str] = None,
+        date_from: Optional[datetime] = Query(None, description="Tickets creados desde esta fecha"),
+        date_to: Optional[datetime] = Query(None, description="Tickets creados hasta esta fecha"),
+        limit: int = Query(100, ge=1, le=500),
+        cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
+    ):
+        self.status = status
+        self.priority = priority
+        self.property_id = property_id
+        self.date_from = date_from
+        self.date_to = date_to
+        self.limit = limit
+        self.cursor = cursor
+
+def _tickets_statement(current_user: models.User, filters: TicketFilters):
+    """
+    Consulta compartida por la versión síncrona y la asíncrona del listado.
+    Proyección con las columnas de TicketResponse (nombres de propiedad, unidad y
+    solicitante incluidos), sin cargar objetos ORM.
+    """
+    ticket = models.MaintenanceTicket
+    stmt = select(
+        ticket.id,
+        ticket.title,
+        ticket.description,
+        ticket.priority,
+        ticket.status,
+        ticket.property_id,
+        ticket.unit_id,
+        ticket.requester_id,
+        ticket.created_at,
+        func.coalesce(models.Property.name, "N/A").label("property_name"),
+        func.coalesce(models.Unit.unit_number, "N/A").label("unit_number"),
+        func.coalesce(func.nullif(models.User.full_name, ""), models.User.email).label("requester_name"),
+        ticket.priority_rank,
+    ).outerjoin(models.Property, ticket.property_id == models.Property.id)\
+     .outerjoin(models.Unit, ticket.unit_id == models.Unit.id)\
+     .outerjoin(models.User, ticket.requester_id == models.User.id)
 
     if current_user.role == models.UserRole.tenant:
-        tickets = query.filter(models.MaintenanceTicket.requester_id == current_user.id).all()
-    
+        stmt = stmt.where(ticket.requester_id == current_user.id)
     elif current_user.role == models.UserRole.landlord:
-        tickets = query.filter(models.Property.owner_id == current_user.id).all()
-    
+        stmt = stmt.where(ticket.owner_id == current_user.id)
     else:
+        return None
+
+    if filters.property_id:
+        stmt = stmt.where(ticket.property_id == filters.property_id)
+    if filters.status is not None:
+        stmt = stmt.where(ticket.status == filters.status)
+    if filters.priority is not None:
+        # Mismo filtro sobre la columna del índice
+        stmt = stmt.where(ticket.priority_rank == models.TICKET_PRIORITY_RANK[filters.priority])
+    if filters.date_from:
+        stmt = stmt.where(ticket.created_at >= filters.date_from)
+    if filters.date_to:
+        stmt = stmt.where(ticket.created_at <= filters.date_to)
+
+    # Paginación por keyset: prioridad (más urgente primero), luego más recientes
+    if filters.cursor:
+        rank, created_at, ticket_id = decode_cursor(filters.cursor, (int, datetime, str))
+        stmt = stmt.where(keyset_after([
+            (ticket.priority_rank, rank, False),
+            (ticket.created_at, created_at, True),
+            (ticket.id, ticket_id, True),
+        ]))
+
+    # Mismo orden que ix_tickets_*_rank_created: la base recorre el índice y corta en LIMIT
+    return stmt.order_by(ticket.priority_rank, ticket.created_at.desc(), ticket.id.desc()).limit(filters.limit)
+
+def _ticket_cursor(row):
+    return row["priority_rank"], row["created_at"], row["id"]
+
+def get_tickets(
+    response: Response,
+    filters: TicketFilters = Depends(),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    stmt = _tickets_statement(current_user, filters)
+    if stmt is None:
+        return []
+    tickets = db.execute(stmt).mappings().all()
+    set_next_cursor(response, tickets, filters.limit, _ticket_cursor)
+    return tickets
+
+async def get_tickets_async(
+    response: Response,
+    filters: TicketFilters = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    stmt = _tickets_statement(current_user, filters)
+    if stmt is None:
         return []
+    result = await db.execute(stmt)
+    tickets = result.mappings().all()
+    set_next_cursor(response, tickets, filters.limit, _ticket_cursor)
+    return tickets
 
-    # Mapeo manual para el Schema
-    results = []
-    for t in tickets:
-        # Asignamos los valores calculados al objeto antes de devolverlo
-        t.property_name = t.unit.property.name if t.unit and t.unit.property else "N/A"
-        t.unit_number = t.unit.unit_number if t.unit else "N/A"
-        t.requester_name = t.requester.full_name or t.requester.email
-        results.append(t)
+router.add_api_route(
+    "/",
+    get_tickets_async if DB_ASYNC_ENABLED else get_tickets,
+    methods=["GET"],
+    response_model=List[ticket_schema.TicketResponse],
+)
 
-    return results
+# 3. MÉTRICAS DE MANTENIMIENTO (SLA)
+@router.get("/metrics")
+def get_ticket_metrics(
+    days: int = Query(90, ge=1, le=730, description="Ventana de tickets resueltos para los percentiles"),
+    weeks: int = Query(12, ge=1, le=52, description="Semanas de la tendencia del backlog"),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Horas hasta la resolución (p50/p90/p99) en general, por prioridad y por propiedad,
+    antigüedad de los tickets abiertos y tendencia semanal del backlog.
+    En PostgreSQL los percentiles salen de percentile_cont; en otros motores de un sketch en streaming.
+    """
+    if current_user.role != models.UserRole.landlord:
+        return {}
+    return ticket_metrics(db, current_user.id, days=days, weeks=weeks)
 
-# 3. ACTUALIZAR ESTADO (Manteniendo tu lógica)
+# 4. ACTUALIZAR ESTADO (Manteniendo tu lógica)
 @router.patch("/{ticket_id}/status", response_model=ticket_schema.TicketResponse)
 def update_ticket_status(
     ticket_id: str,
@@ -119,8 +229,7 @@ def update_ticket_status(
         raise HTTPException(status_code=403, detail="Solo el dueño puede cambiar el estado")
     
     # Verificación estricta de propiedad
-    unit = db.query(models.Unit).filter(models.Unit.id == ticket.unit_id).first()
-    if not unit or unit.property.owner_id != current_user.id:
+    if ticket.owner_id != current_user.id:
          raise HTTPException(status_code=403, detail="No tienes permiso sobre esta propiedad")
 
     ticket.status = status_update.status
@@ -128,11 +237,14 @@ def update_ticket_status(
     # Lógica legacy
     if status_update.status == models.TicketStatus.resolved:
         ticket.is_resolved = True
-        ticket.resolved_at = datetime.now()
+        # UTC (la columna no guarda zona): las métricas restan created_at, que está en UTC
+        ticket.resolved_at = datetime.now(timezone.utc).replace(tzinfo=None)
     else:
         ticket.is_resolved = False
         ticket.resolved_at = None
         
     db.commit()
     db.refresh(ticket)
+    invalidate_dashboard(current_user.id, ticket.requester_id)
+    invalidate_ticket_metrics(current_user.id)
     return ticket
\ No newline at end of file
@@ -7,6 +7,8 @@ from app.crud import user as user_crud
 # Importamos get_current_user para proteger rutas sensibles (como listar todos)
 from app.dependencies import get_current_user 
 from app.models import User
+from app import auth_utils
+from app.routers.auth import server_busy
 
 router = APIRouter(
     prefix="/users",
@@ -22,7 +24,10 @@ def create_user(user: user_schema.UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="El email ya está registrado.")
     
     # 2. Crear usuario
-    return user_crud.create_user(db=db, user=user)
+    try:
+        return user_crud.create_user(db=db, user=user)
+    except auth_utils.HashingBusy:
+        raise server_busy()
 
 # 2. LISTAR USUARIOS (PROTEGIDO - Solo usuarios logueados)
 @router.get("/", response_model=List[user_schema.UserResponse])
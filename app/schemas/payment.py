@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 from decimal import Decimal
 from datetime import datetime
+from app.models import ReviewStatus
 
 class PaymentBase(BaseModel):
     amount: Decimal = Field(..., gt=0, description="Monto del pago")
@@ -27,4 +28,39 @@ class PaymentResponse(PaymentBase):
     # ----------------------------------
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# =======================
+# CONCILIACIÓN BANCARIA
+# =======================
+
+class StatementLineError(BaseModel):
+    line: int
+    error: str
+
+class ReconciliationReport(BaseModel):
+    lines_processed: int = 0
+    payments_created: int = 0
+    amount_posted: float = 0.0
+    already_posted: int = 0
+    debits_ignored: int = 0
+    queued_for_review: int = 0
+    errors: List[StatementLineError] = []
+
+class ReviewItemResponse(BaseModel):
+    id: str
+    transaction_date: Optional[datetime] = None
+    amount: float
+    reference: Optional[str] = None
+    payer_name: Optional[str] = None
+    description: Optional[str] = None
+    reason: str
+    suggested_contract_id: Optional[str] = None
+    status: ReviewStatus
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ReviewItemUpdate(BaseModel):
+    status: ReviewStatus
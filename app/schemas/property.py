@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List, Dict, Any
 from decimal import Decimal
+from datetime import datetime
 from app.models import PropertyType, UnitType, UnitStatus
 
 # =======================
@@ -30,6 +31,38 @@ class UnitUpdate(BaseModel):
     base_price: Optional[Decimal] = None
     status: Optional[UnitStatus] = None
 
+class UnitBulkItem(UnitUpdate):
+    id: str
+
+class UnitBulkFilter(BaseModel):
+    property_id: str
+    status: Optional[UnitStatus] = None
+    type: Optional[UnitType] = None
+    bedrooms: Optional[int] = None
+
+class UnitBulkPatch(BaseModel):
+    base_price: Optional[Decimal] = Field(None, gt=0)
+    base_price_multiplier: Optional[Decimal] = Field(None, gt=0, description="Ej: 1.05 para +5%")
+    status: Optional[UnitStatus] = None
+    type: Optional[UnitType] = None
+
+class UnitBulkUpdate(BaseModel):
+    """Usar 'units' (lista de cambios por unidad) o 'filter' + 'patch' (mismo cambio a varias)."""
+    units: Optional[List[UnitBulkItem]] = Field(None, max_length=5000)
+    filter: Optional[UnitBulkFilter] = None
+    patch: Optional[UnitBulkPatch] = None
+
+    @model_validator(mode="after")
+    def check_mode(self):
+        if (self.units is None) == (self.filter is None):
+            raise ValueError("Envía 'units' o 'filter' + 'patch', no ambos")
+        if self.filter is not None:
+            if self.patch is None or not self.patch.model_dump(exclude_none=True):
+                raise ValueError("'filter' requiere un 'patch' con al menos un cambio")
+            if self.patch.base_price is not None and self.patch.base_price_multiplier is not None:
+                raise ValueError("Usa base_price o base_price_multiplier, no ambos")
+        return self
+
 class UnitResponse(UnitBase):
     id: str  # <--- TIPO STRING (Para UUID)
     property_id: str # <--- TIPO STRING
@@ -60,4 +93,64 @@ class PropertyResponse(PropertyBase):
     units: List[UnitResponse] = []
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# =======================
+# IMPORTACIÓN MASIVA
+# =======================
+
+class ImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class PropertyImportReport(BaseModel):
+    rows_processed: int = 0
+    properties_created: int = 0
+    units_created: int = 0
+    rows_failed: int = 0
+    errors: List[ImportRowError] = []
+
+# =======================
+# BÚSQUEDA GEOGRÁFICA
+# =======================
+
+class NearbyUnitResponse(UnitResponse):
+    property_name: str
+    address: Optional[str] = None
+    city: Optional[str] = None
+    latitude: float
+    longitude: float
+    distance_km: Optional[float] = None
+
+# =======================
+# BÚSQUEDA CON FACETAS
+# =======================
+
+class UnitSearchItem(UnitResponse):
+    property_name: str
+    city: Optional[str] = None
+    address: Optional[str] = None
+
+class FacetCount(BaseModel):
+    value: Optional[str] = None
+    count: int
+
+class UnitSearchResponse(BaseModel):
+    items: List[UnitSearchItem] = []
+    facets: Dict[str, List[FacetCount]] = {}
+    next_cursor: Optional[str] = None
+
+# =======================
+# DISPONIBILIDAD
+# =======================
+
+class DateInterval(BaseModel):
+    start: datetime
+    end: datetime
+
+class UnitAvailabilityResponse(BaseModel):
+    unit_id: str
+    start: datetime
+    end: datetime
+    busy: List[DateInterval] = []
+    free: List[DateInterval] = []
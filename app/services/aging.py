@@ -0,0 +1,142 @@
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models import Contract, ContractStatus, Property, Unit, User
+
+# Tramos de antigüedad de la deuda (días de atraso desde la fecha de vencimiento de la cuota)
+AGING_BUCKETS = (("current", 0), ("days_30", 30), ("days_60", 60), ("days_90_plus", 90))
+# Día de pago máximo: así la cuota vence en todos los meses (febrero incluido)
+MAX_PAYMENT_DAY = 28
+
+def _load_contracts(db: Session, owner_id: str, property_id: str = None):
+    """
+    Contratos activos del dueño en columnas (una sola consulta, sin objetos ORM).
+    Lo pagado sale de total_contract_value - balance: el saldo ya se descuenta con cada pago,
+    así no hay que sumar la tabla de pagos.
+    """
+    stmt = select(
+        Contract.id,
+        Unit.property_id,
+        Property.name,
+        func.coalesce(func.nullif(User.full_name, ""), User.email),
+        Contract.start_date,
+        Contract.end_date,
+        Contract.amount,
+        Contract.payment_day,
+        Contract.total_contract_value,
+        Contract.balance,
+    ).join(Unit, Contract.unit_id == Unit.id)\
+     .join(Property, Unit.property_id == Property.id)\
+     .outerjoin(User, Contract.tenant_id == User.id)\
+     .where(Contract.owner_id == owner_id, Contract.status == ContractStatus.active)
+    if property_id:
+        stmt = stmt.where(Unit.property_id == property_id)
+    return db.execute(stmt).all()
+
+def _column(values, default=0.0):
+    """Columna numérica como array (los NULL pasan a 'default')."""
+    return np.nan_to_num(np.array(values, dtype=np.float64), nan=default)
+
+def _installments_due(as_of, first_due_month, due_day, installments):
+    """Cuotas vencidas a la fecha 'as_of' para cada contrato (vectorizado)."""
+    as_of_month = as_of.astype("datetime64[M]")
+    as_of_day = (as_of - as_of_month.astype("datetime64[D]")).astype(np.int64) + 1
+    due = (as_of_month - first_due_month).astype(np.int64) + (as_of_day >= due_day)
+    return np.clip(due, 0, installments)
+
+def compute_aging(columns, today):
+    """
+    Deuda vencida por contrato y por tramo, sin bucles por contrato.
+    columns: dict de arrays (start, end, amount, payment_day, total, balance).
+    Cada contrato tiene una cuota mensual que vence el 'payment_day' (la primera en o después
+    del inicio) y tantas cuotas como meses se cobraron al crearlo (ceil(días / 30)).
+    Para cada corte (hoy, hoy-30, hoy-60, hoy-90) lo esperado es cuotas_vencidas * monto;
+    lo impago a ese corte es max(esperado - pagado, 0) y la diferencia entre cortes da los tramos.
+    """
+    start = columns["start"].astype("datetime64[D]")
+    end = columns["end"].astype("datetime64[D]")
+    amount = columns["amount"]
+    total = columns["total"]
+    paid = np.clip(total - columns["balance"], 0, None)
+
+    installments = np.maximum(np.ceil((end - start).astype(np.int64) / 30), 1).astype(np.int64)
+    due_day = np.clip(columns["payment_day"], 1, MAX_PAYMENT_DAY)
+
+    start_month = start.astype("datetime64[M]")
+    start_day = (start - start_month.astype("datetime64[D]")).astype(np.int64) + 1
+    first_due_month = start_month + (start_day > due_day).astype(np.int64)
+
+    today = np.datetime64(today, "D")
+    unpaid = {}
+    for name, days in AGING_BUCKETS:
+        due = _installments_due(today - np.timedelta64(days, "D"), first_due_month, due_day, installments)
+        expected = np.minimum(due * amount, total)
+        unpaid[name] = np.clip(expected - paid, 0, None)
+
+    buckets = {}
+    names = [name for name, _ in AGING_BUCKETS]
+    for i, name in enumerate(names):
+        older = unpaid[names[i + 1]] if i + 1 < len(names) else 0
+        buckets[name] = unpaid[name] - older
+    buckets["total"] = unpaid["current"]
+    return buckets
+
+def aging_report(db: Session, owner_id: str, property_id: str = None, top: int = 20):
+    """Reporte de antigüedad de deuda del dueño: totales, por propiedad y los contratos más atrasados."""
+    rows = _load_contracts(db, owner_id, property_id)
+    names = [name for name, _ in AGING_BUCKETS]
+    empty = {name: 0.0 for name in names + ["total"]}
+    if not rows:
+        return {"as_of": datetime.now(timezone.utc).date(), "totals": empty, "properties": [], "top_delinquent": []}
+
+    ids, property_ids, property_names, tenants, starts, ends, amounts, days, totals, balances = zip(*rows)
+    today = datetime.now(timezone.utc).date()
+    buckets = compute_aging({
+        "start": np.array(starts, dtype="datetime64[us]"),
+        "end": np.array(ends, dtype="datetime64[us]"),
+        "amount": _column(amounts),
+        "payment_day": _column(days, default=5).astype(np.int64),
+        "total": _column(totals),
+        "balance": _column(balances),
+    }, today)
+
+    # Agregado por propiedad con bincount (sin bucles por contrato)
+    keys, first_row, index = np.unique(np.array(property_ids, dtype=object), return_index=True, return_inverse=True)
+    per_property = {name: np.bincount(index, weights=buckets[name], minlength=len(keys)) for name in buckets}
+    delinquent = np.bincount(index, weights=(buckets["total"] > 0.01), minlength=len(keys))
+    contract_count = np.bincount(index, minlength=len(keys))
+
+    properties = [
+        {
+            "property_id": key,
+            "property_name": property_names[first_row[i]],
+            "contracts": int(contract_count[i]),
+            "delinquent_contracts": int(delinquent[i]),
+            **{name: round(float(per_property[name][i]), 2) for name in buckets},
+        }
+        for i, key in enumerate(keys)
+    ]
+    properties.sort(key=lambda p: p["total"], reverse=True)
+
+    # Contratos con más deuda vencida (argpartition: no ordenamos todo el arreglo)
+    owed = buckets["total"]
+    top = min(top, int((owed > 0.01).sum()))
+    worst = []
+    if top > 0:
+        candidates = np.argpartition(-owed, top - 1)[:top]
+        for i in candidates[np.argsort(-owed[candidates])]:
+            worst.append({
+                "contract_id": ids[i],
+                "property_id": property_ids[i],
+                "property_name": property_names[i],
+                "tenant_name": tenants[i],
+                **{name: round(float(buckets[name][i]), 2) for name in buckets},
+            })
+
+    return {
+        "as_of": today,
+        "totals": {name: round(float(buckets[name].sum()), 2) for name in buckets},
+        "properties": properties,
+        "top_delinquent": worst,
+    }
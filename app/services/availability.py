@@ -0,0 +1,97 @@
+import os
+import threading
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from app.models import Contract, ContractStatus
+
+# Estados que ocupan la unidad (los mismos que cubre la restricción de exclusión en Postgres)
+BLOCKING_STATUSES = (ContractStatus.pending, ContractStatus.signed_by_tenant, ContractStatus.active)
+
+# Nombre de la restricción creada en la migración 0008 (solo Postgres)
+OVERLAP_CONSTRAINT = "ex_contracts_unit_no_overlap"
+
+def as_naive_utc(moment: datetime) -> datetime:
+    """Las columnas de contratos son DateTime sin zona: comparamos todo en UTC 'naive'."""
+    if moment.tzinfo is not None:
+        return moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+# =======================
+# 1. BLOQUEO POR UNIDAD (SQLite)
+# =======================
+# Tabla fija de locks (striping): cada unidad cae siempre en el mismo lock, y la memoria
+# no crece con la cantidad de unidades. Dos unidades pueden compartir lock (solo esperan).
+UNIT_LOCK_STRIPES = int(os.getenv("CONTRACT_UNIT_LOCK_STRIPES", 64))
+_unit_locks = [threading.Lock() for _ in range(UNIT_LOCK_STRIPES)]
+
+def unit_lock(unit_id: str) -> threading.Lock:
+    """
+    Sin restricción de exclusión (SQLite) serializamos 'verificar + insertar' por unidad
+    dentro del proceso para que dos solicitudes simultáneas no pasen ambas la validación.
+    """
+    return _unit_locks[hash(unit_id) % UNIT_LOCK_STRIPES]
+
+def supports_exclusion(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+# =======================
+# 2. CONSULTAS
+# =======================
+def _busy_query(db: Session, columns, unit_id: str, window_start: datetime = None, window_end: datetime = None):
+    """Contratos que ocupan la unidad y se cruzan con la ventana (sobre ix_contracts_unit_status_dates)."""
+    query = db.query(*columns).filter(
+        Contract.unit_id == unit_id,
+        Contract.status.in_(BLOCKING_STATUSES)
+    )
+    if window_start is not None:
+        query = query.filter(Contract.end_date >= window_start)
+    if window_end is not None:
+        query = query.filter(Contract.start_date <= window_end)
+    return query
+
+def busy_intervals(db: Session, unit_id: str, window_start: datetime = None, window_end: datetime = None):
+    """Intervalos ocupados de una unidad. Devuelve tuplas (inicio, fin, contract_id)."""
+    query = _busy_query(db, (Contract.start_date, Contract.end_date, Contract.id), unit_id, window_start, window_end)
+    return [(start, end, contract_id) for start, end, contract_id in query]
+
+def find_conflict(db: Session, unit_id: str, start: datetime, end: datetime):
+    """Id de un contrato que ocupa la unidad en [start, end], o None (el cruce ya se filtra en SQL)."""
+    start, end = as_naive_utc(start), as_naive_utc(end)
+    row = _busy_query(db, (Contract.id,), unit_id, start, end).order_by(Contract.start_date).first()
+    return row[0] if row else None
+
+def free_intervals(db: Session, unit_id: str, window_start: datetime, window_end: datetime):
+    """
+    Intervalos libres dentro de la ventana: une los ocupados (ordenados) y devuelve los huecos.
+    Los extremos de un contrato cuentan como ocupados (rango cerrado, igual que la validación).
+    """
+    window_start, window_end = as_naive_utc(window_start), as_naive_utc(window_end)
+    busy = sorted(busy_intervals(db, unit_id, window_start, window_end), key=lambda item: item[0])
+
+    # 1. Unir intervalos ocupados que se tocan o se cruzan
+    merged = []
+    for start, end, _ in busy:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    # 2. Huecos entre los ocupados, recortados a la ventana
+    free = []
+    cursor = window_start
+    for start, end in merged:
+        if start > cursor:
+            free.append({"start": cursor, "end": min(start, window_end)})
+        cursor = max(cursor, end)
+        if cursor >= window_end:
+            break
+    if cursor < window_end:
+        free.append({"start": cursor, "end": window_end})
+
+    return {
+        "unit_id": unit_id,
+        "start": window_start,
+        "end": window_end,
+        "busy": [{"start": start, "end": end} for start, end in merged],
+        "free": free,
+    }
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Caché en memoria (por proceso) con expiración por tiempo (TTL) y
+    desalojo LRU cuando se alcanza el tamaño máximo.
+    Es segura entre hilos: FastAPI ejecuta los endpoints síncronos en un threadpool.
+    """
+
+    def __init__(self, ttl_seconds: float = 60, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Devuelve el valor guardado o None si no existe o ya expiró."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            # Marcamos la entrada como usada recientemente (LRU)
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Contadores para monitoreo (aciertos, fallos y tamaño actual)."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+# Conteos del dashboard por usuario (TTL corto). Se invalida explícitamente
+# en las escrituras de propiedades, unidades, tickets y contratos.
+dashboard_cache = TTLCache(
+    ttl_seconds=float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", 30)),
+    max_size=int(os.getenv("DASHBOARD_CACHE_MAX_SIZE", 2048)),
+)
+
+def invalidate_dashboard(*user_ids):
+    for user_id in user_ids:
+        if user_id:
+            dashboard_cache.invalidate(user_id)
@@ -1,4 +1,5 @@
 import os
+import uuid
 import resend
 from dotenv import load_dotenv
 
@@ -16,20 +17,57 @@ def send_email(to_email: str, subject: str, html_content: str):
     """
     try:
         print(f"📧 Intentando enviar correo a: {to_email}")
-        
+        email = ResendTransport().send(to_email, subject, html_content)
+        print(f"✅ Correo enviado con éxito! ID: {email}")
+        return email
+    except Exception as e:
+        print(f"❌ Error enviando correo: {str(e)}")
+        return None
+
+# =======================
+# TRANSPORTES (Intercambiables)
+# =======================
+# Cada transporte expone send(to_email, subject, html_content) y lanza una
+# excepción si falla, para que el despachador del outbox pueda reintentar.
+
+class ResendTransport:
+    """Envío real a través de la API HTTP de Resend."""
+
+    def send(self, to_email: str, subject: str, html_content: str):
         params = {
             "from": f"Zerium App <{FROM_EMAIL}>",
             "to": [to_email],
             "subject": subject,
             "html": html_content,
         }
+        return resend.Emails.send(params)
 
-        email = resend.Emails.send(params)
-        print(f"✅ Correo enviado con éxito! ID: {email}")
-        return email
-    except Exception as e:
-        print(f"❌ Error enviando correo: {str(e)}")
-        return None
+class FileTransport:
+    """Guarda cada correo como archivo .html (desarrollo local y pruebas)."""
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or os.getenv("EMAIL_FILE_DIR", "sent_emails")
+
+    def send(self, to_email: str, subject: str, html_content: str):
+        os.makedirs(self.directory, exist_ok=True)
+        email_id = str(uuid.uuid4())
+        path = os.path.join(self.directory, f"{email_id}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"<!-- To: {to_email} | Subject: {subject} -->\n")
+            f.write(html_content)
+        return {"id": email_id}
+
+TRANSPORTS = {
+    "resend": ResendTransport,
+    "file": FileTransport,
+}
+
+def get_transport():
+    """Devuelve el transporte configurado en EMAIL_TRANSPORT (por defecto Resend)."""
+    name = os.getenv("EMAIL_TRANSPORT", "resend").lower()
+    if name not in TRANSPORTS:
+        raise ValueError(f"EMAIL_TRANSPORT desconocido: {name}")
+    return TRANSPORTS[name]()
 
 # Plantilla HTML para recuperar contraseña
 def get_password_reset_template(reset_link: str):
@@ -0,0 +1,179 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import EmailOutbox, EmailStatus
+from app.services.email import get_transport
+
+# Configuración del outbox
+BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 50))
+POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", 5))
+MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 6))
+BACKOFF_BASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", 30))
+DEDUP_WINDOW_SECONDS = int(os.getenv("EMAIL_DEDUP_WINDOW_SECONDS", 60))
+# Tiempo que un despachador tiene para enviar un lote tomado; si muere, otro lo retoma al vencer
+LEASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", 300))
+
+def _now():
+    return datetime.now(timezone.utc)
+
+# =======================
+# 1. ENCOLAR (Desde los endpoints)
+# =======================
+def queue_email(db: Session, to_email: str, subject: str, html_content: str, template: str = None):
+    """
+    Guarda el correo en el outbox y retorna de inmediato (solo un INSERT).
+    Si ya se encoló el mismo tipo de correo para esa dirección dentro de la
+    ventana de deduplicación, no se crea otro y se devuelve el existente.
+    """
+    if template and DEDUP_WINDOW_SECONDS > 0:
+        window_start = _now() - timedelta(seconds=DEDUP_WINDOW_SECONDS)
+        duplicate = db.query(EmailOutbox).filter(
+            EmailOutbox.to_email == to_email,
+            EmailOutbox.template == template,
+            EmailOutbox.status != EmailStatus.failed,
+            EmailOutbox.created_at >= window_start
+        ).first()
+        if duplicate:
+            return duplicate
+
+    email = EmailOutbox(
+        to_email=to_email,
+        subject=subject,
+        html_content=html_content,
+        template=template,
+        status=EmailStatus.pending,
+        attempts=0,
+        next_attempt_at=_now()
+    )
+    db.add(email)
+    db.commit()
+    return email
+
+# =======================
+# 2. DESPACHAR (En segundo plano)
+# =======================
+def _claim_batch(batch_size: int):
+    """
+    Transacción corta: toma los correos vencidos (pendientes o con lease expirado),
+    los marca 'sending' con un lease y confirma. Devuelve copias planas de los datos.
+    SKIP LOCKED permite varios workers sin tomar el mismo correo dos veces.
+    """
+    db = SessionLocal()
+    try:
+        now = _now()
+        batch = db.query(EmailOutbox).filter(
+            or_(
+                (EmailOutbox.status == EmailStatus.pending) & (EmailOutbox.next_attempt_at <= now),
+                (EmailOutbox.status == EmailStatus.sending) & (EmailOutbox.lease_expires_at <= now),
+            )
+        ).order_by(EmailOutbox.next_attempt_at)\
+         .limit(batch_size)\
+         .with_for_update(skip_locked=True)\
+         .all()
+
+        claimed = []
+        lease_expires_at = now + timedelta(seconds=LEASE_SECONDS)
+        for email in batch:
+            email.status = EmailStatus.sending
+            email.lease_expires_at = lease_expires_at
+            claimed.append({
+                "id": email.id,
+                "to_email": email.to_email,
+                "subject": email.subject,
+                "html_content": email.html_content,
+                "attempts": email.attempts or 0,
+                "lease_expires_at": lease_expires_at,
+            })
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+def _record_result(email: dict, error: Exception = None):
+    """
+    Guarda el resultado de un envío (otra transacción corta). Solo si seguimos
+    teniendo el lease: si venció y otro worker lo tomó, no pisamos su estado.
+    Al enviarse (o descartarse) se borra el cuerpo, que puede llevar tokens de reset.
+    """
+    if error is None:
+        values = {"status": EmailStatus.sent, "sent_at": _now(), "last_error": None, "html_content": None}
+    else:
+        attempts = email["attempts"] + 1
+        values = {"attempts": attempts, "last_error": str(error)}
+        if attempts >= MAX_ATTEMPTS:
+            values.update(status=EmailStatus.failed, html_content=None)
+            print(f"❌ Correo a {email['to_email']} descartado tras {attempts} intentos: {error}")
+        else:
+            delay = BACKOFF_BASE_SECONDS * (2 ** (attempts - 1))
+            values.update(status=EmailStatus.pending, next_attempt_at=_now() + timedelta(seconds=delay))
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(EmailOutbox)
+            .where(
+                EmailOutbox.id == email["id"],
+                EmailOutbox.status == EmailStatus.sending,
+                EmailOutbox.lease_expires_at == email["lease_expires_at"],
+            )
+            .values(lease_expires_at=None, **values)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def dispatch_pending(transport=None, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Envía un lote de correos pendientes cuyo próximo intento ya venció.
+    Los envíos (HTTP externo) ocurren fuera de toda transacción: no se retienen
+    locks ni conexiones del pool mientras se espera al proveedor.
+    Los fallos se reintentan con backoff exponencial hasta MAX_ATTEMPTS.
+    Retorna cuántos correos se procesaron en el lote.
+    """
+    transport = transport or get_transport()
+    claimed = _claim_batch(batch_size)
+    for email in claimed:
+        try:
+            transport.send(email["to_email"], email["subject"], email["html_content"])
+        except Exception as e:
+            _record_result(email, e)
+        else:
+            _record_result(email)
+    return len(claimed)
+
+class EmailDispatcher:
+    """Hilo de fondo que vacía el outbox periódicamente."""
+
+    def __init__(self, poll_seconds: float = POLL_SECONDS, transport=None):
+        self.poll_seconds = poll_seconds
+        self.transport = transport
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processed = dispatch_pending(self.transport)
+            except Exception as e:
+                print(f"❌ Error en el despachador de correos: {str(e)}")
+                processed = 0
+            # Si el lote vino lleno, seguimos sin esperar
+            if processed < BATCH_SIZE:
+                self._stop.wait(self.poll_seconds)
+
+dispatcher = EmailDispatcher()
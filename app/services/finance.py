@@ -0,0 +1,69 @@
+from collections import defaultdict
+from datetime import date, datetime
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import PaymentMonthlyRollup
+
+# Margen de error por decimales (0.10 ctvs) al comparar un pago con la deuda del contrato
+BALANCE_TOLERANCE = 0.10
+
+def month_start(moment: datetime) -> date:
+    """Primer día del mes de una fecha (clave del rollup)."""
+    return date(moment.year, moment.month, 1)
+
+def record_payments_in_rollup(db: Session, payments):
+    """
+    Suma pagos al rollup mensual dentro de la transacción actual (no hace commit).
+    payments: iterable de tuplas (property_id, owner_id, amount, payment_date).
+    Agrupa primero por (propiedad, mes) para hacer un solo upsert por grupo.
+    """
+    grouped = defaultdict(lambda: [None, 0.0, 0])
+    for property_id, owner_id, amount, payment_date in payments:
+        entry = grouped[(property_id, month_start(payment_date))]
+        entry[0] = owner_id
+        entry[1] += float(amount)
+        entry[2] += 1
+
+    if not grouped:
+        return
+
+    rows = [
+        {
+            "property_id": property_id,
+            "month": month,
+            "owner_id": owner_id,
+            "collected_amount": amount,
+            "payment_count": count,
+        }
+        for (property_id, month), (owner_id, amount, count) in grouped.items()
+    ]
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(PaymentMonthlyRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PaymentMonthlyRollup.property_id, PaymentMonthlyRollup.month],
+            set_={
+                "collected_amount": PaymentMonthlyRollup.collected_amount + stmt.excluded.collected_amount,
+                "payment_count": PaymentMonthlyRollup.payment_count + stmt.excluded.payment_count,
+                "owner_id": stmt.excluded.owner_id,
+            },
+        )
+        db.execute(stmt, rows)
+        return
+
+    # Otros motores: UPDATE y, si no existía la fila, INSERT
+    for row in rows:
+        updated = db.query(PaymentMonthlyRollup).filter(
+            PaymentMonthlyRollup.property_id == row["property_id"],
+            PaymentMonthlyRollup.month == row["month"]
+        ).update({
+            PaymentMonthlyRollup.collected_amount: PaymentMonthlyRollup.collected_amount + row["collected_amount"],
+            PaymentMonthlyRollup.payment_count: PaymentMonthlyRollup.payment_count + row["payment_count"],
+        }, synchronize_session=False)
+        if not updated:
+            db.add(PaymentMonthlyRollup(**row))
+
+def record_payment_in_rollup(db: Session, property_id: str, owner_id: str, amount, payment_date: datetime):
+    record_payments_in_rollup(db, [(property_id, owner_id, amount, payment_date)])
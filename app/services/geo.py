@@ -0,0 +1,150 @@
+import math
+import os
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models import Property, Unit, UnitStatus, PropertyGeoIndex
+
+# Tamaño de cada celda de la grilla en grados (~5.5 km de latitud con 0.05)
+GEO_CELL_DEGREES = float(os.getenv("GEO_CELL_DEGREES", 0.05))
+# Si el área cubre más celdas que esto, se usa el índice (latitude, longitude)
+GEO_MAX_CELLS = int(os.getenv("GEO_MAX_CELLS", 400))
+# Filas extra que se piden a la base (sobre 'limit') antes del filtro exacto por haversine
+GEO_NEAR_OVERFETCH = int(os.getenv("GEO_NEAR_OVERFETCH", 20))
+EARTH_RADIUS_KM = 6371.0088
+
+AVAILABLE_STATUSES = [UnitStatus.vacant, UnitStatus.available]
+
+def cell_coords(latitude: float, longitude: float):
+    return math.floor(latitude / GEO_CELL_DEGREES), math.floor(longitude / GEO_CELL_DEGREES)
+
+def cell_key(latitude: float, longitude: float) -> str:
+    row, col = cell_coords(latitude, longitude)
+    return f"{row}:{col}"
+
+def haversine_km(lat1, lon1, lat2, lon2) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def bounding_box(latitude: float, longitude: float, radius_km: float):
+    """Caja (min_lat, min_lon, max_lat, max_lon) que contiene el círculo de búsqueda."""
+    d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    d_lon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    return latitude - d_lat, longitude - d_lon, latitude + d_lat, longitude + d_lon
+
+# =======================
+# MANTENIMIENTO DEL ÍNDICE
+# =======================
+def geo_index_rows(properties):
+    """Filas del índice para propiedades con coordenadas (dicts con id, latitude, longitude)."""
+    return [
+        {
+            "property_id": p["id"],
+            "cell": cell_key(float(p["latitude"]), float(p["longitude"])),
+            "latitude": float(p["latitude"]),
+            "longitude": float(p["longitude"]),
+        }
+        for p in properties
+        if p.get("latitude") is not None and p.get("longitude") is not None
+    ]
+
+def index_property_locations(db: Session, properties):
+    """Agrega al índice las propiedades nuevas (no hace commit)."""
+    rows = geo_index_rows(properties)
+    if rows:
+        db.execute(insert(PropertyGeoIndex), rows)
+
+# =======================
+# BÚSQUEDA
+# =======================
+def _candidates(db: Session, min_lat, min_lon, max_lat, max_lon, min_price=None, max_price=None, min_bedrooms=None):
+    """Unidades disponibles dentro de la caja, usando las celdas de la grilla como filtro por índice."""
+    row_min, col_min = cell_coords(min_lat, min_lon)
+    row_max, col_max = cell_coords(max_lat, max_lon)
+
+    query = db.query(Unit, Property.name, Property.address, Property.city, PropertyGeoIndex.latitude, PropertyGeoIndex.longitude)\
+        .join(Property, Property.id == PropertyGeoIndex.property_id)\
+        .join(Unit, Unit.property_id == Property.id)
+
+    cell_count = (row_max - row_min + 1) * (col_max - col_min + 1)
+    if cell_count <= GEO_MAX_CELLS:
+        cells = [f"{r}:{c}" for r in range(row_min, row_max + 1) for c in range(col_min, col_max + 1)]
+        query = query.filter(PropertyGeoIndex.cell.in_(cells))
+
+    query = query.filter(
+        PropertyGeoIndex.latitude.between(min_lat, max_lat),
+        PropertyGeoIndex.longitude.between(min_lon, max_lon),
+        Property.is_deleted == False,
+        Unit.status.in_(AVAILABLE_STATUSES)
+    )
+    if min_price is not None:
+        query = query.filter(Unit.base_price >= min_price)
+    if max_price is not None:
+        query = query.filter(Unit.base_price <= max_price)
+    if min_bedrooms is not None:
+        query = query.filter(Unit.bedrooms >= min_bedrooms)
+    return query
+
+def _to_result(unit, name, address, city, latitude, longitude, distance_km=None):
+    return {
+        "id": unit.id,
+        "property_id": unit.property_id,
+        "unit_number": unit.unit_number,
+        "type": unit.type,
+        "floor": unit.floor,
+        "bedrooms": unit.bedrooms,
+        "bathrooms": unit.bathrooms,
+        "area_m2": unit.area_m2,
+        "base_price": unit.base_price,
+        "status": unit.status,
+        "property_name": name,
+        "address": address,
+        "city": city,
+        "latitude": latitude,
+        "longitude": longitude,
+        "distance_km": round(distance_km, 3) if distance_km is not None else None,
+    }
+
+def _approx_distance_sq(latitude: float, longitude: float):
+    """
+    Distancia al cuadrado aproximada (equirectangular, en grados²) como expresión SQL:
+    solo aritmética, así sirve igual en PostgreSQL y SQLite. Para radios de ciudad
+    ordena prácticamente igual que haversine.
+    """
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    d_lat = PropertyGeoIndex.latitude - latitude
+    d_lon = (PropertyGeoIndex.longitude - longitude) * cos_lat
+    return d_lat * d_lat + d_lon * d_lon
+
+def find_units_near(db: Session, latitude: float, longitude: float, radius_km: float, limit: int = 50, **filters):
+    """
+    Unidades disponibles dentro del radio, ordenadas por distancia.
+    La base ordena por la distancia aproximada y aplica LIMIT (con un pequeño margen);
+    en Python solo se calcula haversine sobre esas filas para el filtro y orden exactos.
+    """
+    box = bounding_box(latitude, longitude, radius_km)
+    approx = _approx_distance_sq(latitude, longitude)
+    # 1% de holgura: la aproximación no debe descartar nada que haversine acepte
+    radius_deg = math.degrees(radius_km / EARTH_RADIUS_KM) * 1.01
+    rows = _candidates(db, *box, **filters)\
+        .filter(approx <= radius_deg * radius_deg)\
+        .order_by(approx, Unit.id)\
+        .limit(limit + GEO_NEAR_OVERFETCH)\
+        .all()
+
+    results = []
+    for unit, name, address, city, lat, lon in rows:
+        distance = haversine_km(latitude, longitude, lat, lon)
+        if distance <= radius_km:
+            results.append(_to_result(unit, name, address, city, lat, lon, distance))
+    results.sort(key=lambda r: (r["distance_km"], r["id"]))
+    return results[:limit]
+
+def find_units_within(db: Session, min_lat, min_lon, max_lat, max_lon, limit: int = 50, **filters):
+    """Unidades disponibles dentro de una caja (ej: el área visible del mapa), por precio."""
+    rows = _candidates(db, min_lat, min_lon, max_lat, max_lon, **filters)\
+        .order_by(Unit.base_price, Unit.id).limit(limit).all()
+    return [_to_result(*row) for row in rows]
@@ -0,0 +1,124 @@
+import os
+from collections import namedtuple
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session, object_session
+from app.models import Contract, MaintenanceTicket, Payment, PaymentMonthlyRollup, Property, Unit
+from app.services.cache import TTLCache, invalidate_dashboard
+from app.services.ticket_metrics import invalidate_ticket_metrics
+
+# Unidad -> (propiedad, dueño). Es la pregunta que repiten casi todos los endpoints
+# de escritura ("¿esta unidad es de este dueño?").
+UnitOwner = namedtuple("UnitOwner", ["property_id", "owner_id"])
+
+ownership_cache = TTLCache(
+    ttl_seconds=float(os.getenv("OWNERSHIP_CACHE_TTL_SECONDS", 300)),
+    max_size=int(os.getenv("OWNERSHIP_CACHE_MAX_SIZE", 10000)),
+)
+
+# =======================
+# 1. CONSULTAS
+# =======================
+def unit_owners(db: Session, unit_ids) -> dict:
+    """
+    Propiedad y dueño de varias unidades: lo que no está en caché se resuelve
+    con una sola consulta por PK de units (owner_id está copiado en la unidad).
+    Las unidades inexistentes no aparecen en el resultado.
+    """
+    found = {}
+    missing = []
+    for unit_id in set(unit_ids):
+        cached = ownership_cache.get(unit_id)
+        if cached is not None:
+            found[unit_id] = cached
+        else:
+            missing.append(unit_id)
+
+    if missing:
+        rows = db.execute(
+            select(Unit.id, Unit.property_id, Unit.owner_id).where(Unit.id.in_(missing))
+        )
+        for unit_id, property_id, owner_id in rows:
+            owner = UnitOwner(property_id, owner_id)
+            ownership_cache.set(unit_id, owner)
+            found[unit_id] = owner
+
+    return found
+
+def unit_owner(db: Session, unit_id: str):
+    """UnitOwner de una unidad, o None si no existe."""
+    return unit_owners(db, [unit_id]).get(unit_id)
+
+def owns_unit(db: Session, owner_id: str, unit_id: str) -> bool:
+    owner = unit_owner(db, unit_id)
+    return owner is not None and owner.owner_id == owner_id
+
+def owned_unit_ids(db: Session, owner_id: str, unit_ids) -> set:
+    """De los IDs recibidos, los que pertenecen al dueño (chequeo en lote para listas)."""
+    return {unit_id for unit_id, owner in unit_owners(db, unit_ids).items() if owner.owner_id == owner_id}
+
+# =======================
+# 2. INVALIDACIÓN AUTOMÁTICA
+# =======================
+# Una unidad que cambia de propiedad (o se borra) se invalida al confirmar la transacción.
+# Si cambia el dueño de una propiedad se copia en sus unidades (y demás tablas con owner_id)
+# y vaciamos toda la caché: es muy poco frecuente.
+# Los UPDATE masivos de unidades (crud/unit.py) no tocan property_id.
+def _stale_units(target):
+    return object_session(target).info.setdefault("stale_unit_owners", set())
+
+@event.listens_for(Unit, "after_update")
+def _unit_updated(mapper, connection, target):
+    if inspect(target).attrs.property_id.history.has_changes():
+        _stale_units(target).add(target.id)
+
+@event.listens_for(Unit, "after_delete")
+def _unit_deleted(mapper, connection, target):
+    _stale_units(target).add(target.id)
+
+def _sync_property_owner(connection, property_id: str, owner_id: str):
+    """
+    Copia el nuevo dueño de la propiedad en las tablas que lo tienen denormalizado
+    (unidades, contratos, pagos, rollups y tickets), en la misma transacción.
+    Así los permisos y listados que filtran por owner_id siguen la transferencia.
+    """
+    unit_ids = select(Unit.id).where(Unit.property_id == property_id)
+    contract_ids = select(Contract.id).where(Contract.unit_id.in_(unit_ids))
+    connection.execute(update(Unit).where(Unit.property_id == property_id).values(owner_id=owner_id))
+    connection.execute(update(Contract).where(Contract.unit_id.in_(unit_ids)).values(owner_id=owner_id))
+    connection.execute(update(Payment).where(Payment.contract_id.in_(contract_ids)).values(owner_id=owner_id))
+    connection.execute(
+        update(PaymentMonthlyRollup).where(PaymentMonthlyRollup.property_id == property_id).values(owner_id=owner_id)
+    )
+    connection.execute(
+        update(MaintenanceTicket).where(MaintenanceTicket.property_id == property_id).values(owner_id=owner_id)
+    )
+
+@event.listens_for(Property, "after_update")
+def _property_updated(mapper, connection, target):
+    history = inspect(target).attrs.owner_id.history
+    if history.has_changes():
+        _sync_property_owner(connection, target.id, target.owner_id)
+        info = object_session(target).info
+        info["stale_property_owners"] = True
+        # Dueños anterior y nuevo: sus paneles cambian
+        info.setdefault("changed_property_owners", set()).update([*history.deleted, target.owner_id])
+
+@event.listens_for(Property, "after_delete")
+def _property_deleted(mapper, connection, target):
+    object_session(target).info["stale_property_owners"] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stale_owners(session):
+    if session.info.pop("stale_property_owners", False):
+        ownership_cache.clear()
+    for owner_id in session.info.pop("changed_property_owners", ()):
+        invalidate_dashboard(owner_id)
+        invalidate_ticket_metrics(owner_id)
+    for unit_id in session.info.pop("stale_unit_owners", ()):
+        ownership_cache.invalidate(unit_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_owners(session):
+    session.info.pop("stale_property_owners", None)
+    session.info.pop("changed_property_owners", None)
+    session.info.pop("stale_unit_owners", None)
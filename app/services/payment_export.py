@@ -0,0 +1,64 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from app.database import SessionLocal
+
+# Filas por lote leídas del cursor del servidor (y escritas por bloque en la respuesta)
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 2000))
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+def _plain_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+def _iter_batches(stmt):
+    """
+    Ejecuta la consulta con su propia sesión (la del request ya se cerró cuando
+    empieza el streaming) y devuelve los resultados por lotes.
+    yield_per activa el cursor del servidor: en memoria solo hay un lote a la vez,
+    y como son columnas (no objetos ORM) nada queda en el identity map.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        columns = list(result.keys())
+        yield columns
+        for batch in result.partitions():
+            yield batch
+    finally:
+        db.close()
+
+def iter_csv(stmt):
+    batches = _iter_batches(stmt)
+    columns = next(batches)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_plain_value(value) for value in row] for row in batch)
+        yield buffer.getvalue()
+
+def iter_ndjson(stmt):
+    batches = _iter_batches(stmt)
+    columns = next(batches)
+    for batch in batches:
+        yield "".join(
+            json.dumps({col: _plain_value(value) for col, value in zip(columns, row)}) + "\n"
+            for row in batch
+        )
+
+def stream_rows(stmt, file_format: str):
+    return iter_csv(stmt) if file_format == "csv" else iter_ndjson(stmt)
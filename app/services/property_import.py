@@ -0,0 +1,198 @@
+import csv
+import io
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models import Property, Unit
+from app.schemas.property import PropertyBase, UnitCreate, PropertyImportReport, ImportRowError
+from app.services.geo import index_property_locations
+from app.services.search import index_properties_text
+
+# Filas por transacción (cada bloque es un executemany de propiedades + uno de unidades)
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 2000))
+# Máximo de errores detallados en el reporte (el resto solo se cuenta)
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+
+# Columnas del archivo -> campos de los schemas existentes
+PROPERTY_FIELDS = {
+    "property_name": "name",
+    "property_type": "type",
+    "address": "address",
+    "city": "city",
+    "description": "description",
+    "amenities": "amenities",
+    "latitude": "latitude",
+    "longitude": "longitude",
+}
+UNIT_FIELDS = {
+    "unit_number": "unit_number",
+    "unit_type": "type",
+    "floor": "floor",
+    "bedrooms": "bedrooms",
+    "bathrooms": "bathrooms",
+    "area_m2": "area_m2",
+    "base_price": "base_price",
+    "status": "status",
+}
+
+# =======================
+# 1. LECTURA EN STREAMING
+# =======================
+def iter_rows(file, file_format: str):
+    """
+    Lee el archivo fila por fila (sin cargarlo completo en memoria).
+    Produce tuplas (numero_de_fila, dict) o (numero_de_fila, Exception) si la fila no se pudo leer.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+    if file_format == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            # En CSV las celdas vacías significan "sin valor"
+            yield reader.line_num, {k: (v if v != "" else None) for k, v in row.items() if k}
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+            continue
+        # JSON válido pero no un objeto (ej: [1, 2], "x", 5): no tiene columnas
+        if not isinstance(value, dict):
+            yield line_number, ValueError(f"se esperaba un objeto JSON, llegó {type(value).__name__}")
+            continue
+        yield line_number, value
+
+def detect_format(filename: str, requested: str = None) -> str:
+    if requested:
+        return requested.lower()
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+def _pick(row: dict, mapping: dict) -> dict:
+    return {field: row[column] for column, field in mapping.items() if row.get(column) is not None}
+
+def _format_errors(error: ValidationError):
+    return [f"{'.'.join(str(loc) for loc in e['loc'])}: {e['msg']}" for e in error.errors()]
+
+# =======================
+# 2. IMPORTACIÓN POR BLOQUES
+# =======================
+def import_properties(db: Session, rows, owner_id: str) -> PropertyImportReport:
+    """
+    Valida cada fila con PropertyBase/UnitCreate y escribe en bloques con executemany.
+    Las filas con la misma (property_name, address) se agrupan en una sola propiedad;
+    si el dueño ya tiene una propiedad con ese nombre y dirección, las unidades se agregan a ella.
+    """
+    report = PropertyImportReport()
+
+    # Propiedades existentes del dueño (solo las columnas necesarias)
+    known = {
+        (name, address): property_id
+        for property_id, name, address in db.query(Property.id, Property.name, Property.address).filter(
+            Property.owner_id == owner_id, Property.is_deleted == False
+        )
+    }
+
+    pending_properties = []
+    pending_units = []
+    pending_rows = []
+
+    def add_error(row_number, messages):
+        report.rows_failed += 1
+        if len(report.errors) < IMPORT_MAX_ERRORS:
+            report.errors.append(ImportRowError(row=row_number, errors=messages))
+
+    def flush():
+        if not pending_units and not pending_properties:
+            return
+        try:
+            if pending_properties:
+                db.execute(insert(Property), pending_properties)
+                index_property_locations(db, pending_properties)
+            if pending_units:
+                db.execute(insert(Unit), pending_units)
+            index_properties_text(db, [u["property_id"] for u in pending_units])
+            db.commit()
+            report.properties_created += len(pending_properties)
+            report.units_created += len(pending_units)
+        except Exception as e:
+            db.rollback()
+            # Las propiedades del bloque no quedaron guardadas
+            for prop in pending_properties:
+                known.pop((prop["name"], prop["address"]), None)
+            for row_number in pending_rows:
+                add_error(row_number, [f"Error al guardar el bloque: {str(e)}"])
+        pending_properties.clear()
+        pending_units.clear()
+        pending_rows.clear()
+
+    for row_number, row in rows:
+        report.rows_processed += 1
+        if isinstance(row, Exception):
+            add_error(row_number, [f"Fila ilegible: {str(row)}"])
+            continue
+
+        try:
+            property_data = _pick(row, PROPERTY_FIELDS)
+            if isinstance(property_data.get("amenities"), str):
+                property_data["amenities"] = json.loads(property_data["amenities"])
+            prop = PropertyBase(**property_data)
+            unit = UnitCreate(**_pick(row, UNIT_FIELDS))
+        except ValidationError as e:
+            add_error(row_number, _format_errors(e))
+            continue
+        except ValueError as e:
+            add_error(row_number, [f"amenities: {str(e)}"])
+            continue
+
+        key = (prop.name, prop.address)
+        property_id = known.get(key)
+        if property_id is None:
+            property_id = str(uuid.uuid4())
+            known[key] = property_id
+            pending_properties.append({
+                "id": property_id,
+                "owner_id": owner_id,
+                "name": prop.name,
+                "type": prop.type,
+                "address": prop.address,
+                "city": prop.city,
+                "description": prop.description,
+                "amenities": prop.amenities,
+                "latitude": float(prop.latitude) if prop.latitude is not None else None,
+                "longitude": float(prop.longitude) if prop.longitude is not None else None,
+                "is_deleted": False,
+                # Explícito (no server_default): el cursor del listado compara con la misma precisión
+                "created_at": datetime.now(timezone.utc),
+            })
+
+        pending_units.append({
+            "id": str(uuid.uuid4()),
+            "property_id": property_id,
+            "owner_id": owner_id,
+            "unit_number": unit.unit_number,
+            "type": unit.type,
+            "floor": unit.floor,
+            "bedrooms": unit.bedrooms,
+            "bathrooms": float(unit.bathrooms),
+            "area_m2": float(unit.area_m2) if unit.area_m2 is not None else None,
+            "base_price": float(unit.base_price),
+            "status": unit.status,
+        })
+        pending_rows.append(row_number)
+
+        if len(pending_units) >= IMPORT_CHUNK_SIZE:
+            flush()
+
+    flush()
+    return report
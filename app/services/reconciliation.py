@@ -0,0 +1,374 @@
+import csv
+import hashlib
+import io
+import re
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import case, delete, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import Contract, ContractStatus, Payment, PaymentReviewItem, Unit, User
+from app.schemas.payment import ReconciliationReport, StatementLineError
+from app.services.finance import BALANCE_TOLERANCE, record_payments_in_rollup
+from app.services.search import fold, tokenize
+
+# Encabezados aceptados en el CSV del banco (ya sin tildes y en minúsculas)
+CSV_COLUMNS = {
+    "date": ("date", "fecha", "fecha_transaccion", "fecha transaccion", "posted"),
+    "amount": ("amount", "monto", "valor", "importe", "credito"),
+    "reference": ("reference", "referencia", "ref", "documento"),
+    "payer_name": ("name", "payer", "payer_name", "nombre", "ordenante"),
+    "description": ("description", "descripcion", "concepto", "memo", "detalle"),
+    "fitid": ("id", "fitid", "transaction_id", "numero"),
+}
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%Y%m%d")
+# Longitud del código de referencia que el inquilino pone en la transferencia (inicio del ID del contrato)
+REFERENCE_CODE_LENGTH = 8
+
+# =======================
+# 1. LECTURA DEL EXTRACTO
+# =======================
+def parse_amount(raw: str) -> float:
+    """Acepta '1.234,56', '1,234.56', '$ 450' y '-20.00'."""
+    text = re.sub(r"[^\d,.\-]", "", raw or "")
+    if "," in text and "." in text:
+        # El último separador es el decimal
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    elif "," in text:
+        decimals = text.rsplit(",", 1)[1]
+        text = text.replace(",", ".") if len(decimals) in (1, 2) else text.replace(",", "")
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Monto no reconocido: {raw}")
+
+def parse_date(raw: str):
+    if not raw:
+        return None
+    # Solo la parte de la fecha ('2026-10-05 14:30', '2026-10-05T14:30:00')
+    day = raw.strip().split(" ")[0].split("T")[0]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(day, fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha no reconocida: {raw}")
+
+def _statement_line(fields: dict) -> dict:
+    return {
+        "date": parse_date(fields.get("date")),
+        "amount": parse_amount(fields.get("amount")),
+        "reference": (fields.get("reference") or "").strip() or None,
+        "payer_name": (fields.get("payer_name") or "").strip() or None,
+        "description": (fields.get("description") or "").strip() or None,
+        "fitid": (fields.get("fitid") or "").strip() or None,
+    }
+
+def _iter_csv(text):
+    reader = csv.DictReader(text)
+    columns = {}
+    for header in reader.fieldnames or []:
+        key = fold(header).strip()
+        for field, aliases in CSV_COLUMNS.items():
+            if key in aliases and field not in columns:
+                columns[field] = header
+    for row in reader:
+        try:
+            yield reader.line_num, _statement_line({field: row.get(header) for field, header in columns.items()})
+        except ValueError as e:
+            yield reader.line_num, e
+
+_OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.DOTALL | re.IGNORECASE)
+_OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+def _iter_ofx(text):
+    # OFX 1.x es SGML (etiquetas sin cerrar): leemos cada <STMTTRN> con expresiones regulares
+    content = text.read()
+    for number, block in enumerate(_OFX_TRANSACTION.findall(content), start=1):
+        tags = {tag.upper(): value.strip() for tag, value in _OFX_FIELD.findall(block)}
+        try:
+            yield number, _statement_line({
+                "date": (tags.get("DTPOSTED") or "")[:8],
+                "amount": tags.get("TRNAMT"),
+                "reference": tags.get("REFNUM") or tags.get("CHECKNUM"),
+                "payer_name": tags.get("NAME") or tags.get("PAYEE"),
+                "description": tags.get("MEMO"),
+                "fitid": tags.get("FITID"),
+            })
+        except ValueError as e:
+            yield number, e
+
+def iter_statement(file, file_format: str):
+    """
+    Líneas del extracto como (numero, dict) o (numero, Exception) si no se pudo leer.
+    Formatos: csv (encabezados en español o inglés) y ofx.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline="")
+    if file_format == "ofx":
+        return _iter_ofx(text)
+    return _iter_csv(text)
+
+def detect_statement_format(filename: str, requested: str = None) -> str:
+    if requested:
+        return requested.lower()
+    if filename and filename.lower().endswith((".ofx", ".qfx")):
+        return "ofx"
+    return "csv"
+
+# =======================
+# 2. ASOCIACIÓN LÍNEA -> CONTRATO
+# =======================
+class _Candidate:
+    __slots__ = ("id", "amount", "remaining", "property_id", "name_tokens", "reference_code")
+
+    def __init__(self, row):
+        self.id = row.id
+        self.amount = float(row.amount or 0)
+        self.remaining = float(row.balance or 0)
+        self.property_id = row.property_id
+        self.name_tokens = {t for t in tokenize(row.full_name or "") if len(t) >= 3}
+        self.reference_code = row.id[:REFERENCE_CODE_LENGTH].lower()
+
+    def name_matches(self, tokens: set) -> bool:
+        # Todos los nombres si tiene uno solo; al menos dos si tiene varios (orden libre)
+        found = len(self.name_tokens & tokens)
+        return found > 0 and found >= min(2, len(self.name_tokens))
+
+def _active_contracts(db: Session, owner_id: str):
+    """
+    Contratos activos del dueño con lo necesario para asociar (una sola consulta).
+    Bloquea sus filas hasta el commit (en orden de ID, sin deadlocks entre conciliaciones):
+    un pago o una conciliación simultánea espera y los saldos leídos siguen valiendo.
+    """
+    rows = db.execute(
+        select(Contract.id, Contract.amount, Contract.balance, Unit.property_id, User.full_name)
+        .join(Unit, Contract.unit_id == Unit.id)
+        .outerjoin(User, Contract.tenant_id == User.id)
+        .where(Contract.owner_id == owner_id, Contract.status == ContractStatus.active)
+        .order_by(Contract.id)
+        .with_for_update(of=Contract)
+    )
+    return [_Candidate(row) for row in rows]
+
+def match_line(line: dict, contracts):
+    """
+    Devuelve (contrato, None) si la línea se asocia a un único contrato,
+    o (sugerido_o_None, motivo) si debe ir a revisión.
+    Orden: código de referencia (inicio del ID del contrato) -> nombre del inquilino -> monto.
+    """
+    text = fold(" ".join(filter(None, [line["reference"], line["payer_name"], line["description"]])))
+    tokens = set(tokenize(text))
+    amount = line["amount"]
+
+    def same_amount(candidates):
+        return [c for c in candidates if abs(c.amount - amount) <= 0.01]
+
+    by_reference = [c for c in contracts if c.reference_code in tokens or c.id in text]
+    if len(by_reference) == 1:
+        return by_reference[0], None
+    if len(by_reference) > 1:
+        return None, "La referencia coincide con varios contratos"
+
+    by_name = [c for c in contracts if c.name_tokens and c.name_matches(tokens)]
+    if len(by_name) == 1:
+        return by_name[0], None
+    if len(by_name) > 1:
+        by_amount = same_amount(by_name)
+        if len(by_amount) == 1:
+            return by_amount[0], None
+        return None, "El nombre coincide con varios contratos"
+
+    by_amount = same_amount(contracts)
+    suggested = by_amount[0] if len(by_amount) == 1 else None
+    return suggested, "Sin coincidencia por referencia ni por nombre"
+
+def _line_key(line: dict, seen: dict) -> str:
+    """Clave estable de la línea: FITID del banco o hash de sus datos (+ n° de repetición)."""
+    if line["fitid"]:
+        base = f"bank:{line['fitid']}"
+    else:
+        raw = "|".join(str(line[k] or "") for k in ("date", "amount", "reference", "payer_name", "description"))
+        base = "bank:" + hashlib.sha1(raw.encode()).hexdigest()[:32]
+    seen[base] = seen.get(base, 0) + 1
+    return base if seen[base] == 1 else f"{base}:{seen[base]}"
+
+def _insert_new(db: Session, model, unique_columns, rows, returning):
+    """
+    INSERT múltiple que omite las filas cuya clave única ya existe (otra conciliación
+    simultánea del mismo extracto las registró primero). Devuelve los 'returning' insertados.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_new = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert_new(model).on_conflict_do_nothing(index_elements=unique_columns).returning(returning)
+        return set(db.scalars(stmt, rows))
+
+    # Otros motores: fila por fila, cada una en su savepoint
+    inserted = set()
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(model), row)
+        except IntegrityError:
+            continue
+        inserted.add(row[returning.key])
+    return inserted
+
+# =======================
+# 3. CONCILIACIÓN EN BLOQUE
+# =======================
+def reconcile_statement(db: Session, lines, owner_id: str) -> ReconciliationReport:
+    """
+    Asocia cada línea (crédito) a un contrato activo del dueño y registra todos los pagos
+    en una sola transacción: un INSERT múltiple de pagos, un UPDATE condicional de saldos
+    por conjunto (CASE por contrato), un upsert del rollup y un INSERT de la cola de revisión.
+    Reimportar el mismo extracto no duplica pagos (clave de idempotencia por línea), aunque
+    las dos importaciones corran al mismo tiempo.
+    """
+    report = ReconciliationReport()
+
+    # 1. Leer el extracto y calcular la clave de cada línea (créditos únicamente)
+    credits = []
+    seen_keys = {}
+    for number, line in lines:
+        report.lines_processed += 1
+        if isinstance(line, Exception):
+            report.errors.append(StatementLineError(line=number, error=str(line)))
+            continue
+        if line["amount"] <= 0:
+            report.debits_ignored += 1
+            continue
+        credits.append((_line_key(line, seen_keys), line))
+
+    # 2. Líneas ya registradas o ya en revisión (reimportación del mismo extracto)
+    keys = [key for key, _ in credits]
+    posted_keys, queued_keys = set(), set()
+    if keys:
+        # Solo pagos del dueño: otro dueño puede tener la misma línea de banco (ix_payments_owner_idempotency)
+        posted_keys = set(db.scalars(
+            select(Payment.idempotency_key).where(
+                Payment.owner_id == owner_id,
+                Payment.idempotency_key.in_(keys)
+            )
+        ))
+        queued_keys = set(db.scalars(
+            select(PaymentReviewItem.line_key).where(
+                PaymentReviewItem.owner_id == owner_id,
+                PaymentReviewItem.line_key.in_(keys)
+            )
+        ))
+
+    # 3. Asociar en memoria contra los contratos activos (una sola consulta)
+    contracts = _active_contracts(db, owner_id) if credits else []
+    matched = []   # (clave, línea, contrato)
+    review = []    # (clave, línea, sugerido, motivo)
+    for key, line in credits:
+        if key in posted_keys:
+            report.already_posted += 1
+            continue
+        if key in queued_keys:
+            continue
+
+        contract, reason = match_line(line, contracts)
+        if reason is None:
+            if contract.remaining <= 0:
+                reason = "El contrato ya está pagado en su totalidad"
+            elif line["amount"] > contract.remaining + BALANCE_TOLERANCE:
+                reason = "El monto excede la deuda del contrato"
+        if reason is not None:
+            review.append((key, line, contract, reason))
+            continue
+        contract.remaining -= line["amount"]
+        matched.append((key, line, contract))
+
+    # 4. Pagos + saldos + rollup
+    now = datetime.now(timezone.utc)
+    payment_rows = []
+    for key, line, contract in matched:
+        payment_rows.append({
+            "id": str(uuid.uuid4()),
+            "contract_id": contract.id,
+            "owner_id": owner_id,
+            "amount": line["amount"],
+            "payment_date": line["date"] or now,
+            "payment_method": "Transferencia",
+            "notes": "Conciliación bancaria: " + " / ".join(filter(None, [line["reference"], line["payer_name"], line["description"]])),
+            "idempotency_key": key,
+        })
+
+    if payment_rows:
+        inserted = _insert_new(
+            db, Payment, [Payment.contract_id, Payment.idempotency_key], payment_rows, Payment.id
+        )
+        report.already_posted += len(payment_rows) - len(inserted)
+        posted = [(row, line, contract) for row, (_, line, contract) in zip(payment_rows, matched) if row["id"] in inserted]
+
+        totals = {}
+        for row, _, contract in posted:
+            totals[contract.id] = totals.get(contract.id, 0.0) + row["amount"]
+
+        # Un solo UPDATE para todos los contratos, condicionado al saldo actual de cada fila
+        # (igual que create_payment): si no alcanza, el contrato no se toca
+        deduction = case(totals, value=Contract.id, else_=0.0)
+        new_balance = Contract.balance - deduction
+        applied = set(db.scalars(
+            update(Contract)
+            .where(
+                Contract.id.in_(list(totals)),
+                Contract.balance > 0,
+                Contract.balance + BALANCE_TOLERANCE >= deduction
+            )
+            .values(balance=case((new_balance <= BALANCE_TOLERANCE, 0.0), else_=new_balance))
+            .returning(Contract.id)
+            .execution_options(synchronize_session=False)
+        )) if totals else set()
+
+        # Contratos cuyo saldo cambió desde la lectura: sus pagos se retiran y las líneas van a revisión
+        rejected = [(row, line, contract) for row, line, contract in posted if contract.id not in applied]
+        if rejected:
+            db.execute(
+                delete(Payment).where(Payment.id.in_([row["id"] for row, _, _ in rejected]))
+                .execution_options(synchronize_session=False)
+            )
+            review += [
+                (row["idempotency_key"], line, contract, "El saldo del contrato cambió durante la conciliación")
+                for row, line, contract in rejected
+            ]
+        posted = [item for item in posted if item[2].id in applied]
+
+        record_payments_in_rollup(db, [
+            (contract.property_id, owner_id, row["amount"], row["payment_date"]) for row, _, contract in posted
+        ])
+        report.payments_created = len(posted)
+        report.amount_posted = round(sum(row["amount"] for row, _, _ in posted), 2)
+
+    # 5. Cola de revisión
+    review_rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "owner_id": owner_id,
+            "line_key": key,
+            "transaction_date": line["date"],
+            "amount": line["amount"],
+            "reference": line["reference"],
+            "payer_name": line["payer_name"],
+            "description": line["description"],
+            "reason": reason,
+            "suggested_contract_id": suggested.id if suggested else None,
+            # Explícito (no server_default): el cursor de /payments/review-queue compara con la misma precisión
+            "created_at": now,
+        }
+        for key, line, suggested, reason in review
+    ]
+    if review_rows:
+        queued = _insert_new(
+            db, PaymentReviewItem, [PaymentReviewItem.owner_id, PaymentReviewItem.line_key], review_rows, PaymentReviewItem.id
+        )
+        report.queued_for_review = len(queued)
+
+    db.commit()
+    return report
@@ -0,0 +1,126 @@
+import re
+import unicodedata
+from sqlalchemy import delete, func, insert, literal, literal_column, or_, select, union_all
+from sqlalchemy.orm import Session, selectinload
+from app.models import Property, PropertySearchDocument, PropertySearchTerm
+
+# Sufijos del español (de más largo a más corto) para el stemmer liviano del modo sin PostgreSQL
+SPANISH_SUFFIXES = [
+    "amientos", "imientos", "aciones", "uciones", "amiento", "imiento", "idades",
+    "adoras", "adores", "ancias", "mente", "acion", "ucion", "adora", "ancia",
+    "ables", "ibles", "istas", "idad", "ador", "able", "ible", "ista", "ivas", "ivos",
+    "osos", "osas", "ados", "adas", "idos", "idas", "oso", "osa", "iva", "ivo",
+    "ado", "ada", "ido", "ida", "es", "os", "as", "s", "o", "a", "e",
+]
+MIN_STEM_LENGTH = 3
+
+def fold(text: str) -> str:
+    """Minúsculas y sin tildes ('Amoblado, Baño' -> 'amoblado, bano')."""
+    normalized = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in normalized if not unicodedata.combining(ch)).lower()
+
+def tokenize(text: str):
+    return re.findall(r"[a-z0-9]+", fold(text))
+
+def stem(word: str) -> str:
+    for suffix in SPANISH_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+# =======================
+# 1. MANTENIMIENTO DEL ÍNDICE
+# =======================
+def _document_text(prop: Property) -> str:
+    parts = [prop.name, prop.description, prop.address, prop.city]
+    if prop.type:
+        parts.append(prop.type.value)
+
+    # Amenities: las claves activas ({"parqueadero": true}) y los valores de texto
+    for key, value in (prop.amenities or {}).items():
+        if value:
+            parts.append(str(key).replace("_", " "))
+        if isinstance(value, str):
+            parts.append(value)
+
+    for unit in prop.units:
+        parts.append(unit.unit_number)
+        if unit.type:
+            parts.append(unit.type.value)
+
+    return fold(" ".join(p for p in parts if p))
+
+def index_properties_text(db: Session, property_ids):
+    """
+    Recalcula el documento de búsqueda de las propiedades indicadas (no hace commit).
+    Se llama al crear propiedades, importar unidades o editar unidades.
+    """
+    property_ids = list(set(property_ids))
+    if not property_ids:
+        return
+
+    # La sesión no usa autoflush: enviamos los cambios pendientes antes de leer
+    db.flush()
+
+    properties = db.query(Property)\
+        .options(selectinload(Property.units))\
+        .filter(Property.id.in_(property_ids)).all()
+
+    documents = [{"property_id": p.id, "content": _document_text(p)} for p in properties]
+
+    db.execute(delete(PropertySearchDocument).where(PropertySearchDocument.property_id.in_(property_ids)))
+    if documents:
+        db.execute(insert(PropertySearchDocument), documents)
+
+    # Sin PostgreSQL mantenemos el índice invertido (palabra completa + su raíz)
+    if not _is_postgres(db):
+        db.execute(delete(PropertySearchTerm).where(PropertySearchTerm.property_id.in_(property_ids)))
+        terms = []
+        for doc in documents:
+            words = set(tokenize(doc["content"]))
+            for term in words | {stem(w) for w in words}:
+                terms.append({"term": term, "property_id": doc["property_id"]})
+        if terms:
+            db.execute(insert(PropertySearchTerm), terms)
+
+# =======================
+# 2. BÚSQUEDA
+# =======================
+def search_properties(db: Session, query_text: str, limit: int = 20):
+    """
+    Propiedades cuyo texto contiene TODAS las palabras buscadas (con prefijo),
+    ordenadas por relevancia. Devuelve lista de (Property, rank).
+    """
+    words = tokenize(query_text)
+    if not words:
+        return []
+
+    if _is_postgres(db):
+        # 'parqueadero amobl' -> 'parqueadero:* & amobl:*' (stemming español de PostgreSQL)
+        ts_query = func.to_tsquery("spanish", " & ".join(f"{w}:*" for w in words))
+        vector = literal_column("property_search_documents.search_vector")
+        rank = func.ts_rank(vector, ts_query).label("rank")
+        matches = select(PropertySearchDocument.property_id, rank)\
+            .where(vector.op("@@")(ts_query))\
+            .subquery()
+    else:
+        per_word = [
+            select(PropertySearchTerm.property_id, literal(i).label("word"))
+            .where(or_(PropertySearchTerm.term.like(f"{w}%"), PropertySearchTerm.term.like(f"{stem(w)}%")))
+            for i, w in enumerate(words)
+        ]
+        hits = union_all(*per_word).subquery()
+        matches = select(hits.c.property_id, func.count().label("rank"))\
+            .group_by(hits.c.property_id)\
+            .having(func.count(func.distinct(hits.c.word)) == len(words))\
+            .subquery()
+
+    return db.query(Property, matches.c.rank)\
+        .join(matches, matches.c.property_id == Property.id)\
+        .options(selectinload(Property.units))\
+        .filter(Property.is_deleted == False)\
+        .order_by(matches.c.rank.desc(), Property.id)\
+        .limit(limit).all()
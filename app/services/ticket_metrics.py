@@ -0,0 +1,228 @@
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+from app.models import MaintenanceTicket, Property, TicketStatus
+from app.services.cache import TTLCache
+
+PERCENTILES = (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+# Tramos de antigüedad de los tickets abiertos: (etiqueta, días mínimos)
+OPEN_AGE_BUCKETS = (("lt_1d", 0), ("1_3d", 1), ("3_7d", 3), ("7_30d", 7), ("30d_plus", 30))
+OPEN_STATUSES = (TicketStatus.pending, TicketStatus.in_progress)
+
+# Dueño -> {(days, weeks): métricas}. Se invalida al crear o cambiar de estado un ticket
+ticket_metrics_cache = TTLCache(
+    ttl_seconds=float(os.getenv("TICKET_METRICS_CACHE_TTL_SECONDS", 300)),
+    max_size=int(os.getenv("TICKET_METRICS_CACHE_MAX_SIZE", 1024)),
+)
+
+# =======================
+# 1. SKETCH DE CUANTILES (SQLite)
+# =======================
+class QuantileSketch:
+    """
+    Sketch de cuantiles en streaming con error relativo acotado (estilo DDSketch):
+    cada valor cae en un bucket logarítmico y solo se guardan los conteos por bucket.
+    Con accuracy=0.01 el cuantil estimado está a ±1% del real, sin guardar los valores.
+    """
+
+    def __init__(self, accuracy: float = 0.01):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def _value_at(self, rank: int):
+        """Valor aproximado del elemento en la posición 'rank' (0-based) del orden."""
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen > rank:
+                # Punto medio del bucket (gamma^(k-1), gamma^k]
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def quantile(self, q: float):
+        """Interpola entre posiciones vecinas, igual que percentile_cont."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        lower, upper = self._value_at(math.floor(rank)), self._value_at(math.ceil(rank))
+        return lower + (upper - lower) * (rank - math.floor(rank))
+
+# =======================
+# 2. TIEMPO DE RESOLUCIÓN
+# =======================
+def _hours_to_resolve(dialect: str):
+    # resolved_at es DateTime sin zona (UTC) y created_at tiene zona
+    if dialect == "postgresql":
+        return func.extract("epoch", func.timezone("UTC", MaintenanceTicket.resolved_at) - MaintenanceTicket.created_at) / 3600.0
+    return (func.julianday(MaintenanceTicket.resolved_at) - func.julianday(MaintenanceTicket.created_at)) * 24.0
+
+def _resolved_filter(owner_id: str, since: datetime):
+    return (
+        MaintenanceTicket.owner_id == owner_id,
+        MaintenanceTicket.status == TicketStatus.resolved,
+        MaintenanceTicket.resolved_at.isnot(None),
+        MaintenanceTicket.resolved_at >= since.replace(tzinfo=None),
+    )
+
+def _summary(count, values):
+    return {"count": int(count or 0), **{name: (round(float(v), 2) if v is not None else None) for (name, _), v in zip(PERCENTILES, values)}}
+
+def _resolution_percentile_cont(db: Session, owner_id: str, since: datetime):
+    """PostgreSQL: percentile_cont en la base de datos (general, por prioridad y por propiedad)."""
+    hours = _hours_to_resolve("postgresql")
+    aggregates = [func.count(MaintenanceTicket.id)] + [
+        func.percentile_cont(q).within_group(hours) for _, q in PERCENTILES
+    ]
+    where = _resolved_filter(owner_id, since)
+
+    overall = db.execute(select(*aggregates).where(*where)).one()
+    by_priority = db.execute(
+        select(MaintenanceTicket.priority, *aggregates).where(*where).group_by(MaintenanceTicket.priority)
+    ).all()
+    by_property = db.execute(
+        select(MaintenanceTicket.property_id, Property.name, *aggregates)
+        .join(Property, MaintenanceTicket.property_id == Property.id)
+        .where(*where)
+        .group_by(MaintenanceTicket.property_id, Property.name)
+    ).all()
+
+    return {
+        "overall": _summary(overall[0], overall[1:]),
+        "by_priority": {row[0].value: _summary(row[1], row[2:]) for row in by_priority},
+        "by_property": [
+            {"property_id": row[0], "property_name": row[1], **_summary(row[2], row[3:])}
+            for row in by_property
+        ],
+    }
+
+def _resolution_sketch(db: Session, owner_id: str, since: datetime):
+    """Otros motores: se leen solo (prioridad, propiedad, horas) en streaming hacia sketches."""
+    hours = _hours_to_resolve(db.get_bind().dialect.name)
+    stmt = select(MaintenanceTicket.priority, MaintenanceTicket.property_id, hours)\
+        .where(*_resolved_filter(owner_id, since))\
+        .execution_options(yield_per=5000)
+
+    overall = QuantileSketch()
+    by_priority = {}
+    by_property = {}
+    for priority, property_id, value in db.execute(stmt):
+        value = max(float(value or 0), 0.0)
+        overall.add(value)
+        by_priority.setdefault(priority.value, QuantileSketch()).add(value)
+        by_property.setdefault(property_id, QuantileSketch()).add(value)
+
+    def summary(sketch):
+        return _summary(sketch.count, [sketch.quantile(q) for _, q in PERCENTILES])
+
+    names = {}
+    if by_property:
+        names = dict(db.execute(select(Property.id, Property.name).where(Property.id.in_(list(by_property)))).all())
+    return {
+        "overall": summary(overall),
+        "by_priority": {priority: summary(sketch) for priority, sketch in by_priority.items()},
+        "by_property": [
+            {"property_id": property_id, "property_name": names.get(property_id), **summary(sketch)}
+            for property_id, sketch in by_property.items()
+        ],
+    }
+
+# =======================
+# 3. ANTIGÜEDAD DE ABIERTOS Y TENDENCIA DEL BACKLOG
+# =======================
+def _open_age_distribution(db: Session, owner_id: str, now: datetime):
+    """Conteo de tickets abiertos por prioridad y tramo de antigüedad (GROUP BY en la base)."""
+    limits = [now - timedelta(days=days) for _, days in OPEN_AGE_BUCKETS]
+    bucket_columns = []
+    for i, (name, _) in enumerate(OPEN_AGE_BUCKETS):
+        newer_than_next = MaintenanceTicket.created_at > limits[i + 1] if i + 1 < len(limits) else True
+        condition = (MaintenanceTicket.created_at <= limits[i]) & newer_than_next if i else newer_than_next
+        bucket_columns.append(func.count(case((condition, MaintenanceTicket.id))).label(name))
+
+    rows = db.execute(
+        select(MaintenanceTicket.priority, *bucket_columns)
+        .where(MaintenanceTicket.owner_id == owner_id, MaintenanceTicket.status.in_(OPEN_STATUSES))
+        .group_by(MaintenanceTicket.priority)
+    ).all()
+
+    names = [name for name, _ in OPEN_AGE_BUCKETS]
+    by_priority = {row[0].value: dict(zip(names, row[1:])) for row in rows}
+    total = {name: sum(counts[name] for counts in by_priority.values()) for name in names}
+    return {"by_priority": by_priority, "total": total}
+
+def _backlog_trend(db: Session, owner_id: str, now: datetime, weeks: int):
+    """
+    Por semana: tickets creados, resueltos y abiertos al cierre. Una sola consulta con
+    conteos condicionales por semana. Los cancelados no cuentan (no guardan fecha de cierre).
+    """
+    ticket = MaintenanceTicket
+    week_ends = [now - timedelta(weeks=weeks - 1 - i) for i in range(weeks)]
+    columns = []
+    for i, end in enumerate(week_ends):
+        start = end - timedelta(weeks=1)
+        end_naive, start_naive = end.replace(tzinfo=None), start.replace(tzinfo=None)
+        columns += [
+            func.count(case(((ticket.created_at > start) & (ticket.created_at <= end), ticket.id))),
+            func.count(case(((ticket.resolved_at > start_naive) & (ticket.resolved_at <= end_naive), ticket.id))),
+            func.count(case((
+                (ticket.created_at <= end) & (ticket.resolved_at.is_(None) | (ticket.resolved_at > end_naive)),
+                ticket.id
+            ))),
+        ]
+
+    row = db.execute(
+        select(*columns).where(ticket.owner_id == owner_id, ticket.status != TicketStatus.cancelled)
+    ).one()
+    return [
+        {
+            "week_start": (end - timedelta(weeks=1)).date(),
+            "created": row[3 * i],
+            "resolved": row[3 * i + 1],
+            "open_at_end": row[3 * i + 2],
+        }
+        for i, end in enumerate(week_ends)
+    ]
+
+# =======================
+# 4. REPORTE
+# =======================
+def ticket_metrics(db: Session, owner_id: str, days: int = 90, weeks: int = 12):
+    """Métricas de mantenimiento del dueño (cacheadas por dueño y parámetros)."""
+    cached = ticket_metrics_cache.get(owner_id) or {}
+    if (days, weeks) in cached:
+        return cached[(days, weeks)]
+
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(days=days)
+    if db.get_bind().dialect.name == "postgresql":
+        resolution, method = _resolution_percentile_cont(db, owner_id, since), "percentile_cont"
+    else:
+        resolution, method = _resolution_sketch(db, owner_id, since), "quantile_sketch"
+
+    metrics = {
+        "generated_at": now,
+        "window_days": days,
+        "method": method,
+        "resolution_hours": resolution,
+        "open_age": _open_age_distribution(db, owner_id, now),
+        "backlog_trend": _backlog_trend(db, owner_id, now, weeks),
+    }
+    ticket_metrics_cache.set(owner_id, {**cached, (days, weeks): metrics})
+    return metrics
+
+def invalidate_ticket_metrics(owner_id: str):
+    ticket_metrics_cache.invalidate(owner_id)
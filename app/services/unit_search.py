@@ -0,0 +1,98 @@
+from sqlalchemy import String, case, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session
+from app.models import Property, Unit
+from app.pagination import decode_cursor, encode_cursor, keyset_after
+
+# Rangos de precio para la faceta 'price' (límite inferior inclusivo)
+PRICE_BUCKETS = [(0, 200), (200, 400), (400, 600), (600, 1000), (1000, None)]
+
+def _price_bucket():
+    whens = []
+    for low, high in PRICE_BUCKETS:
+        label = f"{low}-{high}" if high is not None else f"{low}+"
+        condition = Unit.base_price >= low if high is None else Unit.base_price.between(low, high - 0.000001)
+        whens.append((condition, label))
+    return case(*whens, else_=None)
+
+# Columna de cada faceta y cómo filtrarla
+FACETS = {
+    "city": (Property.city, lambda value: Property.city == value),
+    "type": (cast(Unit.type, String), lambda value: Unit.type == value),
+    "bedrooms": (cast(Unit.bedrooms, String), lambda value: Unit.bedrooms == value),
+    "bathrooms": (cast(Unit.bathrooms, String), lambda value: Unit.bathrooms == value),
+    "status": (cast(Unit.status, String), lambda value: Unit.status == value),
+}
+
+def _filters(params: dict, skip: str = None):
+    """Condiciones de todos los filtros activos, excepto el de la faceta 'skip'."""
+    conditions = [Property.is_deleted == False]
+    for name, (_, build) in FACETS.items():
+        if name != skip and params.get(name) is not None:
+            conditions.append(build(params[name]))
+    if skip != "price":
+        if params.get("min_price") is not None:
+            conditions.append(Unit.base_price >= params["min_price"])
+        if params.get("max_price") is not None:
+            conditions.append(Unit.base_price <= params["max_price"])
+    return conditions
+
+def _base(*columns):
+    return select(*columns).select_from(Unit).join(Property, Unit.property_id == Property.id)
+
+def facet_counts(db: Session, params: dict) -> dict:
+    """
+    Conteos por faceta con un GROUP BY por faceta, todos en una sola consulta (UNION ALL).
+    Cada faceta ignora su propio filtro para mostrar las alternativas disponibles.
+    """
+    selects = []
+    for name, (column, _) in FACETS.items():
+        selects.append(
+            _base(literal(name).label("facet"), column.label("value"), func.count().label("total"))
+            .where(*_filters(params, skip=name))
+            .group_by(column)
+        )
+    price = _price_bucket()
+    selects.append(
+        _base(literal("price").label("facet"), price.label("value"), func.count().label("total"))
+        .where(*_filters(params, skip="price"))
+        .group_by(price)
+    )
+
+    facets = {name: [] for name in list(FACETS) + ["price"]}
+    for facet, value, total in db.execute(union_all(*selects)):
+        facets[facet].append({"value": value, "count": total})
+    for values in facets.values():
+        values.sort(key=lambda item: -item["count"])
+    return facets
+
+def search_units(db: Session, params: dict, limit: int = 20, cursor: str = None):
+    """Página de unidades que cumplen todos los filtros, ordenadas por (base_price, id)."""
+    query = _base(Unit, Property.name, Property.city, Property.address).where(*_filters(params))
+    if cursor:
+        price, unit_id = decode_cursor(cursor, (float, str))
+        query = query.where(keyset_after([(Unit.base_price, price, False), (Unit.id, unit_id, False)]))
+    rows = db.execute(query.order_by(Unit.base_price, Unit.id).limit(limit)).all()
+
+    items = []
+    for unit, property_name, city, address in rows:
+        items.append({
+            "id": unit.id,
+            "property_id": unit.property_id,
+            "unit_number": unit.unit_number,
+            "type": unit.type,
+            "floor": unit.floor,
+            "bedrooms": unit.bedrooms,
+            "bathrooms": unit.bathrooms,
+            "area_m2": unit.area_m2,
+            "base_price": unit.base_price,
+            "status": unit.status,
+            "property_name": property_name,
+            "city": city,
+            "address": address,
+        })
+
+    next_cursor = None
+    if len(rows) >= limit:
+        last = rows[-1][0]
+        next_cursor = encode_cursor(last.base_price, last.id)
+    return items, next_cursor
@@ -0,0 +1,37 @@
+# bench_aging_report.py
+# Mide el cálculo del reporte de antigüedad de deuda (app/services/aging.py) con contratos sintéticos.
+# Uso: python bench_aging_report.py [cantidad_de_contratos]   (por defecto 100000)
+import sys
+import time
+from datetime import date
+import numpy as np
+from app.services.aging import compute_aging
+
+def synthetic_contracts(count: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2024-01-01") + rng.integers(0, 900, count).astype("timedelta64[D]")
+    months = rng.integers(6, 25, count)
+    amount = rng.integers(150, 900, count).astype(np.float64)
+    total = amount * months
+    paid = total * rng.uniform(0, 1, count)
+    return {
+        "start": start.astype("datetime64[us]"),
+        "end": (start + (months * 30).astype("timedelta64[D]")).astype("datetime64[us]"),
+        "amount": amount,
+        "payment_day": rng.integers(1, 31, count),
+        "total": total,
+        "balance": total - paid,
+    }
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+columns = synthetic_contracts(count)
+
+compute_aging(columns, date.today())  # Calentamiento
+runs = []
+for _ in range(5):
+    start = time.perf_counter()
+    buckets = compute_aging(columns, date.today())
+    runs.append((time.perf_counter() - start) * 1000)
+
+print(f"🚀 {count} contratos: mejor={min(runs):.1f} ms   mediana={sorted(runs)[len(runs) // 2]:.1f} ms")
+print("   Totales: " + ", ".join(f"{name}={buckets[name].sum():,.2f}" for name in buckets))
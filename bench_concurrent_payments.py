@@ -0,0 +1,60 @@
+# bench_concurrent_payments.py
+# Prueba de carga de create_payment: muchos pagos simultáneos sobre el mismo contrato
+# y reintentos con la misma Idempotency-Key. Al final el saldo debe cuadrar exactamente.
+# Uso: python bench_concurrent_payments.py <contract_id>
+# Requiere: pip install httpx  |  Variables: BENCH_BASE_URL, BENCH_TOKEN (token del dueño o inquilino)
+import asyncio
+import os
+import sys
+import time
+import uuid
+import httpx
+
+BASE_URL = os.getenv("BENCH_BASE_URL", "http://127.0.0.1:8000")
+TOKEN = os.getenv("BENCH_TOKEN")
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", 50))
+PAYMENTS = int(os.getenv("BENCH_PAYMENTS", 200))
+RETRIES_PER_KEY = int(os.getenv("BENCH_RETRIES", 3))
+AMOUNT = float(os.getenv("BENCH_AMOUNT", 1))
+
+async def main():
+    if not TOKEN or len(sys.argv) < 2:
+        print("❌ Uso: BENCH_TOKEN=... python bench_concurrent_payments.py <contract_id>")
+        return
+    contract_id = sys.argv[1]
+
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=BASE_URL, headers=headers, limits=limits, timeout=60) as client:
+        before = (await client.get(f"/contracts/{contract_id}")).json()["balance"]
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        statuses = {}
+
+        async def pay(key):
+            async with semaphore:
+                response = await client.post(
+                    "/payments/",
+                    json={"contract_id": contract_id, "amount": AMOUNT, "payment_method": "Transferencia"},
+                    headers={"Idempotency-Key": key},
+                )
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        # Cada clave se envía varias veces a la vez (simula reintentos del cliente)
+        keys = [str(uuid.uuid4()) for _ in range(PAYMENTS)]
+        start = time.perf_counter()
+        await asyncio.gather(*(pay(key) for key in keys for _ in range(RETRIES_PER_KEY)))
+        elapsed = time.perf_counter() - start
+
+        after = (await client.get(f"/contracts/{contract_id}")).json()["balance"]
+        created = statuses.get(201, 0)
+        expected = max(round(before - created * AMOUNT, 2), 0.0)
+
+    print(f"🚀 {PAYMENTS * RETRIES_PER_KEY} peticiones en {elapsed:.1f}s ({PAYMENTS * RETRIES_PER_KEY / elapsed:.1f} req/s)")
+    print(f"   Respuestas: {statuses}")
+    print(f"   Saldo: {before} -> {after} (esperado {expected})")
+    if created > PAYMENTS or abs(after - expected) > 0.01:
+        print("❌ El saldo no cuadra con los pagos registrados")
+    else:
+        print("✅ Sin pagos duplicados ni actualizaciones perdidas")
+
+asyncio.run(main())
@@ -0,0 +1,54 @@
+# bench_db_modes.py
+# Compara el modo síncrono y el asíncrono de la base de datos.
+# 1. Levanta la API con DB_ASYNC_ENABLED=false y ejecuta:  python bench_db_modes.py sync
+# 2. Levanta la API con DB_ASYNC_ENABLED=true  y ejecuta:  python bench_db_modes.py async
+# Requiere: pip install httpx  |  Variables: BENCH_BASE_URL, BENCH_TOKEN (token de un landlord)
+import asyncio
+import os
+import statistics
+import sys
+import time
+import httpx
+
+BASE_URL = os.getenv("BENCH_BASE_URL", "http://127.0.0.1:8000")
+TOKEN = os.getenv("BENCH_TOKEN")
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", 100))
+REQUESTS_PER_ENDPOINT = int(os.getenv("BENCH_REQUESTS", 1000))
+ENDPOINTS = ["/contracts/", "/tickets/", "/payments/my-history", "/dashboard/stats"]
+
+async def run_endpoint(client: httpx.AsyncClient, path: str):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one_request():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(REQUESTS_PER_ENDPOINT)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"  {path:<22} {REQUESTS_PER_ENDPOINT / elapsed:8.1f} req/s   p50={statistics.median(latencies):7.1f} ms   p95={p95:7.1f} ms   errores={errors}")
+
+async def main():
+    mode = sys.argv[1] if len(sys.argv) > 1 else "?"
+    if not TOKEN:
+        print("❌ Define BENCH_TOKEN con el token de un usuario landlord")
+        return
+
+    print(f"🚀 Modo '{mode}' contra {BASE_URL} (concurrencia={CONCURRENCY}, peticiones={REQUESTS_PER_ENDPOINT})")
+    headers = {"Authorization": f"Bearer {TOKEN}"}
+    limits = httpx.Limits(max_connections=CONCURRENCY)
+    async with httpx.AsyncClient(base_url=BASE_URL, headers=headers, limits=limits, timeout=60) as client:
+        for path in ENDPOINTS:
+            await run_endpoint(client, path)
+
+asyncio.run(main())
@@ -0,0 +1,29 @@
+# bench_password_hashing.py
+# Mide cuántos logins (verificaciones bcrypt) por segundo soporta el servidor
+# según la cantidad de hilos del pool de hashing.
+# Uso: python bench_password_hashing.py [verificaciones_por_prueba]
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.auth_utils import pwd_context, BCRYPT_ROUNDS
+
+TOTAL = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+CORES = os.cpu_count() or 1
+
+print(f"🚀 Benchmark de hashing (bcrypt rounds={BCRYPT_ROUNDS}, núcleos={CORES}, verificaciones={TOTAL})")
+
+stored_hash = pwd_context.hash("ContraseñaDePrueba123")
+
+workers = 1
+while workers <= CORES * 2:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: pwd_context.verify("ContraseñaDePrueba123", stored_hash), range(TOTAL)))
+        elapsed = time.perf_counter() - start
+
+    assert all(results)
+    print(f"  hilos={workers:>3}  ->  {TOTAL / elapsed:8.1f} logins/s  (total {elapsed:6.2f} s)")
+    workers *= 2
+
+print("✅ Usa PASSWORD_HASH_WORKERS cerca del punto donde los logins/s dejan de crecer.")
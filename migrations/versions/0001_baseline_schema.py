@@ -0,0 +1,149 @@
+"""Esquema base (equivalente a lo que creaba create_all)
+
+Para una base de datos que ya existía (creada por create_all) no se debe
+recrear nada, solo marcar esta versión como aplicada:
+    alembic stamp 0001_baseline
+    alembic upgrade head
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_baseline"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+user_role = sa.Enum("admin", "user", "landlord", "tenant", name="userrole")
+property_type = sa.Enum("apartment", "house", "commercial", "building", name="propertytype")
+unit_type = sa.Enum("room", "studio", "apartment", "house", "store", name="unittype")
+unit_status = sa.Enum("vacant", "occupied", "maintenance", "available", name="unitstatus")
+ticket_priority = sa.Enum("low", "medium", "high", "emergency", name="ticketpriority")
+ticket_status = sa.Enum("pending", "in_progress", "resolved", "cancelled", name="ticketstatus")
+document_type = sa.Enum("cedula", "antecedentes", "buro_credito", "rol_pagos", "otro", name="documenttype")
+document_status = sa.Enum("pending", "verified", "rejected", name="documentstatus")
+contract_status = sa.Enum("pending", "signed_by_tenant", "active", "terminated", "rejected", name="contractstatus")
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String(), nullable=True),
+        sa.Column("phone_number", sa.String(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("role", user_role, nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("is_verified", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "properties",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("type", property_type, nullable=True),
+        sa.Column("address", sa.String(), nullable=True),
+        sa.Column("city", sa.String(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("amenities", sa.JSON(), nullable=True),
+        sa.Column("latitude", sa.Float(), nullable=True),
+        sa.Column("longitude", sa.Float(), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("owner_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_properties_id", "properties", ["id"])
+    op.create_index("ix_properties_name", "properties", ["name"])
+
+    op.create_table(
+        "units",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("unit_number", sa.String(), nullable=True),
+        sa.Column("type", unit_type, nullable=True),
+        sa.Column("floor", sa.Integer(), nullable=True),
+        sa.Column("bedrooms", sa.Integer(), nullable=True),
+        sa.Column("bathrooms", sa.Float(), nullable=True),
+        sa.Column("area_m2", sa.Float(), nullable=True),
+        sa.Column("base_price", sa.Float(), nullable=True),
+        sa.Column("status", unit_status, nullable=True),
+        sa.Column("property_id", sa.String(), sa.ForeignKey("properties.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_units_id", "units", ["id"])
+
+    op.create_table(
+        "contracts",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("unit_id", sa.String(), sa.ForeignKey("units.id"), nullable=True),
+        sa.Column("tenant_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("start_date", sa.DateTime(), nullable=False),
+        sa.Column("end_date", sa.DateTime(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("total_contract_value", sa.Float(), nullable=True),
+        sa.Column("balance", sa.Float(), nullable=True),
+        sa.Column("payment_day", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("status", contract_status, nullable=True),
+        sa.Column("contract_file_url", sa.String(), nullable=True),
+    )
+    op.create_index("ix_contracts_id", "contracts", ["id"])
+
+    op.create_table(
+        "payments",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("contract_id", sa.String(), sa.ForeignKey("contracts.id"), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("payment_date", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("payment_method", sa.String(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_payments_id", "payments", ["id"])
+
+    op.create_table(
+        "maintenance_tickets",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("priority", ticket_priority, nullable=True),
+        sa.Column("status", ticket_status, nullable=True),
+        sa.Column("property_id", sa.String(), sa.ForeignKey("properties.id"), nullable=True),
+        sa.Column("unit_id", sa.String(), sa.ForeignKey("units.id"), nullable=True),
+        sa.Column("requester_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("is_resolved", sa.Boolean(), nullable=True),
+        sa.Column("resolved_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_maintenance_tickets_id", "maintenance_tickets", ["id"])
+
+    op.create_table(
+        "user_documents",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("document_type", document_type, nullable=True),
+        sa.Column("file_url", sa.String(), nullable=False),
+        sa.Column("public_id", sa.String(), nullable=True),
+        sa.Column("status", document_status, nullable=True),
+        sa.Column("rejection_reason", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_user_documents_id", "user_documents", ["id"])
+
+
+def downgrade():
+    for table in ["user_documents", "maintenance_tickets", "payments",
+                  "contracts", "units", "properties", "users"]:
+        op.drop_table(table)
+
+    bind = op.get_bind()
+    for enum_type in [contract_status, document_status, document_type,
+                      ticket_status, ticket_priority, unit_status, unit_type, property_type, user_role]:
+        enum_type.drop(bind, checkfirst=True)
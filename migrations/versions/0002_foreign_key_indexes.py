@@ -0,0 +1,43 @@
+"""Índices para las llaves foráneas y los filtros de los routers
+
+Revision ID: 0002_fk_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_fk_indexes"
+down_revision = "0001_baseline"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Propiedades del dueño (siempre filtradas por is_deleted)
+    op.create_index("ix_properties_owner_deleted", "properties", ["owner_id", "is_deleted"])
+    op.create_index("ix_units_property_id", "units", ["property_id"])
+
+    # Contratos: listado del inquilino y validación de solapamiento por unidad
+    op.create_index("ix_contracts_tenant_active", "contracts", ["tenant_id", "is_active"])
+    op.create_index("ix_contracts_unit_status_dates", "contracts", ["unit_id", "status", "start_date", "end_date"])
+
+    # Historial de pagos por contrato (más recientes primero)
+    op.create_index("ix_payments_contract_date", "payments", ["contract_id", sa.text("payment_date DESC")])
+
+    op.create_index("ix_maintenance_tickets_requester_id", "maintenance_tickets", ["requester_id"])
+    op.create_index("ix_maintenance_tickets_property_id", "maintenance_tickets", ["property_id"])
+
+    # Verificación de documentos antes de firmar (user_id + status)
+    op.create_index("ix_user_documents_user_status", "user_documents", ["user_id", "status"])
+
+
+def downgrade():
+    op.drop_index("ix_user_documents_user_status", table_name="user_documents")
+    op.drop_index("ix_maintenance_tickets_property_id", table_name="maintenance_tickets")
+    op.drop_index("ix_maintenance_tickets_requester_id", table_name="maintenance_tickets")
+    op.drop_index("ix_payments_contract_date", table_name="payments")
+    op.drop_index("ix_contracts_unit_status_dates", table_name="contracts")
+    op.drop_index("ix_contracts_tenant_active", table_name="contracts")
+    op.drop_index("ix_units_property_id", table_name="units")
+    op.drop_index("ix_properties_owner_deleted", table_name="properties")
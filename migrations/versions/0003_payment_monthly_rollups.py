@@ -0,0 +1,48 @@
+"""Rollup mensual de cobros por propiedad (para /dashboard/finance)
+
+Revision ID: 0003_payment_rollups
+Revises: 0002_fk_indexes
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_payment_rollups"
+down_revision = "0002_fk_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "payment_monthly_rollups",
+        sa.Column("property_id", sa.String(), sa.ForeignKey("properties.id"), primary_key=True),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("owner_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("collected_amount", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("payment_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_payment_rollups_owner_month", "payment_monthly_rollups", ["owner_id", "month"])
+
+    # Llenar el rollup con el historial existente
+    if op.get_bind().dialect.name == "postgresql":
+        month_expr = "CAST(date_trunc('month', p.payment_date) AS date)"
+    else:
+        month_expr = "date(p.payment_date, 'start of month')"
+
+    op.execute(f"""
+        INSERT INTO payment_monthly_rollups (property_id, month, owner_id, collected_amount, payment_count)
+        SELECT pr.id, {month_expr}, pr.owner_id, SUM(p.amount), COUNT(p.id)
+        FROM payments p
+        JOIN contracts c ON c.id = p.contract_id
+        JOIN units u ON u.id = c.unit_id
+        JOIN properties pr ON pr.id = u.property_id
+        WHERE pr.owner_id IS NOT NULL
+        GROUP BY pr.id, pr.owner_id, {month_expr}
+    """)
+
+
+def downgrade():
+    op.drop_index("ix_payment_rollups_owner_month", table_name="payment_monthly_rollups")
+    op.drop_table("payment_monthly_rollups")
@@ -0,0 +1,23 @@
+"""Índice para paginar propiedades por (created_at, id) dentro de cada dueño
+
+Revision ID: 0004_property_keyset
+Revises: 0003_payment_rollups
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+revision = "0004_property_keyset"
+down_revision = "0003_payment_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Reemplaza a (owner_id, is_deleted): el nuevo índice lo cubre como prefijo
+    op.create_index("ix_properties_owner_created", "properties", ["owner_id", "is_deleted", "created_at", "id"])
+    op.drop_index("ix_properties_owner_deleted", table_name="properties")
+
+
+def downgrade():
+    op.create_index("ix_properties_owner_deleted", "properties", ["owner_id", "is_deleted"])
+    op.drop_index("ix_properties_owner_created", table_name="properties")
@@ -0,0 +1,47 @@
+"""Índice geográfico por celdas para búsquedas de unidades cercanas
+
+Revision ID: 0005_property_geo_index
+Revises: 0004_property_keyset
+Create Date: 2026-10-16
+"""
+import math
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_property_geo_index"
+down_revision = "0004_property_keyset"
+branch_labels = None
+depends_on = None
+
+# Debe coincidir con GEO_CELL_DEGREES de app/services/geo.py al momento de migrar
+GEO_CELL_DEGREES = 0.05
+
+
+def upgrade():
+    geo_index = op.create_table(
+        "property_geo_index",
+        sa.Column("property_id", sa.String(), sa.ForeignKey("properties.id"), primary_key=True),
+        sa.Column("cell", sa.String(), nullable=False),
+        sa.Column("latitude", sa.Float(), nullable=False),
+        sa.Column("longitude", sa.Float(), nullable=False),
+    )
+    op.create_index("ix_property_geo_index_cell", "property_geo_index", ["cell"])
+    op.create_index("ix_property_geo_lat_lon", "property_geo_index", ["latitude", "longitude"])
+
+    # Llenar el índice con las propiedades que ya tienen coordenadas
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, latitude, longitude FROM properties WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+    ))
+    batch = []
+    for property_id, latitude, longitude in rows:
+        cell = f"{math.floor(latitude / GEO_CELL_DEGREES)}:{math.floor(longitude / GEO_CELL_DEGREES)}"
+        batch.append({"property_id": property_id, "cell": cell, "latitude": latitude, "longitude": longitude})
+    if batch:
+        op.bulk_insert(geo_index, batch)
+
+
+def downgrade():
+    op.drop_index("ix_property_geo_lat_lon", table_name="property_geo_index")
+    op.drop_index("ix_property_geo_index_cell", table_name="property_geo_index")
+    op.drop_table("property_geo_index")
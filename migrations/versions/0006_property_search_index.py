@@ -0,0 +1,144 @@
+"""Índice de búsqueda por texto de propiedades
+
+En PostgreSQL: columna tsvector generada (config 'spanish') + índice GIN.
+En otros motores: índice invertido property_search_terms mantenido por la app.
+
+Revision ID: 0006_property_search
+Revises: 0005_property_geo_index
+Create Date: 2026-10-16
+"""
+import re
+import unicodedata
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006_property_search"
+down_revision = "0005_property_geo_index"
+branch_labels = None
+depends_on = None
+
+# Definiciones congeladas: la migración no importa modelos ni servicios de la app,
+# que reflejan el esquema de head (ej: units.owner_id no existe todavía en este punto).
+properties = sa.table(
+    "properties",
+    sa.column("id", sa.String),
+    sa.column("name", sa.String),
+    sa.column("type", sa.String),
+    sa.column("address", sa.String),
+    sa.column("city", sa.String),
+    sa.column("description", sa.Text),
+    sa.column("amenities", sa.JSON),
+)
+units = sa.table(
+    "units",
+    sa.column("property_id", sa.String),
+    sa.column("unit_number", sa.String),
+    sa.column("type", sa.String),
+)
+search_documents = sa.table(
+    "property_search_documents",
+    sa.column("property_id", sa.String),
+    sa.column("content", sa.Text),
+)
+search_terms = sa.table(
+    "property_search_terms",
+    sa.column("term", sa.String),
+    sa.column("property_id", sa.String),
+)
+
+# Copia del normalizador y stemmer de app/services/search.py al momento de esta versión
+SPANISH_SUFFIXES = [
+    "amientos", "imientos", "aciones", "uciones", "amiento", "imiento", "idades",
+    "adoras", "adores", "ancias", "mente", "acion", "ucion", "adora", "ancia",
+    "ables", "ibles", "istas", "idad", "ador", "able", "ible", "ista", "ivas", "ivos",
+    "osos", "osas", "ados", "adas", "idos", "idas", "oso", "osa", "iva", "ivo",
+    "ado", "ada", "ido", "ida", "es", "os", "as", "s", "o", "a", "e",
+]
+MIN_STEM_LENGTH = 3
+BATCH_SIZE = 500
+
+
+def _fold(text):
+    normalized = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in normalized if not unicodedata.combining(ch)).lower()
+
+
+def _stem(word):
+    for suffix in SPANISH_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[:-len(suffix)]
+    return word
+
+
+def _document_text(prop, prop_units):
+    parts = [prop.name, prop.description, prop.address, prop.city, prop.type]
+    for key, value in (prop.amenities or {}).items():
+        if value:
+            parts.append(str(key).replace("_", " "))
+        if isinstance(value, str):
+            parts.append(value)
+    for unit in prop_units:
+        parts.extend([unit.unit_number, unit.type])
+    return _fold(" ".join(p for p in parts if p))
+
+
+def _backfill(bind):
+    """Indexa las propiedades existentes en bloques, con SQL sobre las tablas congeladas."""
+    is_postgres = bind.dialect.name == "postgresql"
+    property_ids = [row[0] for row in bind.execute(sa.select(properties.c.id))]
+    for start in range(0, len(property_ids), BATCH_SIZE):
+        batch = property_ids[start:start + BATCH_SIZE]
+        units_by_property = {}
+        for unit in bind.execute(sa.select(units).where(units.c.property_id.in_(batch))):
+            units_by_property.setdefault(unit.property_id, []).append(unit)
+
+        documents = [
+            {"property_id": prop.id, "content": _document_text(prop, units_by_property.get(prop.id, []))}
+            for prop in bind.execute(sa.select(properties).where(properties.c.id.in_(batch)))
+        ]
+        if documents:
+            bind.execute(search_documents.insert(), documents)
+
+        if not is_postgres:
+            terms = []
+            for doc in documents:
+                words = set(re.findall(r"[a-z0-9]+", doc["content"]))
+                for term in words | {_stem(w) for w in words}:
+                    terms.append({"term": term, "property_id": doc["property_id"]})
+            if terms:
+                bind.execute(search_terms.insert(), terms)
+
+
+def upgrade():
+    op.create_table(
+        "property_search_documents",
+        sa.Column("property_id", sa.String(), sa.ForeignKey("properties.id"), primary_key=True),
+        sa.Column("content", sa.Text(), nullable=False, server_default=""),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "property_search_terms",
+        sa.Column("term", sa.String(), primary_key=True),
+        sa.Column("property_id", sa.String(), sa.ForeignKey("properties.id"), primary_key=True),
+    )
+    op.create_index("ix_property_search_terms_property_id", "property_search_terms", ["property_id"])
+
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE property_search_documents ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('spanish', content)) STORED"
+        )
+        op.execute(
+            "CREATE INDEX ix_property_search_documents_vector "
+            "ON property_search_documents USING gin (search_vector)"
+        )
+
+    # Indexar las propiedades existentes
+    _backfill(bind)
+
+
+def downgrade():
+    op.drop_index("ix_property_search_terms_property_id", table_name="property_search_terms")
+    op.drop_table("property_search_terms")
+    op.drop_table("property_search_documents")
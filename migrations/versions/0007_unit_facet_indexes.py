@@ -0,0 +1,24 @@
+"""Índices para la búsqueda de unidades con facetas
+
+Revision ID: 0007_unit_facets
+Revises: 0006_property_search
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+revision = "0007_unit_facets"
+down_revision = "0006_property_search"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_properties_city", "properties", ["city"])
+    op.create_index("ix_units_status_type_bedrooms_price", "units", ["status", "type", "bedrooms", "base_price"])
+    op.create_index("ix_units_price_id", "units", ["base_price", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_units_price_id", table_name="units")
+    op.drop_index("ix_units_status_type_bedrooms_price", table_name="units")
+    op.drop_index("ix_properties_city", table_name="properties")
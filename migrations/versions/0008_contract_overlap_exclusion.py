@@ -0,0 +1,86 @@
+"""Restricción de exclusión: una unidad no puede tener contratos vigentes que se crucen
+
+Revision ID: 0008_contract_overlap
+Revises: 0007_unit_facets
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_contract_overlap"
+down_revision = "0007_unit_facets"
+branch_labels = None
+depends_on = None
+
+BLOCKING_STATUSES = "('pending', 'signed_by_tenant', 'active')"
+# Cuántos casos se listan en el mensaje de error
+REPORT_LIMIT = 20
+
+
+def _existing_violations(bind):
+    """
+    Filas que harían fallar la restricción: contratos vigentes cruzados en la misma unidad
+    (posibles antes de esta versión, por la carrera entre validar e insertar) y contratos
+    vigentes con end_date < start_date (antes se aceptaban; tsrange los rechaza).
+    """
+    inverted = bind.execute(sa.text(f"""
+        SELECT id, unit_id, start_date, end_date FROM contracts
+        WHERE status IN {BLOCKING_STATUSES} AND end_date < start_date
+        ORDER BY unit_id, start_date
+        LIMIT {REPORT_LIMIT}
+    """)).all()
+    overlaps = bind.execute(sa.text(f"""
+        SELECT a.unit_id, a.id, b.id FROM contracts a
+        JOIN contracts b ON b.unit_id = a.unit_id AND a.id < b.id
+            AND a.start_date <= b.end_date AND b.start_date <= a.end_date
+        WHERE a.status IN {BLOCKING_STATUSES} AND b.status IN {BLOCKING_STATUSES}
+            AND a.end_date >= a.start_date AND b.end_date >= b.start_date
+        ORDER BY a.unit_id
+        LIMIT {REPORT_LIMIT}
+    """)).all()
+    return inverted, overlaps
+
+
+def _violations_message(inverted, overlaps):
+    lines = ["No se puede crear ex_contracts_unit_no_overlap: hay contratos vigentes que la violan.",
+             "Corrígelos (fechas o estado 'terminated'/'rejected') y vuelve a ejecutar 'alembic upgrade head'."]
+    if inverted:
+        lines.append(f"Contratos con end_date < start_date (hasta {REPORT_LIMIT}):")
+        lines += [f"  - contrato {cid} (unidad {unit_id}): {start} -> {end}" for cid, unit_id, start, end in inverted]
+    if overlaps:
+        lines.append(f"Contratos cruzados en la misma unidad (hasta {REPORT_LIMIT} pares):")
+        lines += [f"  - unidad {unit_id}: {first} y {second}" for unit_id, first, second in overlaps]
+    return "\n".join(lines)
+
+
+def upgrade():
+    # Solo Postgres: en SQLite la regla se valida en la aplicación (app/services/availability.py)
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    # Antes de crear la restricción revisamos los datos existentes: si algo la viola,
+    # fallamos con la lista de contratos en lugar del error genérico de Postgres.
+    inverted, overlaps = _existing_violations(op.get_bind())
+    if inverted or overlaps:
+        raise RuntimeError(_violations_message(inverted, overlaps))
+
+    # btree_gist permite combinar "unit_id =" (btree) con "rango &&" (GiST) en la misma restricción
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    # start_date/end_date son timestamp sin zona, por eso tsrange; '[]' = extremos incluidos
+    op.execute(
+        """
+        ALTER TABLE contracts
+        ADD CONSTRAINT ex_contracts_unit_no_overlap
+        EXCLUDE USING gist (
+            unit_id WITH =,
+            tsrange(start_date, end_date, '[]') WITH &&
+        )
+        WHERE (status IN ('pending', 'signed_by_tenant', 'active'))
+        """
+    )
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("ALTER TABLE contracts DROP CONSTRAINT IF EXISTS ex_contracts_unit_no_overlap")
@@ -0,0 +1,27 @@
+"""Clave de idempotencia en pagos (header Idempotency-Key)
+
+Revision ID: 0009_payment_idempotency
+Revises: 0008_contract_overlap
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009_payment_idempotency"
+down_revision = "0008_contract_overlap"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("payments", sa.Column("idempotency_key", sa.String(length=255), nullable=True))
+    # Índice único (no constraint) para que funcione igual en SQLite; los NULL no chocan entre sí
+    op.create_index(
+        "uq_payments_contract_idempotency", "payments", ["contract_id", "idempotency_key"], unique=True
+    )
+
+
+def downgrade():
+    op.drop_index("uq_payments_contract_idempotency", table_name="payments")
+    with op.batch_alter_table("payments") as batch:
+        batch.drop_column("idempotency_key")
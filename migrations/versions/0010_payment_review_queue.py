@@ -0,0 +1,46 @@
+"""Cola de revisión de líneas de extracto bancario sin conciliar
+
+Revision ID: 0010_payment_review_queue
+Revises: 0009_payment_idempotency
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010_payment_review_queue"
+down_revision = "0009_payment_idempotency"
+branch_labels = None
+depends_on = None
+
+review_status = sa.Enum("pending", "resolved", "dismissed", name="reviewstatus")
+
+
+def upgrade():
+    op.create_table(
+        "payment_review_items",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("owner_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("line_key", sa.String(length=255), nullable=False),
+        sa.Column("transaction_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("reference", sa.String(), nullable=True),
+        sa.Column("payer_name", sa.String(), nullable=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("reason", sa.String(), nullable=False),
+        sa.Column("suggested_contract_id", sa.String(), sa.ForeignKey("contracts.id"), nullable=True),
+        sa.Column("status", review_status, nullable=False, server_default="pending"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_payment_review_items_id", "payment_review_items", ["id"])
+    op.create_index("uq_payment_review_owner_line", "payment_review_items", ["owner_id", "line_key"], unique=True)
+    op.create_index(
+        "ix_payment_review_owner_status_created", "payment_review_items", ["owner_id", "status", "created_at"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_payment_review_owner_status_created", table_name="payment_review_items")
+    op.drop_index("uq_payment_review_owner_line", table_name="payment_review_items")
+    op.drop_index("ix_payment_review_items_id", table_name="payment_review_items")
+    op.drop_table("payment_review_items")
+    review_status.drop(op.get_bind(), checkfirst=True)
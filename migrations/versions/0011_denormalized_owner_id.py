@@ -0,0 +1,49 @@
+"""owner_id copiado en units, contracts, payments y maintenance_tickets
+
+Revision ID: 0011_owner_id
+Revises: 0010_payment_review_queue
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_owner_id"
+down_revision = "0010_payment_review_queue"
+branch_labels = None
+depends_on = None
+
+# (tabla, UPDATE que copia el dueño desde la tabla padre) — en orden: cada paso usa el anterior
+BACKFILL = [
+    ("units", "UPDATE units SET owner_id = (SELECT p.owner_id FROM properties p WHERE p.id = units.property_id)"),
+    ("contracts", "UPDATE contracts SET owner_id = (SELECT u.owner_id FROM units u WHERE u.id = contracts.unit_id)"),
+    ("payments", "UPDATE payments SET owner_id = (SELECT c.owner_id FROM contracts c WHERE c.id = payments.contract_id)"),
+    ("maintenance_tickets", "UPDATE maintenance_tickets SET owner_id = (SELECT p.owner_id FROM properties p WHERE p.id = maintenance_tickets.property_id)"),
+]
+
+INDEXES = [
+    ("ix_units_owner_property", "units", ["owner_id", "property_id"]),
+    ("ix_contracts_owner_start", "contracts", ["owner_id", "start_date", "id"]),
+    ("ix_contracts_owner_status", "contracts", ["owner_id", "status"]),
+    ("ix_payments_owner_date", "payments", ["owner_id", "payment_date", "id"]),
+    ("ix_tickets_owner_resolved", "maintenance_tickets", ["owner_id", "is_resolved"]),
+]
+
+
+def upgrade():
+    for table, backfill in BACKFILL:
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column("owner_id", sa.String(), nullable=True))
+            batch.create_foreign_key(f"fk_{table}_owner_id_users", "users", ["owner_id"], ["id"])
+        op.execute(backfill)
+
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    for table, _ in reversed(BACKFILL):
+        with op.batch_alter_table(table) as batch:
+            batch.drop_constraint(f"fk_{table}_owner_id_users", type_="foreignkey")
+            batch.drop_column("owner_id")
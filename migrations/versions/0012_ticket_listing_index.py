@@ -0,0 +1,24 @@
+"""Índice para el listado de tickets filtrado por propiedad, estado y prioridad
+
+Revision ID: 0012_ticket_listing
+Revises: 0011_owner_id
+Create Date: 2026-10-16
+"""
+from alembic import op
+
+revision = "0012_ticket_listing"
+down_revision = "0011_owner_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_tickets_property_status_priority_created",
+        "maintenance_tickets",
+        ["property_id", "status", "priority", "created_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_tickets_property_status_priority_created", table_name="maintenance_tickets")
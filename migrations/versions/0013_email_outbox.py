@@ -0,0 +1,47 @@
+"""Tabla email_outbox (cola persistente de correos)
+
+No forma parte del esquema base: una base marcada con 'alembic stamp 0001_baseline'
+no la tiene. Si ya existe (bases creadas con una versión anterior de 0001_baseline
+que la incluía) no se toca.
+
+Revision ID: 0013_email_outbox
+Revises: 0012_ticket_listing
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0013_email_outbox"
+down_revision = "0012_ticket_listing"
+branch_labels = None
+depends_on = None
+
+email_status = sa.Enum("pending", "sent", "failed", name="emailstatus")
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("email_outbox"):
+        return
+
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("to_email", sa.String(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("html_content", sa.Text(), nullable=False),
+        sa.Column("template", sa.String(), nullable=True),
+        sa.Column("status", email_status, nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_email_outbox_id", "email_outbox", ["id"])
+    op.create_index("ix_email_outbox_to_email", "email_outbox", ["to_email"])
+    op.create_index("ix_email_outbox_status", "email_outbox", ["status"])
+
+
+def downgrade():
+    op.drop_table("email_outbox")
+    email_status.drop(op.get_bind(), checkfirst=True)
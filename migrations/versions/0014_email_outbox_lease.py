@@ -0,0 +1,36 @@
+"""Outbox de correos: estado 'sending' con lease y cuerpo que se borra al enviar
+
+Revision ID: 0014_email_outbox_lease
+Revises: 0013_email_outbox
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0014_email_outbox_lease"
+down_revision = "0013_email_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        # ADD VALUE no puede usarse en la misma transacción que lo agrega
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE emailstatus ADD VALUE IF NOT EXISTS 'sending'")
+
+    with op.batch_alter_table("email_outbox") as batch:
+        batch.add_column(sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True))
+        batch.alter_column("html_content", existing_type=sa.Text(), nullable=True)
+
+    # Los correos ya enviados no necesitan el cuerpo (puede llevar tokens de reset vigentes)
+    op.execute("UPDATE email_outbox SET html_content = NULL WHERE status = 'sent'")
+
+
+def downgrade():
+    op.execute("UPDATE email_outbox SET status = 'pending' WHERE status = 'sending'")
+    op.execute("UPDATE email_outbox SET html_content = '' WHERE html_content IS NULL")
+    with op.batch_alter_table("email_outbox") as batch:
+        batch.alter_column("html_content", existing_type=sa.Text(), nullable=False)
+        batch.drop_column("lease_expires_at")
+    # PostgreSQL no permite quitar un valor de un enum: 'sending' queda definido pero sin uso
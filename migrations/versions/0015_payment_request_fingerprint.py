@@ -0,0 +1,25 @@
+"""Huella del cuerpo de cada pago con Idempotency-Key y búsqueda de claves por dueño
+
+Revision ID: 0015_payment_fingerprint
+Revises: 0014_email_outbox_lease
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0015_payment_fingerprint"
+down_revision = "0014_email_outbox_lease"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("payments", sa.Column("request_fingerprint", sa.String(length=64), nullable=True))
+    # Claves de idempotencia buscadas dentro del dueño (API y conciliación bancaria)
+    op.create_index("ix_payments_owner_idempotency", "payments", ["owner_id", "idempotency_key"])
+
+
+def downgrade():
+    op.drop_index("ix_payments_owner_idempotency", table_name="payments")
+    with op.batch_alter_table("payments") as batch:
+        batch.drop_column("request_fingerprint")
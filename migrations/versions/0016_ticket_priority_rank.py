@@ -0,0 +1,56 @@
+"""Prioridad numérica de los tickets e índices del listado ordenado por urgencia
+
+El listado ordenaba por un CASE sobre la prioridad, que ningún índice puede servir:
+la base leía todos los tickets del dueño y los ordenaba antes del LIMIT.
+
+Revision ID: 0016_ticket_priority_rank
+Revises: 0015_payment_fingerprint
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0016_ticket_priority_rank"
+down_revision = "0015_payment_fingerprint"
+branch_labels = None
+depends_on = None
+
+# Copia de TICKET_PRIORITY_RANK (app/models.py) al momento de esta versión
+PRIORITY_RANK = {"emergency": 0, "high": 1, "medium": 2, "low": 3}
+
+INDEXES = [
+    ("ix_tickets_owner_rank_created", ["owner_id", "priority_rank"]),
+    ("ix_tickets_owner_status_rank_created", ["owner_id", "status", "priority_rank"]),
+    ("ix_tickets_property_status_rank_created", ["property_id", "status", "priority_rank"]),
+]
+
+
+def upgrade():
+    op.add_column(
+        "maintenance_tickets",
+        sa.Column("priority_rank", sa.Integer(), nullable=False, server_default=str(PRIORITY_RANK["medium"])),
+    )
+    whens = " ".join(f"WHEN '{name}' THEN {rank}" for name, rank in PRIORITY_RANK.items())
+    op.execute(
+        f"UPDATE maintenance_tickets SET priority_rank = CASE CAST(priority AS VARCHAR) {whens} "
+        f"ELSE {len(PRIORITY_RANK)} END"
+    )
+
+    # Reemplaza al índice por 'priority' de 0012 (el orden del listado ya no usa esa columna)
+    op.drop_index("ix_tickets_property_status_priority_created", table_name="maintenance_tickets")
+    for name, columns in INDEXES:
+        op.create_index(
+            name, "maintenance_tickets", columns + [sa.text("created_at DESC"), sa.text("id DESC")]
+        )
+
+
+def downgrade():
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name="maintenance_tickets")
+    op.create_index(
+        "ix_tickets_property_status_priority_created",
+        "maintenance_tickets",
+        ["property_id", "status", "priority", "created_at"],
+    )
+    with op.batch_alter_table("maintenance_tickets") as batch:
+        batch.drop_column("priority_rank")
@@ -0,0 +1,83 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# La app lee la configuración al importarse: se fija antes de importar nada de 'app'
+# (load_dotenv no pisa variables ya definidas, así nunca se usa la base del .env).
+_TMP_DIR = tempfile.mkdtemp(prefix="zerium-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ["SECRET_KEY"] = "test-secret"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["DB_ASYNC_ENABLED"] = "false"
+os.environ["EMAIL_OUTBOX_ENABLED"] = "false"
+os.environ["EMAIL_TRANSPORT"] = "file"
+os.environ["EMAIL_FILE_DIR"] = os.path.join(_TMP_DIR, "mail")
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import engine
+from app.main import app
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Esquema creado con las migraciones, igual que en producción."""
+    config = Config(os.path.join(ROOT_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT_DIR, "migrations"))
+    command.upgrade(config, "head")
+    yield engine
+
+
+@pytest.fixture(scope="session")
+def client(database):
+    return TestClient(app)
+
+
+def auth_headers(client, email, role, password="password123"):
+    """Registra (si hace falta) e inicia sesión; devuelve (headers, user_id)."""
+    client.post("/users/", json={"email": email, "password": password, "role": role, "full_name": email.split("@")[0]})
+    response = client.post("/auth/token", data={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return {"Authorization": f"Bearer {body['access_token']}"}, body["user_id"]
+
+
+def activate_contract(contract_id, **values):
+    """Deja el contrato activo (el flujo normal pasa por firmas y documentos) y ajusta columnas."""
+    from app import models
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        db.query(models.Contract).filter(models.Contract.id == contract_id).update(
+            {"status": models.ContractStatus.active, **values}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+@contextmanager
+def count_queries(bind=engine):
+    """Registra las sentencias SQL ejecutadas en el bloque (lista de strings)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", before_cursor_execute)
+
+
+def selects(statements):
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
@@ -0,0 +1,63 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app.services.aging import compute_aging
+from conftest import activate_contract, auth_headers
+
+
+def _columns(*contracts):
+    start, end, amount, day, total, balance = zip(*contracts)
+    return {
+        "start": np.array(start, dtype="datetime64[us]"),
+        "end": np.array(end, dtype="datetime64[us]"),
+        "amount": np.array(amount, dtype=np.float64),
+        "payment_day": np.array(day, dtype=np.int64),
+        "total": np.array(total, dtype=np.float64),
+        "balance": np.array(balance, dtype=np.float64),
+    }
+
+
+def test_unpaid_installments_fall_into_age_buckets():
+    year = (datetime(2026, 1, 1), datetime(2026, 12, 31))
+    buckets = compute_aging(_columns(
+        (*year, 100, 5, 1300, 1200),  # 4 cuotas vencidas al 20/04, 1 pagada
+        (*year, 100, 5, 1300, 0),     # todo pagado por adelantado
+        (*year, 100, 31, 1300, 1300), # día 31 se trata como 28: 3 cuotas vencidas, ninguna pagada
+    ), date(2026, 4, 20))
+
+    assert buckets["current"].tolist() == [100, 0, 100]
+    assert buckets["days_30"].tolist() == [100, 0, 100]
+    assert buckets["days_60"].tolist() == [100, 0, 100]
+    assert buckets["days_90_plus"].tolist() == [0, 0, 0]
+    assert buckets["total"].tolist() == [300, 0, 300]
+
+
+def test_report_groups_arrears_by_property(client):
+    landlord, _ = auth_headers(client, "aging-landlord@example.com", "landlord")
+    _, tenant_id = auth_headers(client, "aging-tenant@example.com", "tenant")
+    response = client.post("/properties/", headers=landlord, json={
+        "name": "Atrasos", "type": "house", "address": "Calle 8", "units": [{"unit_number": "1", "base_price": 100}],
+    })
+    assert response.status_code == 201, response.text
+    response = client.post("/contracts/", headers=landlord, json={
+        "unit_id": response.json()["units"][0]["id"], "tenant_id": tenant_id, "amount": 100,
+        "start_date": "2040-01-01T00:00:00", "end_date": "2040-12-31T00:00:00",
+    })
+    assert response.status_code == 201, response.text
+    contract_id = response.json()["id"]
+    # Empezó hace más de 100 días (cuota el día 1) y no pagó nada: hay deuda en el tramo de 90+ días
+    start = (datetime.utcnow() - timedelta(days=100)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    activate_contract(
+        contract_id, start_date=start, end_date=start + timedelta(days=360),
+        payment_day=1, total_contract_value=1200, balance=1200,
+    )
+
+    report = client.get("/dashboard/aging", headers=landlord).json()
+
+    assert report["totals"]["days_90_plus"] >= 100
+    assert report["totals"]["total"] >= 400
+    assert [p["property_name"] for p in report["properties"]] == ["Atrasos"]
+    assert report["properties"][0]["delinquent_contracts"] == 1
+    assert [c["contract_id"] for c in report["top_delinquent"]] == [contract_id]
+    assert report["top_delinquent"][0]["tenant_name"] == "aging-tenant"
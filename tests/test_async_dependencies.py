@@ -0,0 +1,30 @@
+import pytest
+from fastapi.dependencies.utils import get_dependant
+
+from app.database import get_async_db, get_db
+from app.dependencies import get_current_user, get_current_user_async
+from app.routers import contracts, dashboard, payments, tickets
+
+ASYNC_HANDLERS = [
+    contracts.get_contracts_async,
+    dashboard.get_dashboard_stats_async,
+    payments.get_my_payments_history_async,
+    tickets.get_tickets_async,
+]
+
+
+def _dependency_calls(dependant):
+    for sub in dependant.dependencies:
+        yield sub.call
+        yield from _dependency_calls(sub)
+
+
+@pytest.mark.parametrize("handler", ASYNC_HANDLERS, ids=lambda h: h.__name__)
+def test_async_handlers_do_not_use_the_sync_session(handler):
+    # Una dependencia síncrona con get_db ocuparía un hilo y una conexión del pool síncrono
+    dependant = get_dependant(path="/", call=handler)
+    calls = list(_dependency_calls(dependant))
+    assert get_db not in calls
+    assert get_current_user not in calls
+    assert get_current_user_async in calls
+    assert get_async_db in calls
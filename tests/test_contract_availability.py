@@ -0,0 +1,77 @@
+import importlib.util
+import os
+
+import pytest
+import sqlalchemy as sa
+from fastapi import HTTPException
+
+from app.routers.contracts import _raise_overlap
+from app.services.availability import UNIT_LOCK_STRIPES, _unit_locks, unit_lock
+from conftest import ROOT_DIR, auth_headers
+
+
+@pytest.fixture(scope="module")
+def unit(client):
+    landlord, _ = auth_headers(client, "avail-landlord@example.com", "landlord")
+    _, tenant_id = auth_headers(client, "avail-tenant@example.com", "tenant")
+    response = client.post("/properties/", headers=landlord, json={
+        "name": "Disponibilidad", "type": "building", "address": "Calle 9",
+        "units": [{"unit_number": "1", "base_price": 300}],
+    })
+    assert response.status_code == 201, response.text
+    unit_id = response.json()["units"][0]["id"]
+
+    def create(start, end):
+        return client.post("/contracts/", headers=landlord, json={
+            "unit_id": unit_id, "tenant_id": tenant_id, "amount": 100, "start_date": start, "end_date": end,
+        })
+
+    return create
+
+
+def test_overlapping_contract_is_rejected(unit):
+    assert unit("2030-01-01T00:00:00", "2030-03-31T00:00:00").status_code == 201
+    # Extremos incluidos: empezar el mismo día que termina el anterior también se cruza
+    assert unit("2030-03-31T00:00:00", "2030-05-01T00:00:00").status_code == 400
+    assert unit("2030-04-01T00:00:00", "2030-05-01T00:00:00").status_code == 201
+    assert unit("2030-06-01T00:00:00", "2030-05-01T00:00:00").status_code == 400
+
+
+def test_overlap_message_without_the_conflicting_contract():
+    # El contrato que violó la restricción se borró antes de buscarlo
+    with pytest.raises(HTTPException) as error:
+        _raise_overlap(None)
+    assert error.value.detail == "La unidad ya está reservada en esas fechas"
+
+    with pytest.raises(HTTPException) as error:
+        _raise_overlap("abc")
+    assert error.value.detail.endswith("(Conflicto con contrato #abc)")
+
+
+def test_unit_locks_are_bounded():
+    locks = {id(unit_lock(f"unit-{i}")) for i in range(10 * UNIT_LOCK_STRIPES)}
+    assert len(locks) <= UNIT_LOCK_STRIPES == len(_unit_locks)
+    assert unit_lock("unit-1") is unit_lock("unit-1")
+
+
+def test_overlap_migration_reports_existing_violations():
+    path = os.path.join(ROOT_DIR, "migrations", "versions", "0008_contract_overlap_exclusion.py")
+    spec = importlib.util.spec_from_file_location("overlap_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(sa.text("CREATE TABLE contracts (id TEXT, unit_id TEXT, start_date TIMESTAMP, end_date TIMESTAMP, status TEXT)"))
+        conn.execute(sa.text("INSERT INTO contracts VALUES (:id, :unit, :start, :end, :status)"), [
+            {"id": "a", "unit": "u1", "start": "2026-01-01", "end": "2026-06-30", "status": "active"},
+            {"id": "b", "unit": "u1", "start": "2026-06-01", "end": "2026-12-31", "status": "pending"},
+            {"id": "c", "unit": "u1", "start": "2026-03-01", "end": "2026-04-01", "status": "terminated"},
+            {"id": "d", "unit": "u2", "start": "2026-05-01", "end": "2026-01-01", "status": "active"},
+        ])
+        inverted, overlaps = migration._existing_violations(conn)
+
+    assert [row[0] for row in inverted] == ["d"]
+    assert [tuple(row) for row in overlaps] == [("u1", "a", "b")]
+    message = migration._violations_message(inverted, overlaps)
+    assert "contrato d" in message and "unidad u1: a y b" in message
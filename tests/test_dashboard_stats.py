@@ -0,0 +1,64 @@
+import pytest
+
+from app.services.cache import dashboard_cache
+from conftest import auth_headers, count_queries, selects
+
+
+@pytest.fixture(scope="module")
+def accounts(client):
+    landlord, _ = auth_headers(client, "stats-landlord@example.com", "landlord")
+    tenant, tenant_id = auth_headers(client, "stats-tenant@example.com", "tenant")
+
+    for i in range(2):
+        response = client.post("/properties/", headers=landlord, json={
+            "name": f"Stats {i}", "type": "building", "address": f"Calle {i}",
+            "units": [{"unit_number": f"{i}0{j}", "base_price": 300} for j in range(3)],
+        })
+        assert response.status_code == 201, response.text
+
+    unit_id = client.get("/properties/", headers=landlord).json()[0]["units"][0]["id"]
+    response = client.post("/contracts/", headers=landlord, json={
+        "unit_id": unit_id, "tenant_id": tenant_id, "amount": 300,
+        "start_date": "2026-01-01T00:00:00", "end_date": "2026-12-31T00:00:00",
+    })
+    assert response.status_code == 201, response.text
+    response = client.post("/tickets/", headers=tenant, json={"title": "Fuga", "description": "Baño", "unit_id": unit_id})
+    assert response.status_code == 201, response.text
+    return landlord, tenant
+
+
+def _stats_with_queries(client, headers):
+    # Primera llamada: deja al usuario en la caché de autenticación
+    assert client.get("/dashboard/stats", headers=headers).status_code == 200
+    dashboard_cache.clear()
+    with count_queries() as statements:
+        response = client.get("/dashboard/stats", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json(), statements
+
+
+def test_landlord_stats_use_a_single_select(client, accounts):
+    landlord, _ = accounts
+    stats, statements = _stats_with_queries(client, landlord)
+
+    assert len(selects(statements)) == 1, statements
+    assert stats["total_properties"] == 2
+    assert stats["total_units"] == 6
+    assert stats["pending_tickets"] == 1
+    assert stats["occupancy_rate"] == 0
+
+
+def test_tenant_stats_use_a_single_select(client, accounts):
+    _, tenant = accounts
+    stats, statements = _stats_with_queries(client, tenant)
+
+    assert len(selects(statements)) == 1, statements
+    assert stats == {"active_contracts": 0, "pending_tickets": 1}
+
+
+def test_cached_stats_skip_the_database(client, accounts):
+    landlord, _ = accounts
+    client.get("/dashboard/stats", headers=landlord)
+    with count_queries() as statements:
+        assert client.get("/dashboard/stats", headers=landlord).status_code == 200
+    assert selects(statements) == []
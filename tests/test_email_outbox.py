@@ -0,0 +1,96 @@
+import os
+from datetime import timedelta
+
+import pytest
+
+from app.database import SessionLocal, engine
+from app.models import EmailOutbox, EmailStatus
+from app.services import email_outbox
+from app.services.email import FileTransport
+from app.services.email_outbox import dispatch_pending, queue_email
+
+
+@pytest.fixture
+def db(database):
+    session = SessionLocal()
+    session.query(EmailOutbox).delete()
+    session.commit()
+    yield session
+    session.close()
+
+
+class FailingTransport:
+    def send(self, to_email, subject, html_content):
+        raise RuntimeError("proveedor caído")
+
+
+def test_file_transport_delivers_and_clears_the_body(db, tmp_path):
+    email = queue_email(db, "a@example.com", "Hola", "<p>token=123</p>", template="password_reset")
+
+    assert dispatch_pending(FileTransport(str(tmp_path))) == 1
+
+    files = os.listdir(tmp_path)
+    assert len(files) == 1
+    content = (tmp_path / files[0]).read_text(encoding="utf-8")
+    assert "To: a@example.com" in content and "token=123" in content
+
+    db.refresh(email)
+    assert email.status == EmailStatus.sent
+    assert email.sent_at is not None
+    assert email.html_content is None
+    assert email.lease_expires_at is None
+
+
+def test_send_happens_outside_the_transaction(db, tmp_path):
+    queue_email(db, "b@example.com", "Hola", "<p>x</p>")
+    checked_out = []
+
+    class ProbeTransport(FileTransport):
+        def send(self, to_email, subject, html_content):
+            checked_out.append(engine.pool.checkedout())
+            return super().send(to_email, subject, html_content)
+
+    db.close()  # la sesión del test no debe contar como conexión en uso
+    assert dispatch_pending(ProbeTransport(str(tmp_path))) == 1
+    assert checked_out == [0]
+
+
+def test_failures_back_off_and_are_discarded_after_max_attempts(db, monkeypatch):
+    email = queue_email(db, "c@example.com", "Hola", "<p>x</p>")
+
+    assert dispatch_pending(FailingTransport()) == 1
+    db.refresh(email)
+    assert email.status == EmailStatus.pending
+    assert email.attempts == 1
+    assert "proveedor caído" in email.last_error
+    assert dispatch_pending(FailingTransport()) == 0  # el reintento aún no vence
+
+    email.attempts = email_outbox.MAX_ATTEMPTS - 1
+    email.next_attempt_at = email_outbox._now() - timedelta(seconds=1)
+    db.commit()
+    assert dispatch_pending(FailingTransport()) == 1
+    db.refresh(email)
+    assert email.status == EmailStatus.failed
+    assert email.html_content is None
+
+
+def test_expired_lease_is_reclaimed(db, tmp_path):
+    email = queue_email(db, "d@example.com", "Hola", "<p>x</p>")
+    # Un worker lo tomó y murió antes de registrar el resultado
+    email.status = EmailStatus.sending
+    email.lease_expires_at = email_outbox._now() - timedelta(seconds=1)
+    db.commit()
+
+    assert dispatch_pending(FileTransport(str(tmp_path))) == 1
+    db.refresh(email)
+    assert email.status == EmailStatus.sent
+
+
+def test_active_lease_is_not_taken_twice(db, tmp_path):
+    email = queue_email(db, "e@example.com", "Hola", "<p>x</p>")
+    email.status = EmailStatus.sending
+    email.lease_expires_at = email_outbox._now() + timedelta(minutes=5)
+    db.commit()
+
+    assert dispatch_pending(FileTransport(str(tmp_path))) == 0
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from conftest import activate_contract, auth_headers
+
+
+@pytest.fixture(scope="module")
+def landlord(client):
+    headers, _ = auth_headers(client, "finance-landlord@example.com", "landlord")
+    _, tenant_id = auth_headers(client, "finance-tenant@example.com", "tenant")
+    contracts = []
+    for name in ("Finanzas A", "Finanzas B"):
+        response = client.post("/properties/", headers=headers, json={
+            "name": name, "type": "house", "address": name, "units": [{"unit_number": "1", "base_price": 100}],
+        })
+        assert response.status_code == 201, response.text
+        response = client.post("/contracts/", headers=headers, json={
+            "unit_id": response.json()["units"][0]["id"], "tenant_id": tenant_id, "amount": 100,
+            "start_date": "2026-01-01T00:00:00", "end_date": "2026-12-31T00:00:00",
+        })
+        assert response.status_code == 201, response.text
+        contracts.append(response.json())
+    activate_contract(contracts[0]["id"])
+
+    for amount in (100, 50):
+        response = client.post("/payments/", headers=headers, json={
+            "contract_id": contracts[0]["id"], "amount": amount, "payment_method": "transfer",
+        })
+        assert response.status_code == 201, response.text
+    return headers, contracts
+
+
+def test_monthly_collections_come_from_the_rollup(client, landlord):
+    headers, (paid, _) = landlord
+    stats = client.get("/dashboard/finance", headers=headers, params={"months": 3}).json()
+
+    current_month = datetime.now(timezone.utc).strftime("%Y-%m")
+    assert len(stats["months"]) == 3 and stats["months"][-1] == current_month
+    by_name = {p["property_name"]: p for p in stats["properties"]}
+    assert [m["collected"] for m in by_name["Finanzas A"]["monthly"]] == [0, 0, 150]
+    assert by_name["Finanzas B"]["collected"] == 0
+    assert stats["total_collected"] == 150
+
+
+def test_outstanding_counts_only_active_contracts(client, landlord):
+    headers, (paid, _) = landlord
+    stats = client.get("/dashboard/finance", headers=headers).json()
+
+    total = paid["total_contract_value"]
+    by_name = {p["property_name"]: p for p in stats["properties"]}
+    assert by_name["Finanzas A"]["outstanding_balance"] == total - 150
+    assert by_name["Finanzas A"]["collection_rate"] == round(150 / total * 100, 1)
+    # El contrato pendiente (no activo) no suma deuda
+    assert by_name["Finanzas B"]["outstanding_balance"] == 0
+    assert stats["total_outstanding"] == total - 150
+
+
+def test_tenants_get_no_finance_stats(client, landlord):
+    tenant, _ = auth_headers(client, "finance-tenant@example.com", "tenant")
+    assert client.get("/dashboard/finance", headers=tenant).json() == {}
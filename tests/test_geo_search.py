@@ -0,0 +1,63 @@
+import pytest
+
+from app.database import SessionLocal
+from app.services.geo import find_units_near, haversine_km
+from conftest import auth_headers, count_queries, selects
+
+CENTER = (-1.60, -78.60)
+
+
+@pytest.fixture(scope="module")
+def landlord(client):
+    headers, _ = auth_headers(client, "geo-landlord@example.com", "landlord")
+    # Propiedades cada ~0.55 km hacia el norte y el este, con varias unidades cada una
+    for i in range(12):
+        response = client.post("/properties/", headers=headers, json={
+            "name": f"Geo {i}", "type": "building", "address": f"Av {i}",
+            "latitude": CENTER[0] + 0.005 * (i // 2), "longitude": CENTER[1] + 0.005 * (i % 2),
+            "units": [{"unit_number": f"{i}-{j}", "base_price": 200 + j} for j in range(5)],
+        })
+        assert response.status_code == 201, response.text
+    return headers
+
+
+def test_nearby_matches_exact_distance_order(client, landlord):
+    radius_km = 2.5
+    db = SessionLocal()
+    try:
+        everything = find_units_near(db, *CENTER, radius_km, limit=1000)
+    finally:
+        db.close()
+    assert everything, "el fixture debería dejar unidades dentro del radio"
+    assert all(r["distance_km"] <= radius_km for r in everything)
+    assert [r["distance_km"] for r in everything] == sorted(r["distance_km"] for r in everything)
+
+    response = client.get(
+        "/properties/nearby", headers=landlord,
+        params={"lat": CENTER[0], "lon": CENTER[1], "radius_km": radius_km, "limit": 7},
+    )
+    assert response.status_code == 200, response.text
+    assert [r["id"] for r in response.json()] == [r["id"] for r in everything[:7]]
+
+
+def test_nearby_limits_rows_in_sql(client, landlord):
+    with count_queries() as statements:
+        response = client.get(
+            "/properties/nearby", headers=landlord,
+            params={"lat": CENTER[0], "lon": CENTER[1], "radius_km": 5, "limit": 3},
+        )
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+    search = [s for s in selects(statements) if "property_geo_index" in s]
+    assert len(search) == 1 and "LIMIT" in search[0].upper()
+
+
+def test_nearby_excludes_box_corners(client, landlord):
+    radius_km = 0.6
+    response = client.get(
+        "/properties/nearby", headers=landlord,
+        params={"lat": CENTER[0], "lon": CENTER[1], "radius_km": radius_km, "limit": 200},
+    )
+    rows = response.json()
+    assert rows
+    assert all(haversine_km(*CENTER, r["latitude"], r["longitude"]) <= radius_km for r in rows)
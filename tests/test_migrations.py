@@ -0,0 +1,59 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+from conftest import ROOT_DIR
+
+
+def _alembic(db_path, *args):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    result = subprocess.run(
+        [sys.executable, "-m", "alembic", *args], cwd=ROOT_DIR, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_upgrade_from_baseline_with_existing_data(tmp_path):
+    """Una base del esquema original con datos llega a head (backfills incluidos)."""
+    db_path = tmp_path / "baseline.db"
+    _alembic(db_path, "upgrade", "0001_baseline")
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO users (id, email, password_hash, role) VALUES ('u1', 'a@example.com', 'x', 'landlord')")
+    conn.execute(
+        "INSERT INTO properties (id, name, type, address, city, amenities, owner_id, is_deleted) "
+        "VALUES ('p1', 'Edificio Álamo', 'building', 'Calle 1', 'Riobamba', ?, 'u1', 0)",
+        (json.dumps({"parqueadero": True}),),
+    )
+    conn.execute("INSERT INTO units (id, unit_number, type, property_id, status) VALUES ('x1', '101', 'studio', 'p1', 'vacant')")
+    conn.commit()
+    conn.close()
+
+    _alembic(db_path, "upgrade", "head")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        content = conn.execute("SELECT content FROM property_search_documents WHERE property_id = 'p1'").fetchone()[0]
+        assert "alamo" in content and "parqueadero" in content and "studio" in content
+        terms = {row[0] for row in conn.execute("SELECT term FROM property_search_terms WHERE property_id = 'p1'")}
+        assert {"alamo", "alam", "parqueadero"} <= terms
+        assert conn.execute("SELECT owner_id FROM units WHERE id = 'x1'").fetchone()[0] == "u1"
+    finally:
+        conn.close()
+
+
+def test_stamped_baseline_gets_the_email_outbox(tmp_path):
+    """'alembic stamp 0001_baseline' + 'upgrade head' (despliegues previos a Alembic)."""
+    db_path = tmp_path / "stamped.db"
+    _alembic(db_path, "upgrade", "0001_baseline")
+    _alembic(db_path, "stamp", "0001_baseline")
+    _alembic(db_path, "upgrade", "head")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+    assert "email_outbox" in tables
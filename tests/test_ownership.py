@@ -0,0 +1,33 @@
+from app import models
+from app.database import SessionLocal
+from app.services.ownership import owned_unit_ids
+from conftest import auth_headers
+
+
+def test_property_transfer_moves_unit_ownership(client):
+    seller, _ = auth_headers(client, "owner-seller@example.com", "landlord")
+    buyer, buyer_id = auth_headers(client, "owner-buyer@example.com", "landlord")
+    response = client.post("/properties/", headers=seller, json={
+        "name": "Transferida", "type": "house", "address": "Calle 5",
+        "units": [{"unit_number": "1", "base_price": 300}],
+    })
+    assert response.status_code == 201, response.text
+    property_id, unit_id = response.json()["id"], response.json()["units"][0]["id"]
+    assert client.post("/tickets/", headers=seller, json={"title": "Gotera", "description": "-", "unit_id": unit_id}).status_code == 201
+
+    # Deja la unidad en la caché de permisos con el dueño anterior
+    assert client.put(f"/properties/units/{unit_id}", headers=seller, json={"base_price": 310}).status_code == 200
+
+    db = SessionLocal()
+    try:
+        db.get(models.Property, property_id).owner_id = buyer_id
+        db.commit()
+        assert owned_unit_ids(db, buyer_id, {unit_id}) == {unit_id}
+        assert db.get(models.Unit, unit_id).owner_id == buyer_id
+    finally:
+        db.close()
+
+    assert client.put(f"/properties/units/{unit_id}", headers=seller, json={"base_price": 320}).status_code == 403
+    assert client.put(f"/properties/units/{unit_id}", headers=buyer, json={"base_price": 330}).status_code == 200
+    assert [t["title"] for t in client.get("/tickets/", headers=buyer).json()] == ["Gotera"]
+    assert client.get("/tickets/", headers=seller).json() == []
@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+
+import pytest
+
+from conftest import auth_headers
+
+COLUMNS = ["id", "amount", "payment_method", "notes", "contract_id", "payment_date", "property_name", "unit_number", "tenant_name"]
+
+
+@pytest.fixture(scope="module")
+def ledger(client):
+    landlord, _ = auth_headers(client, "export-landlord@example.com", "landlord")
+    _, tenant_id = auth_headers(client, "export-tenant@example.com", "tenant")
+    response = client.post("/properties/", headers=landlord, json={
+        "name": "Exportación", "type": "house", "address": "Calle 7", "units": [{"unit_number": "7A", "base_price": 100}],
+    })
+    assert response.status_code == 201, response.text
+    response = client.post("/contracts/", headers=landlord, json={
+        "unit_id": response.json()["units"][0]["id"], "tenant_id": tenant_id, "amount": 100,
+        "start_date": "2026-01-01T00:00:00", "end_date": "2026-12-31T00:00:00",
+    })
+    assert response.status_code == 201, response.text
+    contract_id = response.json()["id"]
+    payments = []
+    for amount, notes in ((40, 'Cuota "enero", parcial'), (60, None)):
+        response = client.post("/payments/", headers=landlord, json={
+            "contract_id": contract_id, "amount": amount, "payment_method": "transfer", "notes": notes,
+        })
+        assert response.status_code == 201, response.text
+        payments.append(response.json())
+    return landlord, contract_id, payments
+
+
+def test_csv_rows_are_quoted_and_ordered_by_date(client, ledger):
+    landlord, contract_id, payments = ledger
+    response = client.get("/payments/export", headers=landlord)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].startswith('attachment; filename="pagos_')
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == COLUMNS
+    assert [row[0] for row in rows[1:]] == [p["id"] for p in payments]
+    first = dict(zip(COLUMNS, rows[1]))
+    assert (float(first["amount"]), first["notes"]) == (40, 'Cuota "enero", parcial')
+    assert (first["contract_id"], first["property_name"], first["unit_number"]) == (contract_id, "Exportación", "7A")
+    assert first["tenant_name"] == "export-tenant"
+
+
+def test_ndjson_has_one_object_per_payment(client, ledger):
+    landlord, _, payments = ledger
+    response = client.get("/payments/export", headers=landlord, params={"format": "ndjson"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [p["id"] for p in payments]
+    assert list(rows[1]) == COLUMNS
+    assert (rows[1]["amount"], rows[1]["notes"]) == (60, None)
+
+
+def test_export_is_for_landlords_only(client, ledger):
+    tenant, _ = auth_headers(client, "export-tenant@example.com", "tenant")
+    landlord, _, _ = ledger
+    assert client.get("/payments/export", headers=tenant).status_code == 403
+    assert client.get("/payments/export", headers=landlord, params={"format": "xml"}).status_code == 422
@@ -0,0 +1,64 @@
+import uuid
+
+import pytest
+
+from conftest import auth_headers
+
+
+@pytest.fixture(scope="module")
+def contracts(client):
+    landlord, _ = auth_headers(client, "pay-landlord@example.com", "landlord")
+    _, tenant_id = auth_headers(client, "pay-tenant@example.com", "tenant")
+
+    response = client.post("/properties/", headers=landlord, json={
+        "name": "Pagos", "type": "building", "address": "Calle 1",
+        "units": [{"unit_number": f"10{j}", "base_price": 300} for j in range(2)],
+    })
+    assert response.status_code == 201, response.text
+
+    contract_ids = []
+    for unit in response.json()["units"]:
+        response = client.post("/contracts/", headers=landlord, json={
+            "unit_id": unit["id"], "tenant_id": tenant_id, "amount": 300,
+            "start_date": "2026-01-01T00:00:00", "end_date": "2026-12-31T00:00:00",
+        })
+        assert response.status_code == 201, response.text
+        contract_ids.append(response.json()["id"])
+    return landlord, contract_ids
+
+
+def _pay(client, headers, key, contract_id, amount):
+    return client.post("/payments/", headers={**headers, "Idempotency-Key": key}, json={
+        "contract_id": contract_id, "amount": amount, "payment_method": "transfer",
+    })
+
+
+def test_same_key_and_body_replays_the_payment(client, contracts):
+    landlord, (contract_id, _) = contracts
+    key = str(uuid.uuid4())
+
+    first = _pay(client, landlord, key, contract_id, 50)
+    assert first.status_code == 201, first.text
+    replay = _pay(client, landlord, key, contract_id, 50.00)
+    assert replay.status_code == 200, replay.text
+    assert replay.json()["id"] == first.json()["id"]
+
+
+def test_same_key_with_another_amount_is_rejected(client, contracts):
+    landlord, (contract_id, _) = contracts
+    key = str(uuid.uuid4())
+
+    assert _pay(client, landlord, key, contract_id, 20).status_code == 201
+    response = _pay(client, landlord, key, contract_id, 25)
+    assert response.status_code == 422, response.text
+
+
+def test_same_key_on_another_contract_is_rejected(client, contracts):
+    landlord, (first_contract, second_contract) = contracts
+    key = str(uuid.uuid4())
+
+    assert _pay(client, landlord, key, first_contract, 10).status_code == 201
+    response = _pay(client, landlord, key, second_contract, 10)
+    assert response.status_code == 422, response.text
+    payments = client.get(f"/payments/contract/{second_contract}", headers=landlord).json()
+    assert all(p["amount"] != 10 for p in payments)
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from conftest import auth_headers
+
+
+@pytest.fixture(scope="module")
+def landlord(client):
+    headers, _ = auth_headers(client, "import-landlord@example.com", "landlord")
+    return headers
+
+
+def _import(client, headers, filename, content):
+    response = client.post("/properties/import", headers=headers, files={"file": (filename, content.encode())})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _units_by_property(client, headers):
+    return {p["name"]: sorted(u["unit_number"] for u in p["units"]) for p in client.get("/properties/", headers=headers).json()}
+
+
+def test_csv_groups_rows_by_property(client, landlord):
+    report = _import(client, landlord, "units.csv", (
+        "property_name,property_type,address,city,amenities,unit_number,bedrooms,base_price\n"
+        'Torre CSV,building,Av. 1,Quito,"{""parking"": true}",101,2,350\n'
+        "Torre CSV,building,Av. 1,Quito,,102,,360\n"
+        "Casa CSV,house,Calle 9,,,1,3,500\n"
+    ))
+
+    assert report == {"rows_processed": 3, "properties_created": 2, "units_created": 3, "rows_failed": 0, "errors": []}
+    units = _units_by_property(client, landlord)
+    assert units["Torre CSV"] == ["101", "102"]
+    assert units["Casa CSV"] == ["1"]
+
+
+def test_ndjson_adds_units_to_an_existing_property(client, landlord):
+    rows = [
+        {"property_name": "Torre NDJSON", "property_type": "building", "address": "Av. 2", "unit_number": "1A", "base_price": 300},
+        {"property_name": "Torre NDJSON", "property_type": "building", "address": "Av. 2", "unit_number": "1B", "base_price": 310},
+    ]
+    _import(client, landlord, "units.ndjson", json.dumps(rows[0]) + "\n")
+    report = _import(client, landlord, "units.ndjson", "\n" + json.dumps(rows[1]) + "\n")
+
+    assert (report["properties_created"], report["units_created"], report["rows_failed"]) == (0, 1, 0)
+    assert _units_by_property(client, landlord)["Torre NDJSON"] == ["1A", "1B"]
+
+
+def test_bad_ndjson_rows_are_reported_per_line(client, landlord):
+    good = {"property_name": "Torre Mixta", "property_type": "building", "address": "Av. 3", "unit_number": "1", "base_price": 200}
+    report = _import(client, landlord, "units.ndjson", "\n".join([
+        json.dumps(good),
+        "{no es json",
+        "[1, 2]",
+        '"x"',
+        "5",
+        json.dumps({**good, "unit_number": "2", "base_price": -1}),
+    ]))
+
+    assert (report["rows_processed"], report["units_created"], report["rows_failed"]) == (6, 1, 5)
+    errors = {e["row"]: e["errors"] for e in report["errors"]}
+    assert sorted(errors) == [2, 3, 4, 5, 6]
+    assert all(errors[row][0].startswith("Fila ilegible") for row in (2, 3, 4, 5))
+    assert "se esperaba un objeto JSON" in errors[3][0]
+    assert errors[6][0].startswith("base_price")
+
+
+def test_bad_csv_rows_are_reported(client, landlord):
+    report = _import(client, landlord, "units.csv", (
+        "property_name,property_type,address,amenities,unit_number,base_price\n"
+        "Torre Mala,castle,Av. 4,,1,100\n"
+        "Torre Mala,building,Av. 4,{roto,2,100\n"
+        "Torre Mala,building,Av. 4,,3,100\n"
+    ))
+
+    assert (report["units_created"], report["rows_failed"]) == (1, 2)
+    errors = {e["row"]: e["errors"] for e in report["errors"]}
+    assert errors[2][0].startswith("type")
+    assert errors[3][0].startswith("amenities")
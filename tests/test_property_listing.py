@@ -0,0 +1,39 @@
+from conftest import auth_headers
+
+
+def _pages(client, headers, path, limit):
+    pages, cursor = [], None
+    while True:
+        response = client.get(path, headers=headers, params={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return pages
+
+
+def test_properties_are_paginated_with_the_cursor(client):
+    landlord, _ = auth_headers(client, "listing-landlord@example.com", "landlord")
+    # Creadas en el mismo segundo: el cursor debe distinguirlas igual
+    for name in ("Primera", "Segunda", "Tercera"):
+        response = client.post("/properties/", headers=landlord, json={
+            "name": name, "type": "house", "address": name, "units": [{"unit_number": "1", "base_price": 100}],
+        })
+        assert response.status_code == 201, response.text
+
+    pages = _pages(client, landlord, "/properties/", 2)
+
+    assert [[p["name"] for p in page] for page in pages] == [["Primera", "Segunda"], ["Tercera"]]
+    assert pages[0][0]["units"][0]["unit_number"] == "1"
+
+
+def test_light_listing_skips_units(client):
+    landlord, _ = auth_headers(client, "listing-landlord@example.com", "landlord")
+    response = client.get("/properties/", headers=landlord, params={"include_units": False})
+    assert response.status_code == 200
+    assert all(p["units"] == [] for p in response.json())
+
+
+def test_invalid_cursor_is_rejected(client):
+    landlord, _ = auth_headers(client, "listing-landlord@example.com", "landlord")
+    assert client.get("/properties/", headers=landlord, params={"cursor": "basura"}).status_code == 400
@@ -0,0 +1,141 @@
+import io
+
+import pytest
+
+from app import models
+from app.database import SessionLocal
+from app.services import reconciliation
+from conftest import auth_headers
+
+
+def _landlord_with_active_contract(client, email):
+    landlord, _ = auth_headers(client, email, "landlord")
+    _, tenant_id = auth_headers(client, "rec-" + email, "tenant")
+    response = client.post("/properties/", headers=landlord, json={
+        "name": "Conciliación", "type": "house", "address": "Calle 2",
+        "units": [{"unit_number": "1", "base_price": 300}],
+    })
+    assert response.status_code == 201, response.text
+    response = client.post("/contracts/", headers=landlord, json={
+        "unit_id": response.json()["units"][0]["id"], "tenant_id": tenant_id, "amount": 300,
+        "start_date": "2026-01-01T00:00:00", "end_date": "2026-12-31T00:00:00",
+    })
+    assert response.status_code == 201, response.text
+    contract_id = response.json()["id"]
+
+    # La activación normal pasa por la verificación de documentos
+    db = SessionLocal()
+    db.query(models.Contract).filter(models.Contract.id == contract_id).update({"status": models.ContractStatus.active})
+    db.commit()
+    db.close()
+    return landlord, contract_id
+
+
+def _statement(contract_id):
+    # Mismo FITID en ambos extractos: los bancos no garantizan que sea único entre clientes
+    return f"Fecha,Monto,Referencia,Nombre,Descripción,Id\n05/10/2026,100.00,ARR {contract_id[:8]},X,Pago,TX-1\n".encode()
+
+
+@pytest.fixture(scope="module")
+def landlords(client):
+    return [_landlord_with_active_contract(client, f"rec{i}@example.com") for i in range(2)]
+
+
+def test_same_bank_line_is_posted_for_each_landlord(client, landlords):
+    for landlord, contract_id in landlords:
+        response = client.post("/payments/reconcile", headers=landlord, files={"file": ("ext.csv", _statement(contract_id))})
+        assert response.status_code == 200, response.text
+        assert response.json()["payments_created"] == 1, response.json()
+        assert response.json()["already_posted"] == 0
+
+
+def test_reimport_is_detected_within_the_landlord(client, landlords):
+    landlord, contract_id = landlords[0]
+    response = client.post("/payments/reconcile", headers=landlord, files={"file": ("ext.csv", _statement(contract_id))})
+    assert response.status_code == 200, response.text
+    assert response.json()["payments_created"] == 0
+    assert response.json()["already_posted"] == 1
+
+
+def _reconcile_racing(monkeypatch, owner_id, statement, concurrent):
+    """Concilia llamando a 'concurrent' (otra sesión que hace commit) justo después de leer los contratos."""
+    original = reconciliation._active_contracts
+
+    def active_contracts_then_race(db, owner):
+        contracts = original(db, owner)
+        monkeypatch.setattr(reconciliation, "_active_contracts", original)
+        other = SessionLocal()
+        try:
+            concurrent(other)
+            other.commit()
+        finally:
+            other.close()
+        return contracts
+
+    monkeypatch.setattr(reconciliation, "_active_contracts", active_contracts_then_race)
+    db = SessionLocal()
+    try:
+        return reconciliation.reconcile_statement(db, reconciliation.iter_statement(io.BytesIO(statement), "csv"), owner_id)
+    finally:
+        db.close()
+
+
+def _contract(contract_id):
+    db = SessionLocal()
+    try:
+        return db.get(models.Contract, contract_id)
+    finally:
+        db.close()
+
+
+def _balance(contract_id):
+    return _contract(contract_id).balance
+
+
+def test_concurrent_reimport_counts_lines_as_already_posted(client, monkeypatch):
+    landlord, contract_id = _landlord_with_active_contract(client, "rec-race-import@example.com")
+    owner_id = _contract(contract_id).owner_id
+    statement = _statement(contract_id)
+    before = _balance(contract_id)
+
+    def same_import(other):
+        reconciliation.reconcile_statement(other, reconciliation.iter_statement(io.BytesIO(statement), "csv"), owner_id)
+
+    report = _reconcile_racing(monkeypatch, owner_id, statement, same_import)
+
+    assert report.payments_created == 0
+    assert report.already_posted == 1
+    assert _balance(contract_id) == before - 100
+
+
+def test_balance_drained_meanwhile_sends_lines_to_review(client, monkeypatch):
+    landlord, contract_id = _landlord_with_active_contract(client, "rec-race-balance@example.com")
+    owner_id = _contract(contract_id).owner_id
+
+    def pay_almost_everything(other):
+        other.query(models.Contract).filter(models.Contract.id == contract_id).update({"balance": 50})
+
+    report = _reconcile_racing(monkeypatch, owner_id, _statement(contract_id), pay_almost_everything)
+
+    assert report.payments_created == 0
+    assert report.queued_for_review == 1
+    assert _balance(contract_id) == 50
+    queue = client.get("/payments/review-queue", headers=landlord).json()
+    assert [item["reason"] for item in queue] == ["El saldo del contrato cambió durante la conciliación"]
+
+
+def test_review_queue_is_paginated_with_the_cursor(client):
+    landlord, contract_id = _landlord_with_active_contract(client, "rec-queue@example.com")
+    # Sin referencia ni nombre reconocible: las tres líneas van a revisión
+    statement = "Fecha,Monto,Referencia,Nombre,Descripción,Id\n" + "".join(
+        f"0{day}/10/2026,{day}.00,,Desconocido,Pago,Q-{day}\n" for day in (1, 2, 3)
+    )
+    response = client.post("/payments/reconcile", headers=landlord, files={"file": ("ext.csv", statement.encode())})
+    assert response.json()["queued_for_review"] == 3
+
+    first = client.get("/payments/review-queue", headers=landlord, params={"limit": 2})
+    second = client.get("/payments/review-queue", headers=landlord, params={"limit": 2, "cursor": first.headers["x-next-cursor"]})
+
+    ids = [item["id"] for item in first.json() + second.json()]
+    assert len(first.json()) == 2 and len(second.json()) == 1
+    assert len(set(ids)) == 3
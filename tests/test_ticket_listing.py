@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import text
+
+from app import models
+from app.database import engine
+from app.routers.tickets import TicketFilters, _tickets_statement
+from conftest import auth_headers
+
+PRIORITIES = ["low", "emergency", "medium", "high", "emergency", "low"]
+
+
+@pytest.fixture(scope="module")
+def landlord(client):
+    headers, user_id = auth_headers(client, "tickets-landlord@example.com", "landlord")
+    response = client.post("/properties/", headers=headers, json={
+        "name": "Tickets", "type": "house", "address": "Calle 3",
+        "units": [{"unit_number": "1", "base_price": 300}],
+    })
+    assert response.status_code == 201, response.text
+    unit_id = response.json()["units"][0]["id"]
+    for i, priority in enumerate(PRIORITIES):
+        response = client.post("/tickets/", headers=headers, json={
+            "title": f"Ticket {i}", "description": "-", "unit_id": unit_id, "priority": priority,
+        })
+        assert response.status_code == 201, response.text
+    return headers, user_id
+
+
+def _query_plan(stmt):
+    sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return " | ".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+
+def test_pages_follow_priority_then_newest(client, landlord):
+    headers, _ = landlord
+    seen, cursor = [], None
+    while True:
+        response = client.get("/tickets/", headers=headers, params={"limit": 4, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        seen += response.json()
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == len(PRIORITIES)
+    ranks = [models.TICKET_PRIORITY_RANK[models.TicketPriority(t["priority"])] for t in seen]
+    assert ranks == sorted(ranks)
+    # Dentro de la misma prioridad, los más recientes primero
+    assert [t["title"] for t in seen[:2]] == ["Ticket 4", "Ticket 1"]
+
+
+def test_priority_filter_uses_the_rank(client, landlord):
+    headers, _ = landlord
+    response = client.get("/tickets/", headers=headers, params={"priority": "low"})
+    assert sorted(t["title"] for t in response.json()) == ["Ticket 0", "Ticket 5"]
+
+
+@pytest.mark.parametrize("status", [None, models.TicketStatus.pending])
+def test_landlord_listing_is_served_by_an_index(landlord, status):
+    _, user_id = landlord
+    user = models.User(id=user_id, role=models.UserRole.landlord)
+    plan = _query_plan(_tickets_statement(user, TicketFilters(status=status, limit=20, date_from=None, date_to=None, cursor=None)))
+
+    assert "USING INDEX ix_tickets_owner" in plan or "USING COVERING INDEX ix_tickets_owner" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app import models
+from app.database import SessionLocal
+from app.services.ticket_metrics import QuantileSketch, ticket_metrics_cache
+from conftest import auth_headers
+
+
+def test_sketch_quantiles_stay_within_the_relative_error():
+    values = np.random.default_rng(7).lognormal(mean=3, sigma=1, size=5000)
+    sketch = QuantileSketch(accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.99):
+        assert sketch.quantile(q) == pytest.approx(np.percentile(values, q * 100), rel=0.02)
+    assert QuantileSketch().quantile(0.5) is None
+
+
+@pytest.fixture(scope="module")
+def landlord(client):
+    headers, _ = auth_headers(client, "metrics-landlord@example.com", "landlord")
+    response = client.post("/properties/", headers=headers, json={
+        "name": "Métricas", "type": "house", "address": "Calle 10", "units": [{"unit_number": "1", "base_price": 100}],
+    })
+    assert response.status_code == 201, response.text
+    unit_id = response.json()["units"][0]["id"]
+
+    ids = []
+    for priority in ("high", "high", "low", "medium", "medium"):
+        response = client.post("/tickets/", headers=headers, json={
+            "title": priority, "description": "-", "unit_id": unit_id, "priority": priority,
+        })
+        assert response.status_code == 201, response.text
+        ids.append(response.json()["id"])
+
+    # Tres resueltos (10, 20 y 30 horas después de creados), uno cancelado y uno abierto hace 5 días
+    for ticket_id in ids[:3]:
+        assert client.patch(f"/tickets/{ticket_id}/status", headers=headers, json={"status": "resolved"}).status_code == 200
+    assert client.patch(f"/tickets/{ids[3]}/status", headers=headers, json={"status": "cancelled"}).status_code == 200
+
+    db = SessionLocal()
+    now = datetime.now(timezone.utc)
+    for hours, ticket_id in zip((10, 20, 30), ids[:3]):
+        ticket = db.get(models.MaintenanceTicket, ticket_id)
+        ticket.created_at = ticket.resolved_at.replace(tzinfo=timezone.utc) - timedelta(hours=hours)
+    db.get(models.MaintenanceTicket, ids[4]).created_at = now - timedelta(days=5)
+    db.commit()
+    db.close()
+    ticket_metrics_cache.clear()
+    return headers
+
+
+def test_resolution_percentiles_by_priority(client, landlord):
+    metrics = client.get("/tickets/metrics", headers=landlord, params={"weeks": 4}).json()
+
+    assert metrics["method"] == "quantile_sketch"
+    overall = metrics["resolution_hours"]["overall"]
+    assert overall["count"] == 3
+    assert overall["p50"] == pytest.approx(20, rel=0.02)
+    assert overall["p99"] == pytest.approx(29.8, rel=0.02)
+    assert metrics["resolution_hours"]["by_priority"]["low"]["count"] == 1
+    assert metrics["resolution_hours"]["by_priority"]["high"]["p50"] == pytest.approx(15, rel=0.02)
+    assert [p["property_name"] for p in metrics["resolution_hours"]["by_property"]] == ["Métricas"]
+
+
+def test_open_age_and_backlog_trend(client, landlord):
+    metrics = client.get("/tickets/metrics", headers=landlord, params={"weeks": 4}).json()
+
+    assert metrics["open_age"]["by_priority"] == {"medium": {"lt_1d": 0, "1_3d": 0, "3_7d": 1, "7_30d": 0, "30d_plus": 0}}
+    trend = metrics["backlog_trend"]
+    assert len(trend) == 4
+    # Semana actual: se crearon y resolvieron tres (el cancelado no cuenta) y queda uno abierto
+    assert (trend[-1]["created"], trend[-1]["resolved"], trend[-1]["open_at_end"]) == (4, 3, 1)
+
+
+def test_tenants_get_no_metrics(client, landlord):
+    tenant, _ = auth_headers(client, "metrics-tenant@example.com", "tenant")
+    assert client.get("/tickets/metrics", headers=tenant).json() == {}
@@ -0,0 +1,62 @@
+import pytest
+
+from conftest import auth_headers, count_queries
+
+
+@pytest.fixture(scope="module")
+def building(client):
+    landlord, _ = auth_headers(client, "bulk-landlord@example.com", "landlord")
+    response = client.post("/properties/", headers=landlord, json={
+        "name": "Bulk", "type": "building", "address": "Calle 4",
+        "units": [{"unit_number": f"20{j}", "base_price": 100 + j, "bedrooms": 1 + j % 2} for j in range(4)],
+    })
+    assert response.status_code == 201, response.text
+    return landlord, response.json()
+
+
+def _updates(statements):
+    return [s for s in statements if s.lstrip().upper().startswith("UPDATE UNITS")]
+
+
+def test_per_unit_changes_run_as_one_update(client, building):
+    landlord, prop = building
+    first, second = prop["units"][:2]
+    with count_queries() as statements:
+        response = client.patch("/properties/units/bulk", headers=landlord, json={"units": [
+            {"id": first["id"], "base_price": 150, "status": "maintenance"},
+            {"id": second["id"], "bathrooms": 2},
+        ]})
+
+    assert response.status_code == 200, response.text
+    assert len(_updates(statements)) == 1, statements
+    units = {u["id"]: u for u in response.json()}
+    assert (float(units[first["id"]]["base_price"]), units[first["id"]]["status"]) == (150, "maintenance")
+    # Columnas que no se enviaron conservan su valor
+    second = units[second["id"]]
+    assert (float(second["base_price"]), second["status"], float(second["bathrooms"])) == (101, "vacant", 2)
+
+
+def test_filter_patch_applies_the_multiplier(client, building):
+    landlord, prop = building
+    response = client.patch("/properties/units/bulk", headers=landlord, json={
+        "filter": {"property_id": prop["id"], "bedrooms": 2},
+        "patch": {"base_price_multiplier": 1.1},
+    })
+
+    assert response.status_code == 200, response.text
+    assert sorted(float(u["base_price"]) for u in response.json()) == [111.1, 113.3]
+
+
+def test_units_of_another_landlord_are_rejected(client, building):
+    _, prop = building
+    intruder, _ = auth_headers(client, "bulk-intruder@example.com", "landlord")
+    response = client.patch("/properties/units/bulk", headers=intruder, json={
+        "units": [{"id": prop["units"][0]["id"], "status": "vacant"}],
+    })
+    assert response.status_code == 403
+
+
+def test_filter_without_patch_is_invalid(client, building):
+    landlord, prop = building
+    response = client.patch("/properties/units/bulk", headers=landlord, json={"filter": {"property_id": prop["id"]}})
+    assert response.status_code == 422
@@ -0,0 +1,49 @@
+import pytest
+
+from conftest import auth_headers
+
+# Ciudad propia: la búsqueda es sobre todas las unidades, filtramos por ella para aislar el test
+CITY = "Facetópolis"
+
+
+@pytest.fixture(scope="module")
+def landlord(client):
+    headers, _ = auth_headers(client, "facets-landlord@example.com", "landlord")
+    response = client.post("/properties/", headers=headers, json={
+        "name": "Facetas", "type": "building", "address": "Calle 6", "city": CITY,
+        "units": [
+            {"unit_number": "1", "bedrooms": 1, "base_price": 150},
+            {"unit_number": "2", "bedrooms": 2, "base_price": 250},
+            {"unit_number": "3", "bedrooms": 2, "base_price": 450, "status": "maintenance"},
+            {"unit_number": "4", "bedrooms": 2, "base_price": 390},
+        ],
+    })
+    assert response.status_code == 201, response.text
+    return headers
+
+
+def _counts(facet):
+    return {item["value"]: item["count"] for item in facet}
+
+
+def test_facet_counts_ignore_their_own_filter(client, landlord):
+    response = client.get("/properties/units/search", headers=landlord, params={"city": CITY, "bedrooms": 2})
+    assert response.status_code == 200, response.text
+    body = response.json()
+
+    assert sorted(item["unit_number"] for item in body["items"]) == ["2", "3", "4"]
+    # 'bedrooms' muestra las alternativas (sin su propio filtro); el resto respeta bedrooms=2
+    assert _counts(body["facets"]["bedrooms"]) == {"1": 1, "2": 3}
+    assert _counts(body["facets"]["price"]) == {"200-400": 2, "400-600": 1}
+    assert _counts(body["facets"]["status"]) == {"vacant": 2, "maintenance": 1}
+    assert _counts(body["facets"]["city"])[CITY] == 3
+
+
+def test_items_are_paginated_by_price(client, landlord):
+    params = {"city": CITY, "max_price": 400, "limit": 2}
+    first = client.get("/properties/units/search", headers=landlord, params=params).json()
+    second = client.get("/properties/units/search", headers=landlord, params={**params, "cursor": first["next_cursor"]}).json()
+
+    assert [float(i["base_price"]) for i in first["items"]] == [150, 250]
+    assert [float(i["base_price"]) for i in second["items"]] == [390]
+    assert second["next_cursor"] is None